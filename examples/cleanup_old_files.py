@@ -7,6 +7,7 @@ import sys
 from pathlib import Path
 
 from expired_file_remover import remove_expired_files
+from expired_file_remover.progress import TTYProgressBar
 
 
 def parse_args():
@@ -30,6 +31,9 @@ def parse_args():
         nargs="+",
         help="対象とするファイル拡張子（例: .txt .log）",
     )
+    parser.add_argument(
+        "--progress", action="store_true", help="進捗をプログレスバーで表示する"
+    )
     return parser.parse_args()
 
 
@@ -68,7 +72,11 @@ def main():
     # 処理を実行
     try:
         count = remove_expired_files(
-            dir_path, args.days, recursive=args.recursive, file_filter=file_filter
+            dir_path,
+            args.days,
+            recursive=args.recursive,
+            file_filter=file_filter,
+            progress=TTYProgressBar() if args.progress else None,
         )
         print(f"\n削除されたファイル数: {count}")
     except Exception as e:
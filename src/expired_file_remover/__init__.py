@@ -1,7 +1,39 @@
 """
 expired_file_remover - 期限切れファイルを削除するパッケージ
+
+公開 API は最初に参照されたときにインポートされます。`import expired_file_remover`
+だけでは core や任意の機能（NumPy による一括解析、マニフェストなど）のモジュールは
+読み込まれないため、短時間で終了するプロセスの起動時間を抑えられます。
 """
 
-from .core import is_expired, remove_expired_file, remove_expired_files
+# typing のインポートも起動時間に含まれるため、型チェック時だけ参照する
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from .core import is_expired, remove_expired_file, remove_expired_files
+    from .result import RemovalResult
+
+# 公開する名前と、その名前を定義するモジュール
+_LAZY_ATTRIBUTES: dict[str, str] = {
+    "remove_expired_file": ".core",
+    "remove_expired_files": ".core",
+    "is_expired": ".core",
+    "RemovalResult": ".result",
+}
+
+__all__ = ["remove_expired_file", "remove_expired_files", "is_expired", "RemovalResult"]
+
+
+def __getattr__(name: str) -> object:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(module_name, __name__), name)
+    # 2回目以降はモジュールの属性として直接参照されるようにする
+    globals()[name] = value
+    return value
+
 
-__all__ = ["remove_expired_file", "remove_expired_files", "is_expired"]
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,332 @@
+"""
+ディレクトリのファイル名一覧からまとめて日付を解析する機能を提供するモジュール
+
+日付部分の検索（正規表現のマッチ）はファイル名ごとに Python で行います。NumPy が
+インストールされている場合は、マッチした固定幅の数字を配列として取り出し、月・日の
+範囲チェックとエポック秒への変換をベクトル化して、ファイル名ごとの datetime の生成を
+省きます。インストールされていない場合は純粋な Python の実装にフォールバックします。
+
+固定幅の数字のフィールド（%Y %y %m %d %H %I %M %S）だけからなるフォーマットが対象です。
+それ以外の指定子（%f %j %b %B %G %V %u %s %Q %z）を含むフォーマットは、
+_FilenameDateParser による通常の判定にフォールバックします。
+"""
+
+from datetime import datetime, timedelta, tzinfo
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .core import _FilenameDateParser, _resolve_cutoff_timestamp, _resolve_deadline
+
+if TYPE_CHECKING:
+    from .core import _DirectoryWalker
+
+# 1回にまとめて処理するファイル名の数
+DEFAULT_BATCH_SIZE = 65536
+
+# フォーマット指定子とその桁数
+_FIELD_WIDTHS = {
+    "%Y": 4,
+    "%y": 2,
+    "%m": 2,
+    "%d": 2,
+    "%H": 2,
+    "%I": 2,
+    "%M": 2,
+    "%S": 2,
+}
+
+# 可変幅・数字以外・日付の組み立て方が異なるため、配列による判定の対象外とする指定子
+_FALLBACK_SPECIFIERS = frozenset(
+    {"%f", "%j", "%b", "%B", "%G", "%V", "%u", "%s", "%Q", "%z"}
+)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _stem(name: str) -> str:
+    """pathlib.PurePath.stem と同じ規則でファイル名から拡張子を除きます"""
+    i = name.rfind(".")
+    if 0 < i < len(name) - 1:
+        return name[:i]
+    return name
+
+
+def _field_layout(date_format: str) -> Optional[List[Tuple[str, int, int]]]:
+    """
+    マッチした日付文字列の中での各フィールドの位置を求めます
+
+    Returns:
+        Optional[List[Tuple[str, int, int]]]: (指定子, 開始位置, 桁数) のリスト。
+            %Y と %y が混在している場合や、_FALLBACK_SPECIFIERS などの
+            固定幅の数字ではない指定子を含む場合はNone
+    """
+    layout = []
+    offset = 0
+    pos = 0
+    while pos < len(date_format):
+        spec = date_format[pos : pos + 2]
+        if spec in _FIELD_WIDTHS:
+            layout.append((spec, offset, _FIELD_WIDTHS[spec]))
+            offset += _FIELD_WIDTHS[spec]
+            pos += 2
+        elif spec in _FALLBACK_SPECIFIERS:
+            return None
+        elif date_format[pos] == "%":
+            # 指定子ではない "%" はリテラルとして扱われるが、まれなので通常の判定に任せる
+            return None
+        else:
+            offset += 1
+            pos += 1
+
+    specs = [spec for spec, _, _ in layout]
+    if "%Y" in specs and "%y" in specs:
+        return None
+    return layout
+
+
+def _fields_to_datetime(
+    text: str, layout: List[Tuple[str, int, int]]
+) -> Optional[datetime]:
+    """マッチした日付文字列の各フィールドを整数として取り出し、datetime を組み立てます"""
+    year, month, day, hour, minute, second = 1900, 1, 1, 0, 0, 0
+    for spec, offset, width in layout:
+        value = int(text[offset : offset + width])
+        if spec == "%Y":
+            year = value
+        elif spec == "%y":
+            # strptime と同じく 69〜99 は1900年代、00〜68 は2000年代とする
+            year = value + (2000 if value < 69 else 1900)
+        elif spec == "%m":
+            month = value
+        elif spec == "%d":
+            day = value
+        elif spec == "%H":
+            hour = value
+        elif spec == "%I":
+            if not 1 <= value <= 12:
+                return None
+            # strptime は %p がない場合 %I の 12 を 0 時として扱う
+            hour = 0 if value == 12 else value
+        elif spec == "%M":
+            minute = value
+        else:
+            second = value
+    try:
+        return datetime(year, month, day, hour, minute, second)
+    except ValueError:
+        return None
+
+
+def _python_mask(
+    stems: Sequence[str],
+    parser: _FilenameDateParser,
+    layout: List[Tuple[str, int, int]],
+    cutoff: datetime,
+) -> List[bool]:
+    """整数のフィールドから直接 datetime を組み立てて判定する純粋な Python の実装"""
+    mask = []
+    for stem in stems:
+        match = parser.regex.search(stem)
+        dt = _fields_to_datetime(match.group(0), layout) if match else None
+        mask.append(dt is not None and dt < cutoff)
+    return mask
+
+
+def _numpy_mask(
+    np: Any,
+    stems: Sequence[str],
+    parser: _FilenameDateParser,
+    layout: List[Tuple[str, int, int]],
+    cutoff: datetime,
+) -> List[bool]:
+    """日付部分の数字を配列に取り出してベクトル化して判定する NumPy の実装"""
+    indices = []
+    texts = []
+    for i, stem in enumerate(stems):
+        match = parser.regex.search(stem)
+        if match is not None:
+            indices.append(i)
+            texts.append(match.group(0))
+
+    mask = np.zeros(len(stems), dtype=bool)
+    if not texts:
+        return list(mask.tolist())
+
+    # 固定幅の文字列を (件数, 文字数) の数字の行列として扱う
+    width = len(texts[0])
+    chars = np.array(texts, dtype=f"U{width}").view(np.uint32).reshape(-1, width)
+    digits = chars.astype(np.int64) - ord("0")
+
+    n = len(texts)
+    # \d は ASCII 以外の数字にもマッチするため、その行は後で個別に判定する
+    ascii_digits = np.ones(n, dtype=bool)
+
+    def field(offset: int, size: int) -> Any:
+        nonlocal ascii_digits
+        value = np.zeros(n, dtype=np.int64)
+        for k in range(size):
+            digit = digits[:, offset + k]
+            ascii_digits &= (digit >= 0) & (digit <= 9)
+            value = value * 10 + digit
+        return value
+
+    values: Dict[str, Any] = {
+        "%Y": np.full(n, 1900, dtype=np.int64),
+        "%m": np.ones(n, dtype=np.int64),
+        "%d": np.ones(n, dtype=np.int64),
+        "%H": np.zeros(n, dtype=np.int64),
+        "%M": np.zeros(n, dtype=np.int64),
+        "%S": np.zeros(n, dtype=np.int64),
+    }
+    valid = np.ones(n, dtype=bool)
+    for spec, offset, size in layout:
+        value = field(offset, size)
+        if spec == "%y":
+            values["%Y"] = value + np.where(value < 69, 2000, 1900)
+        elif spec == "%I":
+            valid &= (value >= 1) & (value <= 12)
+            values["%H"] = np.where(value == 12, 0, value)
+        else:
+            values[spec] = value
+
+    year, month, day = values["%Y"], values["%m"], values["%d"]
+    hour, minute, second = values["%H"], values["%M"], values["%S"]
+
+    leap = ((year % 4 == 0) & (year % 100 != 0)) | (year % 400 == 0)
+    days_in_month = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+    month_index = np.clip(month, 0, 12)
+    max_day = days_in_month[month_index] + ((month == 2) & leap)
+    valid &= (year >= 1) & (month >= 1) & (month <= 12)
+    valid &= (day >= 1) & (day <= max_day)
+    valid &= (hour <= 23) & (minute <= 59) & (second <= 59)
+
+    # 1970-01-01 からの日数（Howard Hinnant の days_from_civil）
+    y = year - (month <= 2)
+    era = np.floor_divide(y, 400)
+    yoe = y - era * 400
+    mp = (month + 9) % 12
+    doy = (153 * mp + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = era * 146097 + doe - 719468
+    seconds = days * 86400 + hour * 3600 + minute * 60 + second
+
+    cutoff_seconds = (cutoff - _EPOCH) / timedelta(seconds=1)
+    rows = np.array(indices)
+    mask[rows] = valid & ascii_digits & (seconds < cutoff_seconds)
+    for k in np.flatnonzero(~ascii_digits).tolist():
+        dt = _fields_to_datetime(texts[k], layout)
+        mask[rows[k]] = dt is not None and dt < cutoff
+    return list(mask.tolist())
+
+
+def _load_numpy() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _combined_mask(
+    stems: Sequence[str],
+    parsers: List[_FilenameDateParser],
+    cutoff: datetime,
+    np: Any,
+    batch_size: int,
+) -> List[bool]:
+    """いずれかのフォーマットで期限切れと判定されたファイル名のマスクを返します"""
+    mask = [False] * len(stems)
+    for parser in parsers:
+        if not parser.checkable:
+            continue
+        layout = _field_layout(parser.date_format)
+        cutoff_timestamp = _resolve_cutoff_timestamp(cutoff, parser.tz)
+        for start in range(0, len(stems), batch_size):
+            batch = stems[start : start + batch_size]
+            if layout is None:
+                # 通常の解析にフォールバックする
+                result = [
+                    parser.expired(stem, cutoff, cutoff_timestamp) for stem in batch
+                ]
+            elif np is not None:
+                result = _numpy_mask(np, batch, parser, layout, cutoff)
+            else:
+                result = _python_mask(batch, parser, layout, cutoff)
+            for i, expired in enumerate(result, start):
+                if expired:
+                    mask[i] = True
+    return mask
+
+
+def _bulk_candidates(
+    walker: "_DirectoryWalker",
+    parsers: List[_FilenameDateParser],
+    cutoff: datetime,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[Path]:
+    """
+    ディレクトリごとにファイル名をまとめて解析し、期限切れのファイルだけを返します
+
+    呼び出し側は返されたファイルを通常どおり解析し直すため、判定結果は変わりません。
+    """
+    np = _load_numpy()
+    for directory, names in walker.listings():
+        stems = [_stem(name) for name in names]
+        mask = _combined_mask(stems, parsers, cutoff, np, batch_size)
+        for name, expired in zip(names, mask):
+            if expired:
+                yield directory / name
+
+
+def expired_mask(
+    names: Sequence[str],
+    date_format: Union[str, List[str]],
+    deadline: Union[datetime, timedelta, int],
+    use_numpy: Optional[bool] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    tz: Optional[tzinfo] = None,
+) -> List[bool]:
+    """
+    ファイル名の一覧をまとめて解析し、ファイル名の日付が期限切れかどうかを返します
+
+    is_filename_date_expired を各ファイル名に適用した場合と同じ結果になりますが、
+    strptime を使わず、フォーマットの解析と正規表現のコンパイルも1回だけ行います。
+
+    Args:
+        names: ファイル名の一覧（ディレクトリ部分を含まない名前）
+        date_format: 日付フォーマット（例: '%Y%m%d'）またはフォーマットのリスト。
+            リストの場合はいずれかのフォーマットで期限切れならTrue
+        deadline: 期限を示すデータ（datetime、timedelta、または日数）
+        use_numpy: NumPy を使用するかどうか。Noneの場合はインストールされていれば使用する
+        batch_size: 1回にまとめて処理するファイル名の数
+        tz: ファイル名の日付のタイムゾーン。Noneの場合はローカル時刻
+
+    Returns:
+        List[bool]: names と同じ順序の、期限切れかどうかのマスク
+
+    Raises:
+        ValueError: 有効な日付フォーマット指定子が含まれていない場合、または
+            異なる指定子が同じフィールドを表している場合
+        ImportError: use_numpy=True で NumPy がインストールされていない場合
+    """
+    formats = [date_format] if isinstance(date_format, str) else date_format
+    parsers = [_FilenameDateParser(fmt, tz) for fmt in formats]
+    cutoff = _resolve_deadline(deadline, tz)
+
+    np = _load_numpy() if use_numpy is not False else None
+    if use_numpy and np is None:
+        raise ImportError("use_numpy=True を指定するには NumPy が必要です")
+
+    return _combined_mask(
+        [_stem(name) for name in names], parsers, cutoff, np, batch_size
+    )
@@ -0,0 +1,162 @@
+"""
+ファイル名の日付解析の結果をキャッシュする機能を提供するモジュール
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, tzinfo
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+# キャッシュファイルのフォーマットバージョン
+CACHE_VERSION = 2
+
+
+def _tz_key(tz: Optional[tzinfo]) -> str:
+    """
+    キャッシュの対象を区別するためのタイムゾーンの文字列を返します
+
+    Noneの場合はローカル時刻を使用するため、システムのタイムゾーンを含めます。
+    """
+    if tz is None:
+        return f"local:{time.timezone}:{time.altzone}:{'/'.join(time.tzname)}"
+    return repr(tz)
+
+
+class ParseCache:
+    """
+    ファイル名（拡張子を除く）ごとに日付の解析結果を保持する LRU キャッシュ
+
+    日付を含まない名前（解析に失敗した結果）も記録するため、日付付きでない
+    ファイルが大半を占めるディレクトリでも、2回目以降の実行では正規表現を
+    実行し直しません。保持する件数は max_entries で制限され、最も長く使われて
+    いない結果から破棄されます。
+
+    解析結果は日付フォーマットの組み合わせと、エポック秒や UTC オフセット付きの日時を
+    変換するタイムゾーンに依存するため、異なるフォーマットまたはタイムゾーンで
+    使用すると（bind の呼び出し時に）内容を破棄します。
+
+    Args:
+        max_entries: 保持する結果の上限
+        path: キャッシュを保存するファイルのパス。指定した場合、ファイルがあれば
+            読み込み、save で書き込む
+
+    Attributes:
+        hits: キャッシュから結果を返した回数
+        misses: 解析を行った回数
+        evictions: 上限を超えて破棄した結果の数
+    """
+
+    def __init__(
+        self, max_entries: int = 100_000, path: Optional[Union[str, Path]] = None
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entriesは正の整数である必要があります")
+        self.max_entries = max_entries
+        self.path = Path(path) if path is not None else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._formats: Optional[List[str]] = None
+        self._tz: Optional[str] = None
+        self._entries: "OrderedDict[str, Optional[datetime]]" = OrderedDict()
+        if self.path is not None:
+            self._load(self.path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, stem: object) -> bool:
+        return stem in self._entries
+
+    def _load(self, path: Path) -> None:
+        try:
+            with open(path, encoding="utf-8", errors="surrogateescape") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if not isinstance(state, dict) or state.get("version") != CACHE_VERSION:
+            return
+        self._formats = state.get("formats")
+        self._tz = state.get("tz")
+        for stem, value in state.get("entries", [])[-self.max_entries :]:
+            self._entries[stem] = (
+                datetime.fromisoformat(value) if value is not None else None
+            )
+
+    def bind(self, formats: List[str], tz: Optional[tzinfo] = None) -> None:
+        """
+        使用する日付フォーマットの組み合わせとタイムゾーンを設定します
+
+        以前と異なるフォーマットまたはタイムゾーンが指定された場合はキャッシュの内容を
+        破棄します。
+
+        Args:
+            formats: 日付フォーマットのリスト
+            tz: ファイル名の日付のタイムゾーン。Noneの場合はローカル時刻
+        """
+        tz_key = _tz_key(tz)
+        if self._formats is not None and (
+            self._formats != list(formats) or self._tz != tz_key
+        ):
+            self._entries.clear()
+        self._formats = list(formats)
+        self._tz = tz_key
+
+    def get_or_parse(
+        self, stem: str, parse: Callable[[str], Optional[datetime]]
+    ) -> Optional[datetime]:
+        """
+        キャッシュされた解析結果を返し、なければ解析して記録します
+
+        Args:
+            stem: ファイル名（拡張子を除く）
+            parse: キャッシュにない場合に呼び出す解析関数
+
+        Returns:
+            Optional[datetime]: 解析結果。日付を含まない場合はNone
+        """
+        entries = self._entries
+        if stem in entries:
+            entries.move_to_end(stem)
+            self.hits += 1
+            return entries[stem]
+
+        self.misses += 1
+        result = parse(stem)
+        entries[stem] = result
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def clear(self) -> None:
+        """キャッシュの内容を破棄します"""
+        self._entries.clear()
+
+    def save(self) -> None:
+        """
+        キャッシュをファイルにアトミックに書き込みます
+
+        Raises:
+            ValueError: path が指定されていない場合
+        """
+        if self.path is None:
+            raise ValueError("キャッシュファイルのパスが指定されていません")
+        state = {
+            "version": CACHE_VERSION,
+            "formats": self._formats,
+            "tz": self._tz,
+            "entries": [
+                [stem, value.isoformat() if value is not None else None]
+                for stem, value in self._entries.items()
+            ],
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8", errors="surrogateescape") as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
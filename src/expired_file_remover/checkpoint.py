@@ -0,0 +1,148 @@
+"""
+長時間のクリーンアップを中断・再開するためのチェックポイント機能を提供するモジュール
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+# 状態ファイルのフォーマットバージョン
+CHECKPOINT_VERSION = 1
+
+
+def _frontier_state(
+    root: Path, recursive: bool, frontier: List[Path]
+) -> Dict[str, Any]:
+    """フロンティアを保存用の辞書に変換します"""
+    return {
+        "version": CHECKPOINT_VERSION,
+        "root": str(root.resolve()),
+        "recursive": recursive,
+        "pending": [os.path.relpath(p, root) for p in frontier],
+    }
+
+
+def _frontier_from_state(
+    state: Any, root: Path, recursive: bool
+) -> Optional[List[Path]]:
+    """保存用の辞書からフロンティアを復元します。別の走査のものである場合はNone"""
+    if (
+        not isinstance(state, dict)
+        or state.get("version") != CHECKPOINT_VERSION
+        or state.get("root") != str(root.resolve())
+        or state.get("recursive") != recursive
+    ):
+        return None
+    return [root / rel for rel in state.get("pending", [])]
+
+
+def encode_resume_token(root: Path, recursive: bool, frontier: List[Path]) -> str:
+    """
+    走査のフロンティアを再開用トークン文字列に変換します
+
+    Args:
+        root: 走査のルートディレクトリ
+        recursive: 再帰的に走査するかどうか
+        frontier: 未処理ディレクトリのスタック
+
+    Returns:
+        str: 再開用トークン（JSON文字列）
+    """
+    return json.dumps(_frontier_state(root, recursive, frontier), ensure_ascii=False)
+
+
+def decode_resume_token(token: str, root: Path, recursive: bool) -> List[Path]:
+    """
+    再開用トークンから走査のフロンティアを復元します
+
+    Args:
+        token: encode_resume_token で生成されたトークン
+        root: 走査のルートディレクトリ
+        recursive: 再帰的に走査するかどうか
+
+    Returns:
+        List[Path]: 未処理ディレクトリのスタック
+
+    Raises:
+        ValueError: トークンが不正、または別の走査のものである場合
+    """
+    try:
+        frontier = _frontier_from_state(json.loads(token), root, recursive)
+    except ValueError:
+        frontier = None
+    if frontier is None:
+        raise ValueError(f"再開用トークンが不正か、別の走査のものです: {token}")
+    return frontier
+
+
+class Checkpoint:
+    """
+    ディレクトリ走査のフロンティア（未処理ディレクトリのスタック）を状態ファイルに保存します
+
+    走査はディレクトリ単位で行われるため、フロンティアにはまだ処理していない
+    ディレクトリと処理中のディレクトリのみが記録されます。再開時は処理中だった
+    ディレクトリを先頭から処理し直しますが、削除済みのファイルはすでに存在しないため
+    結果は変わりません。
+
+    Args:
+        state_path: 状態ファイルのパス
+        root: 走査のルートディレクトリ
+        recursive: 再帰的に走査するかどうか。保存時と異なる設定の状態ファイルは無視される
+        interval: 定期保存の間隔（秒）
+    """
+
+    def __init__(
+        self,
+        state_path: Union[str, Path],
+        root: Path,
+        recursive: bool,
+        interval: float = 60.0,
+    ) -> None:
+        self.state_path = Path(state_path)
+        self.root = root
+        self.recursive = recursive
+        self.interval = interval
+        self._last_saved = time.monotonic()
+
+    def load(self) -> Optional[List[Path]]:
+        """
+        状態ファイルからフロンティアを読み込みます
+
+        Returns:
+            Optional[List[Path]]: 未処理ディレクトリのスタック。
+                状態ファイルがない、壊れている、または別の走査のものである場合はNone
+        """
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        return _frontier_from_state(state, self.root, self.recursive)
+
+    def save(self, frontier: List[Path]) -> None:
+        """
+        フロンティアを状態ファイルにアトミックに書き込みます
+
+        Args:
+            frontier: 未処理ディレクトリのスタック（末尾から順に処理される）
+        """
+        state = _frontier_state(self.root, self.recursive, frontier)
+        state["saved_at"] = time.time()
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+        self._last_saved = time.monotonic()
+
+    def due(self) -> bool:
+        """前回の保存から interval 秒以上経過しているかどうかを返します"""
+        return time.monotonic() - self._last_saved >= self.interval
+
+    def clear(self) -> None:
+        """走査が完了した後に状態ファイルを削除します"""
+        self.state_path.unlink(missing_ok=True)
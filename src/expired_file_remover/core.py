@@ -2,14 +2,104 @@
 エクスパイア（有効期限切れ）したファイルを削除するモジュール
 """
 
+import bisect
+import errno
 import os
 import re
-from datetime import datetime, timedelta
+import stat
+import time
+from datetime import date, datetime
+from datetime import time as dt_time
+from datetime import timedelta, timezone, tzinfo
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
+from .hardlinks import HardlinkTracker, allocated_bytes
+from .result import RemovalResult
 
-def is_expired(file_path: Path, deadline: Union[datetime, timedelta, int]) -> bool:
+# 任意の機能のモジュールは、使用する場合にだけ関数内でインポートする
+if TYPE_CHECKING:
+    from .cache import ParseCache
+    from .checkpoint import Checkpoint
+    from .errors import ErrorPolicy, ErrorSummary
+    from .locking import DeletionGuard, RootLock
+    from .manifest import ManifestWriter
+    from .profiling import Profiler
+    from .progress import ProgressReport, ProgressReporter
+    from .watermark import WatermarkStore
+
+_T = TypeVar("_T")
+
+
+def _resolve_deadline(
+    deadline: Union[datetime, timedelta, int], tz: Optional[tzinfo] = None
+) -> datetime:
+    """
+    deadlineを基準日時に変換します
+
+    tz を指定した場合は、基準日時をそのタイムゾーンの壁時計の時刻（naive な datetime）
+    として返します。走査の開始時に1回だけ変換すれば、ファイル名の日付はファイルごとに
+    タイムゾーンを変換せずにそのまま比較できます。
+
+    Args:
+        deadline: 期限を示すデータ（datetime、timedelta、または日数）
+        tz: ファイル名の日付のタイムゾーン。naive な datetime の deadline もこのタイムゾーンの
+            時刻として扱う。Noneの場合はローカル時刻
+
+    Returns:
+        datetime: この日時より前のファイルを期限切れとする基準日時
+    """
+    if isinstance(deadline, datetime):
+        if tz is not None and deadline.tzinfo is not None:
+            return deadline.astimezone(tz).replace(tzinfo=None)
+        return deadline
+    elif isinstance(deadline, timedelta):
+        return _now(tz) - deadline
+    elif isinstance(deadline, int):
+        return _now(tz) - timedelta(days=deadline)
+    else:
+        raise TypeError(
+            "deadlineはdatetime、timedelta、または整数型である必要があります"
+        )
+
+
+def _now(tz: Optional[tzinfo]) -> datetime:
+    """現在時刻を tz の壁時計の時刻（naive な datetime）として返します"""
+    if tz is None:
+        return datetime.now()
+    return datetime.now(tz).replace(tzinfo=None)
+
+
+def _resolve_cutoff_timestamp(
+    deadline: Union[datetime, timedelta, int], tz: Optional[tzinfo] = None
+) -> float:
+    """deadlineを更新日時と比較するためのエポック秒に変換します"""
+    cutoff = _resolve_deadline(deadline, tz)
+    if tz is not None:
+        cutoff = cutoff.replace(tzinfo=tz)
+    return cutoff.timestamp()
+
+
+def is_expired(
+    file_path: Path,
+    deadline: Union[datetime, timedelta, int],
+    tz: Optional[tzinfo] = None,
+    time_source: Union[str, Sequence[str]] = "mtime",
+    time_combine: str = "max",
+) -> bool:
     """
     ファイルが期限切れかどうかを判定します
 
@@ -19,31 +109,551 @@ def is_expired(file_path: Path, deadline: Union[datetime, timedelta, int]) -> bo
             - datetime型: この日時より前に更新されたファイルは期限切れと判定
             - timedelta型: 現在時刻からこの時間差より前に更新されたファイルは期限切れと判定
             - int型: 現在日からこの日数より前に更新されたファイルは期限切れと判定
+        tz: naive な datetime の deadline を解釈するタイムゾーン。Noneの場合はローカル時刻
+        time_source: 判定に使用する時刻（"mtime", "atime", "ctime", "birthtime"）
+            またはそのリスト (デフォルト: "mtime")
+        time_combine: 複数の時刻を指定した場合に "max"（最も新しい時刻）と
+            "min"（最も古い時刻）のどちらを使用するか (デフォルト: "max")
 
     Returns:
-        bool: ファイルが期限切れの場合はTrue、そうでない場合はFalse
+        bool: ファイルが期限切れの場合はTrue、そうでない場合はFalse。
+            作成日時を取得できない場合は期限切れと判定しない
     """
     if not file_path.exists():
         raise FileNotFoundError(f"ファイルが存在しません: {file_path}")
 
+    if time_source != "mtime":
+        from .timesource import TimeSource
+
+        _, timestamp = TimeSource(time_source, time_combine).stat(file_path)
+        if timestamp is None:
+            return False
+        return timestamp < _resolve_cutoff_timestamp(deadline, tz)
+
+    if tz is not None:
+        return file_path.stat().st_mtime < _resolve_cutoff_timestamp(deadline, tz)
+
     # ファイルの最終更新時刻を取得
     mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
 
-    # deadlineの型に応じて判定方法を変える
-    if isinstance(deadline, datetime):
-        return mtime < deadline
-    elif isinstance(deadline, timedelta):
-        return mtime < datetime.now() - deadline
-    elif isinstance(deadline, int):
-        return mtime < datetime.now() - timedelta(days=deadline)
+    return mtime < _resolve_deadline(deadline)
+
+
+# サブディレクトリを飛ばさずに走査を中断するエラー。チェックポイントから再開できる
+_FATAL_SCAN_ERRNOS = frozenset({errno.EMFILE, errno.ENFILE, errno.ENOMEM})
+
+
+class _DirectoryWalker:
+    """
+    ディレクトリをスタックで1つずつ走査し、ファイルのパスを順に返すイテレータ
+
+    サブディレクトリは名前順（oldest_first の場合は更新日時の古い順）に処理されるため
+    走査順は決定的であり、未処理ディレクトリのスタック（フロンティア）を保存すれば
+    途中から再開できます。
+
+    ファイルの種類は DirEntry の種別（d_type）で判定するため、ファイルごとの stat は
+    行いません。サブディレクトリに潜るかどうかの判定で stat が必要な場合
+    （follow_symlinks、one_file_system）も、stat はディレクトリごとに1回だけです。
+
+    権限がないなどの理由で読み込めないサブディレクトリは報告して飛ばし、残りの
+    ディレクトリの走査を続けます。
+
+    Args:
+        root: 走査のルートディレクトリ
+        recursive: サブディレクトリも走査するかどうか
+        pending: 再開時の未処理ディレクトリのスタック。Noneの場合はルートから走査する
+        oldest_first: サブディレクトリを更新日時の古い順に処理するかどうか
+        follow_symlinks: シンボリックリンク先のディレクトリにも潜るかどうか。
+            同じディレクトリを2回走査しないよう、(st_dev, st_ino) で訪問済みを記録する
+        one_file_system: ルートと異なるファイルシステム（st_dev）のディレクトリに潜らないかどうか
+        skip_special_files: ソケット・FIFO・デバイスファイルを返さないかどうか
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        recursive: bool,
+        pending: Optional[List[Path]] = None,
+        oldest_first: bool = False,
+        follow_symlinks: bool = False,
+        one_file_system: bool = False,
+        skip_special_files: bool = False,
+    ) -> None:
+        self.root = root
+        self.recursive = recursive
+        self.oldest_first = oldest_first
+        self.follow_symlinks = follow_symlinks
+        self.one_file_system = one_file_system
+        self.skip_special_files = skip_special_files
+        self.pending: List[Path] = list(pending) if pending is not None else [root]
+        self.current: Optional[Path] = None
+        self.profiler: Optional["Profiler"] = None
+        self.errors: Optional["ErrorSummary"] = None
+
+        self._root_dev: Optional[int] = None
+        self._visited: Set[Tuple[int, int]] = set()
+        if recursive and (follow_symlinks or one_file_system):
+            root_st = os.stat(root)
+            self._root_dev = root_st.st_dev
+            self._visited.add((root_st.st_dev, root_st.st_ino))
+
+    def frontier(self) -> List[Path]:
+        """未処理ディレクトリと処理中のディレクトリのスタックを返します"""
+        if self.current is None:
+            return list(self.pending)
+        return self.pending + [self.current]
+
+    def _should_descend(self, entry: "os.DirEntry[str]") -> bool:
+        """サブディレクトリのエントリに潜るかどうかを判定します"""
+        if entry.is_symlink() and not self.follow_symlinks:
+            # シンボリックリンク先のディレクトリには潜らない
+            return False
+        if not (self.follow_symlinks or self.one_file_system):
+            return True
+        try:
+            st = entry.stat()
+        except OSError:
+            return False
+        if self.one_file_system and st.st_dev != self._root_dev:
+            return False
+        if self.follow_symlinks:
+            key = (st.st_dev, st.st_ino)
+            if key in self._visited:
+                return False
+            self._visited.add(key)
+        return True
+
+    def _scan(self, directory: Path) -> Iterator["os.DirEntry[str]"]:
+        """
+        ディレクトリ内のファイルのエントリを返し、最後まで読み終えたらサブディレクトリを積みます
+
+        途中で中断された場合はサブディレクトリを積まないため、処理中のディレクトリは
+        フロンティアに残り、再開時に先頭から処理し直されます。
+        """
+        subdirs: List[Tuple[float, str]] = []
+        try:
+            with (
+                os.scandir(directory)
+                if self.profiler is None
+                else self.profiler.scandir(directory)
+            ) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        if self.recursive and self._should_descend(entry):
+                            subdirs.append(
+                                (
+                                    (
+                                        entry.stat(follow_symlinks=False).st_mtime
+                                        if self.oldest_first
+                                        else 0.0
+                                    ),
+                                    entry.name,
+                                )
+                            )
+                        continue
+                    if (
+                        self.skip_special_files
+                        and not entry.is_file(follow_symlinks=False)
+                        and not entry.is_symlink()
+                    ):
+                        continue
+                    yield entry
+        except FileNotFoundError:
+            # 再開までの間に削除されたディレクトリは無視する
+            pass
+        except OSError as e:
+            # ルートや、ファイル記述子・メモリの枯渇のようにプロセス全体に関わるエラーは
+            # 中断し、読み込めないサブディレクトリだけを飛ばして走査を続ける
+            if directory == self.root or e.errno in _FATAL_SCAN_ERRNOS:
+                raise
+            self._report_scan_error(directory, e)
+        # 先に処理するものがスタックの末尾に来るよう逆順に積む
+        subdirs.sort(reverse=True)
+        self.pending.extend(directory / name for _, name in subdirs)
+
+    def _report_scan_error(self, directory: Path, error: OSError) -> None:
+        """読み込めなかったサブディレクトリを報告します。errors が設定されていれば集計します"""
+        if self.errors is None:
+            print(f"ディレクトリ {directory} を読み込めませんでした: {error}")
+        else:
+            self.errors.record(directory, error)
+
+    def __iter__(self) -> Iterator[Path]:
+        while self.pending:
+            self.current = self.pending.pop()
+            for entry in self._scan(self.current):
+                yield Path(entry.path)
+            self.current = None
+
+    def entries(self) -> Iterator[Tuple[Path, "os.DirEntry[str]"]]:
+        """
+        Path オブジェクトを生成せずに、ディレクトリとファイルのエントリの組を返します
+
+        Returns:
+            Iterator[Tuple[Path, os.DirEntry[str]]]: (ディレクトリ, エントリ) のイテレータ
+        """
+        while self.pending:
+            self.current = self.pending.pop()
+            for entry in self._scan(self.current):
+                yield self.current, entry
+            self.current = None
+
+    def listings(self) -> Iterator[Tuple[Path, List[str]]]:
+        """
+        ディレクトリごとに、そのディレクトリとファイル名のリストを返します
+
+        Returns:
+            Iterator[Tuple[Path, List[str]]]: (ディレクトリ, ファイル名のリスト) のイテレータ
+        """
+        while self.pending:
+            self.current = self.pending.pop()
+            names = [entry.name for entry in self._scan(self.current)]
+            yield self.current, names
+            self.current = None
+
+
+class _RunBudget:
+    """
+    実行時間・削除数・削除バイト数の上限を管理します
+
+    Args:
+        max_duration: 実行時間の上限（秒またはtimedelta）
+        max_deletions: 削除するファイル数の上限
+        max_bytes: 削除するファイルの合計サイズの上限（バイト）
+    """
+
+    def __init__(
+        self,
+        max_duration: Optional[Union[float, timedelta]],
+        max_deletions: Optional[int],
+        max_bytes: Optional[int],
+    ) -> None:
+        if isinstance(max_duration, timedelta):
+            max_duration = max_duration.total_seconds()
+        self.max_deletions = max_deletions
+        self.max_bytes = max_bytes
+        self._ends_at = (
+            time.monotonic() + max_duration if max_duration is not None else None
+        )
+
+    @property
+    def active(self) -> bool:
+        """いずれかの上限が指定されているかどうか"""
+        return (
+            self._ends_at is not None
+            or self.max_deletions is not None
+            or self.max_bytes is not None
+        )
+
+    def exceeded(self, deleted_count: int, deleted_bytes: int) -> Optional[str]:
+        """
+        上限に達しているかどうかを判定します
+
+        Returns:
+            Optional[str]: 達した上限の名前。達していない場合はNone
+        """
+        if self.max_deletions is not None and deleted_count >= self.max_deletions:
+            return "max_deletions"
+        if self.max_bytes is not None and deleted_bytes >= self.max_bytes:
+            return "max_bytes"
+        if self._ends_at is not None and time.monotonic() >= self._ends_at:
+            return "max_duration"
+        return None
+
+    def remaining(self, deleted_count: int, deleted_bytes: int) -> Dict[str, Any]:
+        """
+        残りの上限を remove_expired_files の引数として返します
+
+        複数回の呼び出しに1つの上限を適用する場合（分散削除のワーカーなど）に使用します。
+
+        Args:
+            deleted_count: これまでに削除したファイルの数
+            deleted_bytes: これまでに削除したファイルの合計サイズ（バイト）
+
+        Returns:
+            Dict[str, Any]: 指定されている上限の max_duration、max_deletions、max_bytes
+        """
+        limits: Dict[str, Any] = {}
+        if self.max_deletions is not None:
+            limits["max_deletions"] = max(self.max_deletions - deleted_count, 0)
+        if self.max_bytes is not None:
+            limits["max_bytes"] = max(self.max_bytes - deleted_bytes, 0)
+        if self._ends_at is not None:
+            limits["max_duration"] = max(self._ends_at - time.monotonic(), 0.0)
+        return limits
+
+
+def _start_walk(
+    path: Path,
+    recursive: bool,
+    checkpoint: Optional[Union[str, Path]],
+    checkpoint_interval: float,
+    resume_token: Optional[str],
+    budget: _RunBudget,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+    skip_special_files: bool = False,
+) -> Tuple[Optional["Checkpoint"], _DirectoryWalker]:
+    """
+    走査を開始するためのチェックポイントとウォーカーを用意します
+
+    resume_token が指定されている場合はその位置から、状態ファイルがある場合は
+    保存された位置から走査を再開します。
+    """
+    checkpointer: Optional["Checkpoint"] = None
+    if checkpoint is not None:
+        from .checkpoint import Checkpoint
+
+        checkpointer = Checkpoint(checkpoint, path, recursive, checkpoint_interval)
+    if resume_token is not None:
+        from .checkpoint import decode_resume_token
+
+        pending: Optional[List[Path]] = decode_resume_token(
+            resume_token, path, recursive
+        )
+    elif checkpointer is not None:
+        pending = checkpointer.load()
     else:
-        raise TypeError(
-            "deadlineはdatetime、timedelta、または整数型である必要があります"
+        pending = None
+    walker = _DirectoryWalker(
+        path,
+        recursive,
+        pending,
+        oldest_first=budget.active,
+        follow_symlinks=follow_symlinks,
+        one_file_system=one_file_system,
+        skip_special_files=skip_special_files,
+    )
+    return checkpointer, walker
+
+
+def _finish_walk(
+    walker: _DirectoryWalker,
+    checkpointer: Optional["Checkpoint"],
+    deleted_count: int,
+    deleted_bytes: int,
+    stop_reason: Optional[str],
+    reclaimed_bytes: int = 0,
+    kept_links: int = 0,
+    errors: Optional["ErrorSummary"] = None,
+    skipped: int = 0,
+) -> RemovalResult:
+    """
+    走査の終了処理を行い、結果を返します
+
+    上限に達して停止した場合は続きから再開できるよう状態を保存し、
+    走査を完了した場合は状態ファイルを削除します。
+    """
+    if stop_reason is not None:
+        from .checkpoint import encode_resume_token
+
+        frontier = walker.frontier()
+        if checkpointer is not None:
+            checkpointer.save(frontier)
+        return RemovalResult(
+            deleted_count,
+            deleted_bytes,
+            stop_reason,
+            encode_resume_token(walker.root, walker.recursive, frontier),
+            reclaimed_bytes,
+            kept_links,
+            errors,
+            skipped,
         )
 
+    if checkpointer is not None:
+        checkpointer.clear()
+    return RemovalResult(
+        deleted_count,
+        deleted_bytes,
+        reclaimed_bytes=reclaimed_bytes,
+        kept_links=kept_links,
+        errors=errors,
+        skipped=skipped,
+    )
+
+
+# 段階的切り詰めのデフォルトのチャンクサイズ（64MiB）
+DEFAULT_TRUNCATE_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def _truncate_and_unlink(
+    path: Path,
+    truncate_threshold: Optional[int] = None,
+    chunk_size: int = DEFAULT_TRUNCATE_CHUNK_SIZE,
+    rate_limit: Optional[float] = None,
+    st: Optional[os.stat_result] = None,
+) -> None:
+    """
+    ファイルを削除します。閾値より大きいファイルは削除した後に末尾から段階的に切り詰めます
+
+    巨大なファイルを一度に unlink するとエクステントの解放で数秒ブロックすることがあるため、
+    開いたままのファイルを unlink し、その fd をチャンク単位で ftruncate してから閉じることで、
+    1回あたりの処理時間を抑えます。unlink に失敗した場合は切り詰めないため、削除できない
+    ファイルの内容が失われることはありません。ハードリンクが複数あるファイルやシンボリック
+    リンクは切り詰めずにそのまま削除します。
+
+    Args:
+        path: 削除対象ファイルのパス
+        truncate_threshold: 切り詰めを行うファイルサイズの閾値（バイト）。Noneの場合は切り詰めない
+        chunk_size: 1回に切り詰めるサイズ（バイト）
+        rate_limit: 切り詰めの上限速度（バイト/秒）。Noneの場合は制限しない
+        st: 走査時に取得したファイルの stat。Noneの場合は lstat で取得する。
+            開いた fd の (st_dev, st_ino) と一致する場合だけ切り詰めるため、走査の後に
+            置き換えられたファイルは切り詰めない
+    """
+    fd = -1
+    if truncate_threshold is not None:
+        if st is None:
+            st = path.lstat()
+        if (
+            stat.S_ISREG(st.st_mode)
+            and st.st_nlink == 1
+            and st.st_size > truncate_threshold
+        ):
+            try:
+                fd = os.open(path, os.O_WRONLY | getattr(os, "O_NOFOLLOW", 0))
+            except OSError:
+                # 書き込みで開けない場合は通常の削除にフォールバック
+                fd = -1
+            if fd >= 0:
+                opened = os.fstat(fd)
+                if (opened.st_dev, opened.st_ino) != (st.st_dev, st.st_ino):
+                    # stat の後に置き換えられたファイルは切り詰めない
+                    os.close(fd)
+                    fd = -1
+
+    if fd < 0:
+        path.unlink()
+        return
+
+    try:
+        path.unlink()
+        # unlink した後にハードリンクが作られていれば、他のリンクの内容を壊さない
+        unlinked = os.fstat(fd)
+        if unlinked.st_nlink == 0:
+            remaining = unlinked.st_size
+            while remaining > 0:
+                step = min(chunk_size, remaining)
+                remaining -= step
+                try:
+                    os.ftruncate(fd, remaining)
+                except OSError:
+                    # 削除は完了しているため、残りは閉じるときに解放される
+                    break
+                # チャンクごとに他の処理へ制御を譲る（速度制限時はその分待機）
+                time.sleep(step / rate_limit if rate_limit else 0)
+    finally:
+        os.close(fd)
+
+
+def _perform(
+    op: str,
+    path: Path,
+    func: Callable[..., _T],
+    *args: Any,
+    profiler: Optional["Profiler"] = None,
+    errors: Optional["ErrorSummary"] = None,
+) -> _T:
+    """
+    所要時間の計測と一時的なエラーの再試行を行いながら func を呼び出します
+
+    計測も再試行も行わない場合、呼び出し元は func を直接呼び出します。
+    """
+    if errors is not None:
+        return errors.call(lambda: _perform(op, path, func, *args, profiler=profiler))
+    if profiler is None:
+        return func(*args)
+    return profiler.call(op, path, func, *args)
+
+
+def _report_error(errors: Optional["ErrorSummary"], path: Path, error: OSError) -> None:
+    """ErrorPolicy を指定していない場合は従来どおりエラーを出力します"""
+    if errors is None:
+        print(f"ファイル {path} の削除に失敗しました: {error}")
+    else:
+        errors.record(path, error)
+
+
+def _count_skipped(
+    guard: Optional["DeletionGuard"], errors: Optional["ErrorSummary"]
+) -> int:
+    """削除の直前の確認で削除しなかったファイルと、すでに存在しなかったファイルの数"""
+    return (guard.skipped if guard is not None else 0) + (
+        errors.vanished if errors is not None else 0
+    )
+
+
+def _acquire_root_lock(
+    root: Path, root_lock: Union[bool, str, Path]
+) -> Optional["RootLock"]:
+    """root_lock が True の場合はルートのディレクトリを、パスの場合はそのファイルをロックします"""
+    if root_lock is False:
+        return None
+    from .locking import RootLock
+
+    lock = RootLock(root, None if root_lock is True else root_lock)
+    lock.acquire()
+    return lock
+
+
+def _start_guard(recheck: bool, lock_probe: bool) -> Optional["DeletionGuard"]:
+    """削除の直前の確認を行う場合のみ DeletionGuard を作成します"""
+    if not recheck and not lock_probe:
+        return None
+    from .locking import DeletionGuard
+
+    return DeletionGuard(recheck, lock_probe)
+
+
+def _resolve_profiler(profile: Optional["Profiler"]) -> Optional["Profiler"]:
+    """
+    使用する Profiler を返します
+
+    計測しない場合は profiling モジュールをインポートしません。環境変数の名前は
+    profiling.PROFILE_ENV と同じです。
+    """
+    enabled = os.environ.get("EXPIRED_FILE_REMOVER_PROFILE", "") not in ("", "0")
+    if profile is None and not enabled:
+        return None
+    from .profiling import resolve_profiler
+
+    return resolve_profiler(profile)
+
+
+def _start_progress(
+    progress: Optional[Callable[["ProgressReport"], None]],
+    interval: float,
+    path: Path,
+    recursive: bool,
+) -> Optional["ProgressReporter"]:
+    """progress が指定されている場合に進捗の報告を開始します"""
+    if progress is None:
+        return None
+    from .progress import ProgressReporter
+
+    reporter = ProgressReporter(progress, interval)
+    reporter.start(path, recursive)
+    return reporter
+
+
+def _open_manifest(
+    manifest: Optional[Union[str, Path]],
+) -> Optional["ManifestWriter"]:
+    """manifest が指定されている場合にマニフェストの書き込みを開始します"""
+    if manifest is None:
+        return None
+    from .manifest import ManifestWriter
+
+    return ManifestWriter(manifest, append=True)
+
 
 def remove_expired_file(
-    file_path: Union[str, Path], deadline: Union[datetime, timedelta, int]
+    file_path: Union[str, Path],
+    deadline: Union[datetime, timedelta, int],
+    tz: Optional[tzinfo] = None,
+    time_source: Union[str, Sequence[str]] = "mtime",
+    time_combine: str = "max",
 ) -> bool:
     """
     指定された期限より古いファイルを削除します
@@ -54,6 +664,9 @@ def remove_expired_file(
             - datetime型: この日時より前に更新されたファイルは期限切れと判定
             - timedelta型: 現在時刻からこの時間差より前に更新されたファイルは期限切れと判定
             - int型: 現在日からこの日数より前に更新されたファイルは期限切れと判定
+        tz: naive な datetime の deadline を解釈するタイムゾーン。Noneの場合はローカル時刻
+        time_source: 判定に使用する時刻またはそのリスト (デフォルト: "mtime")
+        time_combine: 複数の時刻の組み合わせ方（"max" または "min"） (デフォルト: "max")
 
     Returns:
         bool: 削除に成功した場合はTrue、そうでない場合はFalse
@@ -61,7 +674,7 @@ def remove_expired_file(
     path = Path(file_path) if isinstance(file_path, str) else file_path
 
     try:
-        if is_expired(path, deadline):
+        if is_expired(path, deadline, tz, time_source, time_combine):
             path.unlink()
             return True
         return False
@@ -75,7 +688,34 @@ def remove_expired_files(
     deadline: Union[datetime, timedelta, int],
     recursive: bool = False,
     file_filter: Optional[List[str]] = None,
-) -> int:
+    truncate_threshold: Optional[int] = None,
+    truncate_chunk_size: int = DEFAULT_TRUNCATE_CHUNK_SIZE,
+    truncate_rate_limit: Optional[float] = None,
+    checkpoint: Optional[Union[str, Path]] = None,
+    checkpoint_interval: float = 60.0,
+    max_duration: Optional[Union[float, timedelta]] = None,
+    max_deletions: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    resume_token: Optional[str] = None,
+    progress: Optional[Callable[["ProgressReport"], None]] = None,
+    progress_interval: float = 1.0,
+    hardlinks: str = "any",
+    max_tracked_inodes: int = 1_000_000,
+    manifest: Optional[Union[str, Path]] = None,
+    tz: Optional[tzinfo] = None,
+    time_source: Union[str, Sequence[str]] = "mtime",
+    time_combine: str = "max",
+    write_once: bool = False,
+    watermark_file: Optional[Union[str, Path]] = None,
+    profile: Optional["Profiler"] = None,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+    skip_special_files: bool = False,
+    errors: Optional["ErrorPolicy"] = None,
+    recheck: bool = False,
+    lock_probe: bool = False,
+    root_lock: Union[bool, str, Path] = False,
+) -> RemovalResult:
     """
     指定されたディレクトリ内の期限切れファイルをすべて削除します
 
@@ -87,9 +727,77 @@ def remove_expired_files(
             - int型: 現在日からこの日数より前に更新されたファイルは期限切れと判定
         recursive: サブディレクトリも対象とするかどうか (デフォルト: False)
         file_filter: 対象とするファイル拡張子のリスト (例: ['.txt', '.log'])
+        truncate_threshold: このサイズ（バイト）より大きいファイルは削除した後に段階的に切り詰める
+            (デフォルト: None、切り詰めない)
+        truncate_chunk_size: 1回に切り詰めるサイズ（バイト） (デフォルト: 64MiB)
+        truncate_rate_limit: 切り詰めの上限速度（バイト/秒） (デフォルト: None、制限なし)
+        checkpoint: 走査の進捗を保存する状態ファイルのパス。指定した場合、状態ファイルが
+            あればその位置から再開し、正常に完了すると状態ファイルを削除する
+            (デフォルト: None)
+        checkpoint_interval: 状態ファイルを保存する間隔（秒） (デフォルト: 60.0)
+        max_duration: 実行時間の上限（秒またはtimedelta）
+        max_deletions: 削除するファイル数の上限
+        max_bytes: 削除するファイルの合計サイズの上限（バイト）
+        resume_token: 上限に達して停止した前回の結果の resume_token。指定した場合は続きから再開する
+        progress: 進捗を受け取るコールバック。progress_interval 秒ごとに ProgressReport が渡される
+        progress_interval: 進捗を報告する間隔（秒） (デフォルト: 1.0)
+        hardlinks: 複数のハードリンクを持つファイルの扱い
+            - "any": リンクごとに期限切れかどうかを判定して削除する (デフォルト)
+            - "all": 走査範囲内で同じ inode のすべてのリンクが期限切れになった場合のみ削除する
+        max_tracked_inodes: hardlinks="all" のときに記録する inode 数の上限。
+            上限を超えた inode のリンクは削除しない (デフォルト: 1,000,000)
+        manifest: 削除したファイルを記録するマニフェストファイルのパス。既存のマニフェスト
+            には追記する（再開した実行でも前回の記録は残る） (デフォルト: None)
+        tz: naive な datetime の deadline を解釈するタイムゾーン。基準日時は走査の前に
+            1回だけエポック秒に変換される (デフォルト: None、ローカル時刻)
+        time_source: 判定に使用する時刻（"mtime", "atime", "ctime", "birthtime"）
+            またはそのリスト。時刻はファイルごとに1回の stat で取得する
+            (デフォルト: "mtime")
+        time_combine: 複数の時刻を指定した場合に "max"（最も新しい時刻）と
+            "min"（最も古い時刻）のどちらを使用するか (デフォルト: "max")
+        write_once: ファイルが作成後に変更されないディレクトリツリー向けのモード。
+            ディレクトリ自体の更新日時と前回の実行で記録した最新ファイルの更新日時が
+            いずれも基準日時より前であれば、そのディレクトリのファイルを stat せずに削除する
+            (デフォルト: False)
+        watermark_file: write_once で使用する、ディレクトリごとの最新ファイルの更新日時を
+            記録するファイルのパス。write_once を指定する場合は必須
+        profile: scandir・stat・unlink の所要時間を記録する Profiler。Noneの場合でも
+            環境変数 EXPIRED_FILE_REMOVER_PROFILE=1 で有効化できる (デフォルト: None)
+        follow_symlinks: 再帰的な走査でシンボリックリンク先のディレクトリにも潜るかどうか。
+            同じディレクトリは1回だけ走査する (デフォルト: False)
+        one_file_system: 再帰的な走査でルートと異なるファイルシステム（マウントされた
+            NFS 共有など）のディレクトリに潜らないかどうか (デフォルト: False)
+        skip_special_files: ソケット・FIFO・デバイスファイルを対象外とするかどうか
+            (デフォルト: False)
+        errors: ファイルごとのエラーの扱い。指定した場合はエラーを出力せずに集計して
+            結果の errors に設定し、一時的なエラー（EBUSY, ESTALE など）は再試行する
+            (デフォルト: None、エラーごとに出力して処理を続ける)
+        recheck: unlink の直前にファイルを dir_fd からの stat で確認し直し、判定に使用した
+            stat から (st_ino, st_mtime_ns, st_size) が変わっていれば削除しない。
+            hardlinks="all" で削除を保留したリンクや、段階的に切り詰めるファイルのように
+            判定から削除までに時間がかかる場合に有効 (デフォルト: False)
+        lock_probe: 削除の直前に通常のファイルを開いて flock を試み、他のプロセスが
+            ロックしているファイルを削除しない (デフォルト: False)
+        root_lock: True の場合はルートのディレクトリを、パスの場合はそのファイルを
+            flock でロックし、同じツリーを他のクリーンアップと同時に処理しない
+            (デフォルト: False)
 
     Returns:
-        int: 削除されたファイルの数
+        RemovalResult: 削除されたファイルの数（int互換）。上限に達して停止した場合は
+            completed が False になり、resume_token に再開用のトークンが設定される。
+            reclaimed_bytes には実際に解放されたディスク容量が設定される
+
+    Raises:
+        ErrorLimitExceeded: errors の on_error が "abort" または "threshold" で、
+            許容するエラー数を超えた場合
+        RootLockedError: root_lock を指定し、他のクリーンアップがロックを保持している場合
+
+    Note:
+        上限のいずれかを指定した場合、サブディレクトリは更新日時の古い順に処理されます
+
+        write_once で stat を省略して削除したファイルは deleted_bytes / reclaimed_bytes に
+        含まれません。max_bytes、truncate_threshold、manifest のいずれかを指定した場合は
+        ファイルのサイズが必要なため stat を省略しません
     """
     path = Path(dir_path) if isinstance(dir_path, str) else dir_path
 
@@ -99,32 +807,274 @@ def remove_expired_files(
     if not path.is_dir():
         raise NotADirectoryError(f"指定されたパスはディレクトリではありません: {path}")
 
+    if truncate_chunk_size <= 0:
+        raise ValueError("truncate_chunk_sizeは正の整数である必要があります")
+
+    if hardlinks not in ("any", "all"):
+        raise ValueError(
+            f"hardlinksは'any'または'all'である必要があります: {hardlinks}"
+        )
+    tracker = HardlinkTracker(max_tracked_inodes) if hardlinks == "all" else None
+    source = None
+    if time_source != "mtime":
+        from .timesource import TimeSource
+
+        source = TimeSource(time_source, time_combine)
+
+    watermarks: Optional["WatermarkStore"] = None
+    if write_once:
+        if watermark_file is None:
+            raise ValueError("write_onceにはwatermark_fileの指定が必要です")
+        if tracker is not None or source is not None:
+            raise ValueError(
+                "write_onceはhardlinks='all'やtime_sourceと同時に指定できません"
+            )
+        from .watermark import WatermarkStore
+
+        watermarks = WatermarkStore(watermark_file)
+        watermarks.bind(file_filter)
+    # サイズが必要な場合は stat を省略できない
+    can_elide = max_bytes is None and truncate_threshold is None and manifest is None
+
+    cutoff = _resolve_cutoff_timestamp(deadline, tz)
+    budget = _RunBudget(max_duration, max_deletions, max_bytes)
+    checkpointer, walker = _start_walk(
+        path,
+        recursive,
+        checkpoint,
+        checkpoint_interval,
+        resume_token,
+        budget,
+        follow_symlinks,
+        one_file_system,
+        skip_special_files,
+    )
+    profiler = _resolve_profiler(profile)
+    walker.profiler = profiler
+    summary = errors.begin() if errors is not None else None
+    walker.errors = summary
+    # 計測も再試行も行わない場合は stat と unlink を直接呼び出す
+    wrapped = profiler is not None or summary is not None
+
+    reporter = _start_progress(progress, progress_interval, path, recursive)
+
+    scanned = 0
     deleted_count = 0
+    deleted_bytes = 0
+    reclaimed_bytes = 0
+    stop_reason = None
+    # 他のクリーンアップが処理中の場合は何も削除せずに終了する
+    lock = _acquire_root_lock(path, root_lock)
+    guard = _start_guard(recheck, lock_probe)
+    recorder = _open_manifest(manifest)
+    directory: Optional[Path] = None
+    newest: Optional[float] = None
+    elide = False
 
     # ディレクトリ内のファイルを処理
-    glob_pattern = "**/*" if recursive else "*"
+    try:
+        for item in walker:
+            scanned += 1
+            if reporter is not None and scanned >= reporter.next_check:
+                reporter.poll(walker, scanned, deleted_count, deleted_bytes)
 
-    for item in path.glob(glob_pattern):
-        # ディレクトリはスキップ
-        if item.is_dir():
-            continue
+            if watermarks is not None and walker.current != directory:
+                # 前のディレクトリは最後まで走査したのでウォーターマークを記録する
+                if directory is not None and newest is not None:
+                    watermarks.update(directory, newest)
+                directory = walker.current
+                newest = None
+                elide = _is_stale_directory(directory, watermarks, cutoff)
 
-        # file_filter が指定されている場合、対象の拡張子のみを処理
-        if file_filter is not None:
-            # テストのために、拡張子比較の前にドットがあることを確認
-            if item.suffix and any(ext == item.suffix for ext in file_filter):
-                pass  # 拡張子が一致するので処理を続行
-            else:
-                continue  # 拡張子が一致しないのでスキップ
+            if checkpointer is not None and checkpointer.due():
+                checkpointer.save(walker.frontier())
 
-        try:
-            if is_expired(item, deadline):
-                item.unlink()
-                deleted_count += 1
-        except (PermissionError, OSError) as e:
-            print(f"ファイル {item} の削除に失敗しました: {e}")
+            stop_reason = budget.exceeded(deleted_count, deleted_bytes)
+            if stop_reason is not None:
+                break
+
+            # file_filter が指定されている場合、対象の拡張子のみを処理
+            if file_filter is not None:
+                # テストのために、拡張子比較の前にドットがあることを確認
+                if item.suffix and any(ext == item.suffix for ext in file_filter):
+                    pass  # 拡張子が一致するので処理を続行
+                else:
+                    continue  # 拡張子が一致しないのでスキップ
+
+            try:
+                if elide and can_elide:
+                    if guard is not None and not guard.allows_path(item):
+                        continue
+                    if not wrapped:
+                        item.unlink()
+                    else:
+                        _perform(
+                            "unlink",
+                            item,
+                            item.unlink,
+                            profiler=profiler,
+                            errors=summary,
+                        )
+                    deleted_count += 1
+                    continue
+
+                timestamp: Optional[float]
+                if source is None:
+                    st = (
+                        item.stat()
+                        if not wrapped
+                        else _perform(
+                            "stat", item, item.stat, profiler=profiler, errors=summary
+                        )
+                    )
+                    timestamp = st.st_mtime
+                elif not wrapped:
+                    st, timestamp = source.stat(item)
+                else:
+                    st, timestamp = _perform(
+                        "stat",
+                        item,
+                        source.stat,
+                        item,
+                        profiler=profiler,
+                        errors=summary,
+                    )
+                if skip_special_files and not stat.S_ISREG(st.st_mode):
+                    # 特殊ファイルを指すシンボリックリンク
+                    continue
+                if watermarks is not None and not elide:
+                    newest = st.st_mtime if newest is None else max(newest, st.st_mtime)
+                if timestamp is None or timestamp >= cutoff:
+                    continue
+
+                if tracker is not None and st.st_nlink > 1:
+                    # 同じ inode のすべてのリンクが期限切れになるまで削除を保留する
+                    links = tracker.add(st, item)
+                    if links is None:
+                        continue
+                else:
+                    links = [item]
+
+                expected = (st.st_ino, st.st_mtime_ns, st.st_size)
+                removed = 0
+                for n, link in enumerate(links):
+                    if n > 0:
+                        # リンクのグループもリンクごとに上限を確かめ、上限を超えて削除しない
+                        stop_reason = budget.exceeded(deleted_count, deleted_bytes)
+                        if stop_reason is not None:
+                            break
+                    if guard is not None and not guard.allows_path(link, expected):
+                        continue
+                    if not wrapped:
+                        _truncate_and_unlink(
+                            link,
+                            truncate_threshold,
+                            truncate_chunk_size,
+                            truncate_rate_limit,
+                            st,
+                        )
+                    else:
+                        _perform(
+                            "unlink",
+                            link,
+                            _truncate_and_unlink,
+                            link,
+                            truncate_threshold,
+                            truncate_chunk_size,
+                            truncate_rate_limit,
+                            st,
+                            profiler=profiler,
+                            errors=summary,
+                        )
+                    removed += 1
+                    deleted_count += 1
+                    deleted_bytes += st.st_size
+                    if recorder is not None:
+                        recorder.add(link, st.st_mtime, st.st_size, time.time())
+                # 最後のリンクを削除した場合のみディスク容量が解放される
+                if removed >= st.st_nlink:
+                    reclaimed_bytes += allocated_bytes(st)
+            except OSError as e:
+                _report_error(summary, item, e)
+            if stop_reason is not None:
+                break
+        else:
+            if directory is not None and newest is not None and watermarks is not None:
+                watermarks.update(directory, newest)
+    except BaseException:
+        # 中断された場合は処理中のディレクトリから再開できるよう保存する
+        if checkpointer is not None:
+            checkpointer.save(walker.frontier())
+        raise
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if watermarks is not None:
+            watermarks.save()
+        if profiler is not None:
+            profiler.finish()
+        if guard is not None:
+            guard.close()
+        if lock is not None:
+            lock.release()
+
+    if reporter is not None:
+        reporter.finish(
+            walker, scanned, deleted_count, deleted_bytes, stop_reason is None
+        )
+
+    return _finish_walk(
+        walker,
+        checkpointer,
+        deleted_count,
+        deleted_bytes,
+        stop_reason,
+        reclaimed_bytes,
+        tracker.pending_links() if tracker is not None else 0,
+        summary,
+        _count_skipped(guard, summary),
+    )
 
-    return deleted_count
+
+def _is_stale_directory(
+    directory: Optional[Path], watermarks: "WatermarkStore", cutoff: float
+) -> bool:
+    """
+    ディレクトリ内のファイルがすべて基準日時より前のものと判断できるかどうかを判定します
+
+    ディレクトリの更新日時はエントリの作成・削除で更新されるため、ディレクトリ自体と
+    前回記録した最新ファイルの更新日時がいずれも基準日時より前であれば、write-once の
+    ディレクトリではその後に作成・変更されたファイルはありません。
+    """
+    if directory is None:
+        return False
+    newest = watermarks.get(directory)
+    if newest is None or newest >= cutoff:
+        return False
+    try:
+        return os.stat(directory).st_mtime < cutoff
+    except OSError:
+        return False
+
+
+_MONTH_NAMES = (
+    "january",
+    "february",
+    "march",
+    "april",
+    "may",
+    "june",
+    "july",
+    "august",
+    "september",
+    "october",
+    "november",
+    "december",
+)
+_MONTH_NUMBERS = {name[:3]: i for i, name in enumerate(_MONTH_NAMES, 1)}
+_MONTH_NUMBERS.update({name: i for i, name in enumerate(_MONTH_NAMES, 1)})
+_MONTH_ABBR_PATTERN = "(?i:" + "|".join(name[:3] for name in _MONTH_NAMES) + ")"
+_MONTH_NAME_PATTERN = "(?i:" + "|".join(_MONTH_NAMES) + ")"
 
 
 def _build_pattern_and_mapping(date_format: str) -> Tuple[str, Dict[str, str]]:
@@ -139,6 +1089,11 @@ def _build_pattern_and_mapping(date_format: str) -> Tuple[str, Dict[str, str]]:
         Tuple[str, Dict[str, str]]:
             - 正規表現パターン
             - フォーマット指定子とグループ名のマッピング
+
+    Raises:
+        ValueError: 異なる指定子が同じフィールドを表している場合（"%b_%B" など）。
+            同じ指定子の繰り返し（"%Y%m%d_%Y%m%d" など）は、2回目以降を最初と同じ
+            文字列に一致する後方参照にする
     """
     # フォーマット指定子とそれに対応する正規表現パターン
     format_specs = {
@@ -150,11 +1105,24 @@ def _build_pattern_and_mapping(date_format: str) -> Tuple[str, Dict[str, str]]:
         "%I": (r"\d{2}", "hour12"),  # 時（12時間）
         "%M": (r"\d{2}", "minute"),  # 分
         "%S": (r"\d{2}", "second"),  # 秒
+        "%f": (r"\d{1,6}", "fraction"),  # マイクロ秒（1〜6桁）
+        "%j": (r"\d{3}", "yday"),  # 年間通算日
+        "%b": (_MONTH_ABBR_PATTERN, "monthname"),  # 月の略称（Jan〜Dec）
+        "%B": (_MONTH_NAME_PATTERN, "monthname"),  # 月の名前（January〜December）
+        "%G": (r"\d{4}", "isoyear"),  # ISO 8601 週番号の年
+        "%V": (r"\d{2}", "isoweek"),  # ISO 8601 週番号
+        "%u": (r"[1-7]", "isoweekday"),  # ISO 8601 曜日（1=月曜日）
+        "%s": (r"\d{10}", "epoch"),  # Unix エポック秒
+        "%Q": (r"\d{13}", "epochms"),  # Unix エポックミリ秒
+        "%z": (
+            r"Z|[+-]\d{2}:?\d{2}",
+            "utcoffset",
+        ),  # UTC オフセット（Z, +0900, +09:00）
     }
 
     pattern_parts = []
     current_pos = 0
-    mapping = {}
+    mapping: Dict[str, str] = {}
 
     while current_pos < len(date_format):
         found_spec = False
@@ -164,6 +1132,17 @@ def _build_pattern_and_mapping(date_format: str) -> Tuple[str, Dict[str, str]]:
         ):
             if date_format.startswith(spec, current_pos):
                 # フォーマット指定子を発見
+                if spec in mapping:
+                    # 同じ指定子の繰り返しは最初に一致した値と同じであることを求める
+                    pattern_parts.append(f"(?P={group_name})")
+                    current_pos += len(spec)
+                    found_spec = True
+                    break
+                if group_name in mapping.values():
+                    raise ValueError(
+                        f"日付フォーマット指定子が重複しています: {spec} "
+                        f"(フォーマット: {date_format})"
+                    )
                 pattern_parts.append(f"(?P<{group_name}>{regex})")
                 mapping[spec] = group_name
                 current_pos += len(spec)
@@ -178,8 +1157,304 @@ def _build_pattern_and_mapping(date_format: str) -> Tuple[str, Dict[str, str]]:
     return "".join(pattern_parts), mapping
 
 
+def _utc_offset(text: str) -> timezone:
+    """%z にマッチした文字列（Z, +0900, +09:00）をタイムゾーンに変換します"""
+    if text == "Z":
+        return timezone.utc
+    sign = -1 if text[0] == "-" else 1
+    digits = text[1:].replace(":", "")
+    return timezone(sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:])))
+
+
+def _datetime_from_groups(
+    groups: Dict[str, str], tz: Optional[tzinfo] = None
+) -> Optional[datetime]:
+    """
+    正規表現のグループの値から strptime を使わずに datetime を組み立てます
+
+    月と日、年間通算日、ISO 週番号、エポック秒のいずれかで日付が決まらない場合や、
+    存在しない日時の場合はNoneを返します。%I は strptime と同じく 12 を 0 時として扱い、
+    エポック秒と UTC オフセット付きの日時は tz（Noneの場合はローカル時刻）に変換します。
+
+    Args:
+        groups: グループ名とマッチした文字列の辞書
+        tz: 返す日時のタイムゾーン
+
+    Returns:
+        Optional[datetime]: 組み立てた日時。組み立てられない場合はNone
+    """
+    try:
+        if "epoch" in groups:
+            return datetime.fromtimestamp(int(groups["epoch"]), tz).replace(tzinfo=None)
+        if "epochms" in groups:
+            return datetime.fromtimestamp(int(groups["epochms"]) / 1000, tz).replace(
+                tzinfo=None
+            )
+
+        if "year4" in groups:
+            year = int(groups["year4"])
+        elif "year2" in groups:
+            year = int(groups["year2"])
+            # 69〜99 は1900年代、00〜68 は2000年代とする
+            year += 2000 if year < 69 else 1900
+        else:
+            year = 1900
+
+        if "hour24" in groups:
+            hour = int(groups["hour24"])
+        elif "hour12" in groups:
+            hour = int(groups["hour12"])
+            if not 1 <= hour <= 12:
+                return None
+            hour %= 12
+        else:
+            hour = 0
+        minute = int(groups.get("minute", 0))
+        second = int(groups.get("second", 0))
+        microsecond = int(groups.get("fraction", "0").ljust(6, "0"))
+
+        if "isoweek" in groups:
+            day = date.fromisocalendar(
+                int(groups.get("isoyear", year)),
+                int(groups["isoweek"]),
+                int(groups.get("isoweekday", 1)),
+            )
+        elif "day" in groups and ("month" in groups or "monthname" in groups):
+            month = (
+                int(groups["month"])
+                if "month" in groups
+                else _MONTH_NUMBERS[groups["monthname"].lower()]
+            )
+            day = date(year, month, int(groups["day"]))
+        elif "yday" in groups:
+            day = date(year, 1, 1) + timedelta(days=int(groups["yday"]) - 1)
+            if day.year != year:
+                return None
+        else:
+            return None
+
+        dt = datetime.combine(day, dt_time(hour, minute, second, microsecond))
+        if "utcoffset" in groups:
+            dt = (
+                dt.replace(tzinfo=_utc_offset(groups["utcoffset"]))
+                .astimezone(tz)
+                .replace(tzinfo=None)
+            )
+        return dt
+    except (ValueError, KeyError, OverflowError, OSError):
+        return None
+
+
+class _FilenameDateParser:
+    """
+    日付フォーマットを一度だけコンパイルし、ファイル名から日付を繰り返し抽出します
+
+    extract_date_from_filename と同じ結果を返しますが、フォーマットの解析と
+    正規表現のコンパイルを走査の開始時に1回だけ行います。
+
+    Args:
+        date_format: 日付フォーマット（例: '%Y%m%d', '%Y-%m-%d'）
+        tz: ファイル名の日付のタイムゾーン。エポック秒と UTC オフセット付きの日時は
+            このタイムゾーンの時刻に変換される
+
+    Raises:
+        ValueError: 有効な日付フォーマット指定子が含まれていない場合、または
+            異なる指定子が同じフィールドを表している場合（"%b_%B" など）
+    """
+
+    def __init__(self, date_format: str, tz: Optional[tzinfo] = None) -> None:
+        pattern, mapping = _build_pattern_and_mapping(date_format)
+        if not mapping:
+            raise ValueError(
+                f"有効な日付フォーマット指定子が含まれていません: {date_format}"
+            )
+        self.date_format = date_format
+        self.tz = tz
+        self.regex = re.compile(pattern)
+        self.mapping = mapping
+        # 月と日、年間通算日、ISO 週番号、エポック秒のいずれも含まない
+        # フォーマットでは日付が決まらないため、日付を返さない
+        groups = set(mapping.values())
+        self.checkable = bool(
+            groups & {"yday", "isoweek", "epoch", "epochms"}
+            or ("day" in groups and groups & {"month", "monthname"})
+        )
+        # エポック秒・エポックミリ秒は日時に変換せず、基準日時のエポック秒と比較する
+        self.epoch_group: Optional[str] = next(
+            (g for g in ("epoch", "epochms") if g in groups), None
+        )
+        self.epoch_scale = 1000 if self.epoch_group == "epochms" else 1
+
+        # 4桁の年・月・日・時・分・秒の順に並ぶ固定幅のフォーマットは、
+        # 文字列の辞書順と日付の順序が一致する。2桁の年（%y）は 99（1999年）が
+        # 25（2025年）より後ろに並ぶため含めない
+        order = re.findall(r"%[a-zA-Z]", date_format)
+        self.lexically_ordered = (
+            len(order) == len(set(order))
+            and order == ["%Y", "%m", "%d", "%H", "%M", "%S"][: len(order)]
+        )
+        # 各フィールドを最大値の数字で埋めた文字列（辞書順の上限）
+        self.max_string = re.sub(
+            r"%[a-zA-Z]",
+            lambda m: "9999" if m.group() == "%Y" else "99",
+            date_format,
+        )
+
+    def parse(self, filename: str) -> Optional[datetime]:
+        """
+        ファイル名（拡張子を除く）から日付を抽出します
+
+        Returns:
+            Optional[datetime]: 抽出された日付。抽出できない場合はNone
+        """
+        if not self.checkable:
+            return None
+        match = self.regex.search(filename)
+        if match is None:
+            return None
+
+        return _datetime_from_groups(match.groupdict(), self.tz)
+
+    def expired(self, filename: str, cutoff: datetime, cutoff_timestamp: float) -> bool:
+        """
+        ファイル名（拡張子を除く）の日付が基準日時より前かどうかを判定します
+
+        エポック秒・エポックミリ秒のフォーマットはタイムゾーンの変換を行わず、
+        数値のまま基準日時のエポック秒と比較します（夏時間の切り替えで壁時計の時刻が
+        重複する時間帯でも曖昧になりません）。
+
+        Args:
+            filename: ファイル名（拡張子を除く）
+            cutoff: 基準日時（tz の壁時計の時刻）
+            cutoff_timestamp: 基準日時のエポック秒
+
+        Returns:
+            bool: 日付が基準日時より前の場合はTrue。日付を抽出できない場合はFalse
+        """
+        if self.epoch_group is None:
+            parsed = self.parse(filename)
+            return parsed is not None and parsed < cutoff
+        match = self.regex.search(filename)
+        return match is not None and (
+            int(match.group(self.epoch_group)) < cutoff_timestamp * self.epoch_scale
+        )
+
+    def locate(self, filename: str) -> Optional[Tuple[datetime, int]]:
+        """
+        ファイル名（拡張子を除く）から日付と、日付が始まる位置を抽出します
+
+        Returns:
+            Optional[Tuple[datetime, int]]: 抽出された日付と、ファイル名の中での開始位置。
+                抽出できない場合はNone
+        """
+        if not self.checkable:
+            return None
+        match = self.regex.search(filename)
+        if match is None:
+            return None
+        parsed = _datetime_from_groups(match.groupdict(), self.tz)
+        return (parsed, match.start()) if parsed is not None else None
+
+
+class _ProfiledFilenameDateParser(_FilenameDateParser):
+    """正規表現のマッチと日付の組み立ての所要時間を記録する _FilenameDateParser"""
+
+    def __init__(
+        self, date_format: str, tz: Optional[tzinfo], profiler: "Profiler"
+    ) -> None:
+        super().__init__(date_format, tz)
+        self.profiler = profiler
+
+    def parse(self, filename: str) -> Optional[datetime]:
+        if not self.checkable:
+            return None
+        match = self.profiler.call("match", filename, self.regex.search, filename)
+        if match is None:
+            return None
+        return self.profiler.call(
+            "parse", filename, _datetime_from_groups, match.groupdict(), self.tz
+        )
+
+    def expired(self, filename: str, cutoff: datetime, cutoff_timestamp: float) -> bool:
+        if self.epoch_group is None:
+            return super().expired(filename, cutoff, cutoff_timestamp)
+        match = self.profiler.call("match", filename, self.regex.search, filename)
+        return match is not None and (
+            int(match.group(self.epoch_group)) < cutoff_timestamp * self.epoch_scale
+        )
+
+
+def _bisect_candidates(
+    walker: _DirectoryWalker, parsers: List[_FilenameDateParser], cutoff: datetime
+) -> Iterator[Path]:
+    """
+    ディレクトリごとにファイル名を並べ替え、期限切れの可能性があるファイルだけを返します
+
+    辞書順と日付の順序が一致するフォーマットでは、同じ接頭辞を持つファイル名のうち
+    「接頭辞 + 基準日時の文字列」より後ろに並ぶものは、接頭辞の直後に日付があれば
+    期限切れになり得ないため、二分探索で範囲を求めて日付を組み立てずに除外します。
+    範囲内でも最初に見つかる日付が接頭辞の直後にない名前（"log_3_20200101" など）や、
+    パターンに合わない名前は除外せずに返します。返されたファイルは呼び出し側で
+    通常どおり日付を解析して判定するため、通常の走査と同じファイルだけが削除されます。
+
+    Args:
+        walker: 走査するウォーカー
+        parsers: 日付フォーマットのパーサー
+        cutoff: 基準日時
+
+    Returns:
+        Iterator[Path]: 日付の解析が必要なファイルのパス
+    """
+    primary = next((p for p in parsers if p.lexically_ordered), None)
+    if primary is None:
+        yield from walker
+        return
+
+    cutoff_str = cutoff.strftime(primary.date_format)
+    # 他のフォーマットでは期限切れになり得るため、除外したファイルも返す
+    check_skipped = len(parsers) > 1
+    # マッチの先頭になり得る文字（フォーマット先頭のリテラル、なければ %Y の数字）
+    lead = re.split(r"%[a-zA-Z]", primary.date_format, maxsplit=1)[0]
+    can_start: Callable[[str], bool] = lead[0].__eq__ if lead else str.isdecimal
+
+    for directory, names in walker.listings():
+        names.sort()
+        i = 0
+        while i < len(names):
+            match = primary.regex.search(names[i])
+            if match is None:
+                yield directory / names[i]
+                i += 1
+                continue
+
+            # 同じ接頭辞を持ち、日付として取り得る範囲に並ぶ名前のグループ
+            prefix = names[i][: match.start()]
+            end = bisect.bisect_right(
+                names, prefix + primary.max_string + "\U0010ffff", i
+            )
+            # 基準日時と同じ文字列で始まる名前は時刻の切り捨てがあるため解析対象に含める
+            cut = bisect.bisect_right(names, prefix + cutoff_str + "\U0010ffff", i, end)
+            for name in names[i:cut]:
+                yield directory / name
+            # 最初に見つかる日付が接頭辞の直後にあれば基準日時より新しい。
+            # 接頭辞にマッチの先頭になり得る文字がなければ、接頭辞の直後からの
+            # マッチだけを確かめれば十分で、名前全体を検索し直す必要はない
+            anchored = not any(can_start(ch) for ch in prefix)
+            for name in names[cut:end]:
+                if not check_skipped:
+                    located = (
+                        primary.regex.match(name, len(prefix))
+                        if anchored
+                        else primary.regex.search(name)
+                    )
+                    if located is not None and located.start() == len(prefix):
+                        continue
+                yield directory / name
+            i = max(end, i + 1)
+
+
 def extract_date_from_filename(
-    file_path: Union[str, Path], date_format: str
+    file_path: Union[str, Path], date_format: str, tz: Optional[tzinfo] = None
 ) -> Optional[datetime]:
     """
     ファイル名から日付を抽出します
@@ -187,6 +1462,8 @@ def extract_date_from_filename(
     Args:
         file_path: 対象ファイルのパス（文字列またはPathオブジェクト）
         date_format: 日付フォーマット（例: '%Y%m%d', '%Y-%m-%d', '%Y%m%d_%H%M%S'）
+        tz: ファイル名の日付のタイムゾーン。エポック秒と UTC オフセット付きの日時は
+            このタイムゾーンの時刻に変換される。Noneの場合はローカル時刻
 
     Returns:
         Optional[datetime]: 抽出された日付。抽出できない場合はNone
@@ -210,26 +1487,14 @@ def extract_date_from_filename(
         if not match:
             return None
 
-        # マッチした部分から日付文字列を再構成
-        date_str = date_format
-        for fmt, group_name in mapping.items():
-            if group_name in match.groupdict():
-                date_str = date_str.replace(fmt, match.group(group_name))
-
-        # 日付文字列をdatetimeオブジェクトに変換
-        try:
-            dt = datetime.strptime(date_str, date_format)
-            # 日付の妥当性を追加チェック（strptimeは2月31日などを3月3日として受け入れてしまう）
-            if dt.month != int(match.group("month")) or dt.day != int(
-                match.group("day")
-            ):
-                return None
-            return dt
-        except (ValueError, KeyError):
-            return None
+        # マッチした部分の数字から直接 datetime を組み立てる
+        # （2月31日のような存在しない日付は datetime の生成に失敗して None になる）
+        found = match.groupdict()
+        groups = {name: match.group(name) for name in mapping.values() if name in found}
+        return _datetime_from_groups(groups, tz)
 
     except ValueError as e:
-        if "有効な日付フォーマット指定子" in str(e):
+        if "日付フォーマット指定子" in str(e):
             raise
         return None
     except Exception:
@@ -237,7 +1502,10 @@ def extract_date_from_filename(
 
 
 def is_filename_date_expired(
-    file_path: Path, date_format: str, deadline: Union[datetime, timedelta, int]
+    file_path: Path,
+    date_format: str,
+    deadline: Union[datetime, timedelta, int],
+    tz: Optional[tzinfo] = None,
 ) -> bool:
     """
     ファイル名の日付が期限切れかどうかを判定します
@@ -249,14 +1517,19 @@ def is_filename_date_expired(
             - datetime型: この日時より前の日付を持つファイルは期限切れと判定
             - timedelta型: 現在時刻からこの時間差より前の日付を持つファイルは期限切れと判定
             - int型: 現在日からこの日数より前の日付を持つファイルは期限切れと判定
+        tz: ファイル名の日付のタイムゾーン。naive な datetime の deadline もこの
+            タイムゾーンの時刻として扱う。Noneの場合はローカル時刻
 
     Returns:
         bool: ファイルが期限切れの場合はTrue、そうでない場合はFalse
     """
-    file_date = extract_date_from_filename(file_path, date_format)
+    file_date = extract_date_from_filename(file_path, date_format, tz)
     if file_date is None:
         return False
 
+    if tz is not None:
+        return file_date < _resolve_deadline(deadline, tz)
+
     if isinstance(deadline, datetime):
         return file_date < deadline
     elif isinstance(deadline, timedelta):
@@ -275,7 +1548,27 @@ def remove_expired_files_by_filename_date(
     deadline: Union[datetime, timedelta, int],
     recursive: bool = False,
     file_filter: Optional[List[str]] = None,
-) -> int:
+    checkpoint: Optional[Union[str, Path]] = None,
+    checkpoint_interval: float = 60.0,
+    max_duration: Optional[Union[float, timedelta]] = None,
+    max_deletions: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    resume_token: Optional[str] = None,
+    progress: Optional[Callable[["ProgressReport"], None]] = None,
+    progress_interval: float = 1.0,
+    sorted_names: bool = False,
+    bulk_parse: bool = False,
+    manifest: Optional[Union[str, Path]] = None,
+    parse_cache: Optional["ParseCache"] = None,
+    tz: Optional[tzinfo] = None,
+    profile: Optional["Profiler"] = None,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+    skip_special_files: bool = False,
+    errors: Optional["ErrorPolicy"] = None,
+    lock_probe: bool = False,
+    root_lock: Union[bool, str, Path] = False,
+) -> RemovalResult:
     """
     ファイル名の日付を基準に、指定されたディレクトリ内の期限切れファイルをすべて削除します
 
@@ -288,14 +1581,65 @@ def remove_expired_files_by_filename_date(
             - int型: 現在日からこの日数より前の日付を持つファイルは期限切れと判定
         recursive: サブディレクトリも対象とするかどうか (デフォルト: False)
         file_filter: 対象とするファイル拡張子のリスト (例: ['.txt', '.log'])
+        checkpoint: 走査の進捗を保存する状態ファイルのパス。指定した場合、状態ファイルが
+            あればその位置から再開し、正常に完了すると状態ファイルを削除する
+            (デフォルト: None)
+        checkpoint_interval: 状態ファイルを保存する間隔（秒） (デフォルト: 60.0)
+        max_duration: 実行時間の上限（秒またはtimedelta）
+        max_deletions: 削除するファイル数の上限
+        max_bytes: 削除するファイルの合計サイズの上限（バイト）。指定した場合のみ
+            削除前にファイルサイズを取得し、結果の deleted_bytes に集計する
+        resume_token: 上限に達して停止した前回の結果の resume_token。指定した場合は続きから再開する
+        progress: 進捗を受け取るコールバック。progress_interval 秒ごとに ProgressReport が渡される
+        progress_interval: 進捗を報告する間隔（秒） (デフォルト: 1.0)
+        sorted_names: ファイル名の辞書順が日付順と一致するディレクトリ向けの最適化。
+            ディレクトリごとにファイル名を並べ替え、二分探索で期限切れの範囲を求めて
+            それ以降の名前を解析せずに除外する。年・月・日・時・分・秒の順に並ぶ
+            フォーマットでのみ有効 (デフォルト: False)
+        bulk_parse: ディレクトリごとにファイル名をまとめて解析し、期限切れのファイルだけを
+            処理する。NumPy がインストールされていればベクトル化して解析する。
+            sorted_names とは併用できない (デフォルト: False)
+        manifest: 削除したファイルを記録するマニフェストファイルのパス。指定した場合は
+            削除するファイルの stat を取得して更新日時とサイズを記録する。既存の
+            マニフェストには追記する (デフォルト: None)
+        parse_cache: ファイル名の解析結果のキャッシュ。日付を含まない名前の結果も記録し、
+            次回以降の実行では解析を省略する。path を指定したキャッシュは終了時に保存される
+            (デフォルト: None)
+        tz: ファイル名の日付のタイムゾーン（例: timezone.utc）。基準日時は走査の前に
+            1回だけこのタイムゾーンの時刻に変換され、ファイルごとの変換は行わない。
+            naive な datetime の deadline もこのタイムゾーンの時刻として扱う
+            (デフォルト: None、ローカル時刻)
+        profile: scandir・正規表現のマッチ・日付の組み立て・stat・unlink の所要時間を
+            記録する Profiler。Noneの場合でも環境変数 EXPIRED_FILE_REMOVER_PROFILE=1 で
+            有効化できる (デフォルト: None)
+        follow_symlinks: 再帰的な走査でシンボリックリンク先のディレクトリにも潜るかどうか。
+            同じディレクトリは1回だけ走査する (デフォルト: False)
+        one_file_system: 再帰的な走査でルートと異なるファイルシステム（マウントされた
+            NFS 共有など）のディレクトリに潜らないかどうか (デフォルト: False)
+        skip_special_files: ソケット・FIFO・デバイスファイルを対象外とするかどうか
+            (デフォルト: False)
+        errors: ファイルごとのエラーの扱い。指定した場合は権限のエラーでも中断せずに
+            集計して結果の errors に設定し、一時的なエラー（EBUSY, ESTALE など）は
+            再試行する (デフォルト: None、権限のエラーで PermissionError を送出する)
+        lock_probe: 削除の直前に通常のファイルを開いて flock を試み、他のプロセスが
+            ロックしているファイルを削除しない (デフォルト: False)
+        root_lock: True の場合はルートのディレクトリを、パスの場合はそのファイルを
+            flock でロックし、同じツリーを他のクリーンアップと同時に処理しない
+            (デフォルト: False)
 
     Returns:
-        int: 削除されたファイルの数
+        RemovalResult: 削除されたファイルの数（int互換）。上限に達して停止した場合は
+            completed が False になり、resume_token に再開用のトークンが設定される
 
     Raises:
         FileNotFoundError: 指定されたディレクトリが存在しない場合
         NotADirectoryError: 指定されたパスがディレクトリではない場合
-        PermissionError: ファイルの削除権限がない場合
+        PermissionError: errors を指定せず、ファイルの削除権限がない場合
+        ErrorLimitExceeded: errors の on_error が "abort" または "threshold" で、
+            許容するエラー数を超えた場合
+        RootLockedError: root_lock を指定し、他のクリーンアップがロックを保持している場合
+        ValueError: sorted_names と bulk_parse を同時に指定した場合、または
+            日付フォーマットの指定子が重複している場合
     """
     path = Path(dir_path) if isinstance(dir_path, str) else dir_path
 
@@ -305,46 +1649,153 @@ def remove_expired_files_by_filename_date(
     if not path.is_dir():
         raise NotADirectoryError(f"指定されたパスはディレクトリではありません: {path}")
 
-    # date_formatを常にリストとして扱う
+    if sorted_names and bulk_parse:
+        raise ValueError("sorted_names と bulk_parse は同時に指定できません")
+
+    # date_formatを常にリストとして扱い、走査の前に一度だけコンパイルする
     formats = [date_format] if isinstance(date_format, str) else date_format
+    profiler = _resolve_profiler(profile)
+    parsers = [
+        (
+            _FilenameDateParser(fmt, tz)
+            if profiler is None
+            else _ProfiledFilenameDateParser(fmt, tz, profiler)
+        )
+        for fmt in formats
+    ]
+    cutoff = _resolve_deadline(deadline, tz)
+    cutoff_timestamp = _resolve_cutoff_timestamp(cutoff, tz)
+    if parse_cache is not None:
+        parse_cache.bind(formats, tz)
+
+    def earliest_date(stem: str) -> Optional[datetime]:
+        dates = [d for d in (parser.parse(stem) for parser in parsers) if d is not None]
+        return min(dates) if dates else None
 
+    budget = _RunBudget(max_duration, max_deletions, max_bytes)
+    checkpointer, walker = _start_walk(
+        path,
+        recursive,
+        checkpoint,
+        checkpoint_interval,
+        resume_token,
+        budget,
+        follow_symlinks,
+        one_file_system,
+        skip_special_files,
+    )
+    walker.profiler = profiler
+    summary = errors.begin() if errors is not None else None
+    walker.errors = summary
+
+    reporter = _start_progress(progress, progress_interval, path, recursive)
+
+    scanned = 0
     deleted_count = 0
-    glob_pattern = "**/*" if recursive else "*"
+    deleted_bytes = 0
+    stop_reason = None
+
+    if sorted_names:
+        candidates = _bisect_candidates(walker, parsers, cutoff)
+    elif bulk_parse:
+        from .bulk import _bulk_candidates
+
+        candidates = _bulk_candidates(walker, parsers, cutoff)
+    else:
+        candidates = iter(walker)
+    # 他のクリーンアップが処理中の場合は何も削除せずに終了する
+    lock = _acquire_root_lock(path, root_lock)
+    guard = _start_guard(False, lock_probe)
+    recorder = _open_manifest(manifest)
 
     # ディレクトリ内のファイルを処理
-    for item in path.glob(glob_pattern):
-        # ディレクトリはスキップ
-        if item.is_dir():
-            continue
-
-        # file_filterによるフィルタリング
-        if file_filter is not None:
-            if item.suffix and any(ext == item.suffix for ext in file_filter):
-                pass
-            else:
-                continue
+    try:
+        for item in candidates:
+            scanned += 1
+            if reporter is not None and scanned >= reporter.next_check:
+                reporter.poll(walker, scanned, deleted_count, deleted_bytes)
 
-        # 削除可能かどうかをチェック
-        if not os.access(item, os.W_OK):
-            raise PermissionError(f"ファイル {item} の削除権限がありません")
+            if checkpointer is not None and checkpointer.due():
+                checkpointer.save(walker.frontier())
 
-        try:
-            # いずれかのフォーマットで期限切れと判定されたら削除
-            for fmt in formats:
-                if is_filename_date_expired(item, fmt, deadline):
-                    try:
-                        item.unlink()
-                        deleted_count += 1
-                        break
-                    except PermissionError as e:
-                        raise PermissionError(
-                            f"ファイル {item} の削除権限がありません: {e}"
-                        )
-                    except OSError as e:
-                        print(f"ファイル {item} の削除に失敗しました: {e}")
-                        break
+            stop_reason = budget.exceeded(deleted_count, deleted_bytes)
+            if stop_reason is not None:
+                break
+
+            # file_filterによるフィルタリング
+            if file_filter is not None:
+                if item.suffix and any(ext == item.suffix for ext in file_filter):
+                    pass
+                else:
+                    continue
 
-        except (PermissionError, OSError) as e:
-            raise PermissionError(f"ファイル {item} の削除に失敗しました: {e}")
+            # ファイル名だけで判定し、期限切れのファイル以外には stat も access も行わない
+            stem = item.stem
+            if parse_cache is not None:
+                file_date = parse_cache.get_or_parse(stem, earliest_date)
+                if file_date is None or file_date >= cutoff:
+                    continue
+            elif not any(
+                parser.expired(stem, cutoff, cutoff_timestamp) for parser in parsers
+            ):
+                continue
+
+            # 権限の問題は事前にチェックせず、unlink の結果として扱う
+            try:
+                if guard is not None and not guard.allows_path(item):
+                    continue
+                st = (
+                    item.stat()
+                    if max_bytes is not None or recorder is not None
+                    else None
+                )
+                if profiler is None and summary is None:
+                    item.unlink()
+                else:
+                    _perform(
+                        "unlink", item, item.unlink, profiler=profiler, errors=summary
+                    )
+                deleted_count += 1
+                if st is not None:
+                    deleted_bytes += st.st_size
+                    if recorder is not None:
+                        recorder.add(item, st.st_mtime, st.st_size, time.time())
+            except PermissionError as e:
+                if summary is None:
+                    raise PermissionError(
+                        f"ファイル {item} の削除権限がありません: {e}"
+                    )
+                summary.record(item, e)
+            except OSError as e:
+                _report_error(summary, item, e)
+    except BaseException:
+        # 中断された場合は処理中のディレクトリから再開できるよう保存する
+        if checkpointer is not None:
+            checkpointer.save(walker.frontier())
+        raise
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if parse_cache is not None and parse_cache.path is not None:
+            parse_cache.save()
+        if profiler is not None:
+            profiler.finish()
+        if guard is not None:
+            guard.close()
+        if lock is not None:
+            lock.release()
+
+    if reporter is not None:
+        reporter.finish(
+            walker, scanned, deleted_count, deleted_bytes, stop_reason is None
+        )
 
-    return deleted_count
+    return _finish_walk(
+        walker,
+        checkpointer,
+        deleted_count,
+        deleted_bytes,
+        stop_reason,
+        errors=summary,
+        skipped=_count_skipped(guard, summary),
+    )
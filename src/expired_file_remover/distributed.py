@@ -0,0 +1,654 @@
+"""
+複数のワーカーでディレクトリツリーを分担して削除する機能を提供するモジュール
+
+コーディネーターはルートの第1階層をパーティションとして SQLite のファイルに作成した
+作業キューに登録し、ワーカーはパーティションをリース（期限付きで占有）して
+remove_expired_files で処理し、結果をキューに記録します。リースの期限内に結果を
+記録しなかったワーカーのパーティションは、期限が切れると他のワーカーが処理し直します。
+
+キューのファイルを共有ファイルシステムに置けば、複数のノードのワーカーで同じツリーを
+分担できます（ファイルシステムが SQLite のファイルロックに対応している必要があります）。
+"""
+
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .core import _resolve_cutoff_timestamp, _RunBudget, remove_expired_files
+from .progress import ProgressReport
+from .result import RemovalResult
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS partitions (
+    path TEXT PRIMARY KEY,
+    recursive INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    resume_token TEXT,
+    deleted_count INTEGER NOT NULL DEFAULT 0,
+    deleted_bytes INTEGER NOT NULL DEFAULT 0,
+    reclaimed_bytes INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+"""
+
+
+class LeaseLostError(RuntimeError):
+    """
+    リースの期限が切れ、パーティションが他のワーカーに割り当てられた場合の例外
+
+    Attributes:
+        deleted_count: リースを失うまでにそのパーティションで削除したファイルの数
+        deleted_bytes: リースを失うまでにそのパーティションで削除したファイルの合計サイズ
+    """
+
+    def __init__(
+        self, message: str, deleted_count: int = 0, deleted_bytes: int = 0
+    ) -> None:
+        super().__init__(message)
+        self.deleted_count = deleted_count
+        self.deleted_bytes = deleted_bytes
+
+
+@dataclass(frozen=True)
+class Lease:
+    """
+    ワーカーが占有しているパーティション
+
+    Attributes:
+        path: パーティションのディレクトリ
+        recursive: サブディレクトリも処理するかどうか
+        token: リースを識別するトークン
+        resume_token: 前回のワーカーが上限に達して停止した位置。Noneの場合は先頭から処理する
+    """
+
+    path: Path
+    recursive: bool
+    token: str
+    resume_token: Optional[str]
+
+
+@dataclass(frozen=True)
+class QueueStatus:
+    """
+    作業キューの状態
+
+    Attributes:
+        pending: 未処理のパーティションの数
+        leased: ワーカーが処理中のパーティションの数
+        done: 処理を完了したパーティションの数
+        failed: 再試行の上限に達して失敗したパーティションの数
+        deleted_count: 削除したファイルの数（リースを失ったワーカーが削除した分を含む）
+        deleted_bytes: 削除したファイルの合計サイズ（バイト）
+        reclaimed_bytes: 解放されたディスク容量（バイト）。リースを失ったワーカーが
+            削除した分は含まないため、実際より小さい場合がある
+    """
+
+    pending: int
+    leased: int
+    done: int
+    failed: int
+    deleted_count: int
+    deleted_bytes: int
+    reclaimed_bytes: int
+
+    @property
+    def finished(self) -> bool:
+        """未処理・処理中のパーティションがない場合はTrue"""
+        return self.pending == 0 and self.leased == 0
+
+
+class WorkQueue:
+    """
+    SQLite のファイルに保存されるリース方式の作業キュー
+
+    Args:
+        path: キューのファイルのパス。存在しない場合は作成する
+        lease_seconds: リースの有効期間（秒）。ワーカーは処理中に定期的に延長する
+            (デフォルト: 300.0)
+        max_attempts: パーティションを処理する回数の上限。ワーカーが異常終了したり
+            例外が発生したりして上限に達したパーティションは失敗として記録する
+            (デフォルト: 3)
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+    ) -> None:
+        if lease_seconds <= 0:
+            raise ValueError("lease_secondsは正の数である必要があります")
+        if max_attempts <= 0:
+            raise ValueError("max_attemptsは正の整数である必要があります")
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # トランザクションは BEGIN IMMEDIATE で明示的に開始する
+        self._conn = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """キューのファイルを閉じます"""
+        self._conn.close()
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _execute(self, sql: str, *params: Any) -> sqlite3.Cursor:
+        return self._conn.execute(sql, params)
+
+    def populate(
+        self,
+        dir_path: Union[str, Path],
+        deadline: Union[datetime, timedelta, int],
+        recursive: bool = False,
+        tz: Optional[tzinfo] = None,
+        follow_symlinks: bool = False,
+        one_file_system: bool = False,
+    ) -> int:
+        """
+        ルートの第1階層をパーティションとしてキューに登録します
+
+        ルート直下のファイルは1つの非再帰のパーティションとし、recursive の場合は
+        サブディレクトリをそれぞれ再帰的なパーティションとします。第1階層のディレクトリは
+        remove_expired_files の走査と同じ規則で選ぶため、ワーカーにも同じ
+        follow_symlinks / one_file_system を渡してください。
+        基準日時はここで1回だけエポック秒に変換して保存するため、すべてのワーカーが同じ
+        基準で判定します。登録済みのパーティションは登録し直さないため、コーディネーターを
+        再起動しても処理が重複しません。
+
+        Args:
+            dir_path: 削除対象ディレクトリのパス
+            deadline: 期限を示すデータ（datetime、timedelta、または日数）
+            recursive: サブディレクトリも対象とするかどうか (デフォルト: False)
+            tz: naive な datetime の deadline を解釈するタイムゾーン (デフォルト: None)
+            follow_symlinks: シンボリックリンク先のディレクトリもパーティションにするかどうか。
+                同じディレクトリを指すものは1つだけ登録する (デフォルト: False)
+            one_file_system: ルートと異なるファイルシステムのディレクトリ（マウントポイント）を
+                パーティションにしないかどうか (デフォルト: False)
+
+        Returns:
+            int: 新たに登録したパーティションの数
+
+        Raises:
+            FileNotFoundError: 指定されたディレクトリが存在しない場合
+            NotADirectoryError: 指定されたパスがディレクトリではない場合
+        """
+        root = Path(dir_path).resolve()
+        if not root.exists():
+            raise FileNotFoundError(f"ディレクトリが存在しません: {root}")
+        if not root.is_dir():
+            raise NotADirectoryError(
+                f"指定されたパスはディレクトリではありません: {root}"
+            )
+
+        partitions = [(str(root), 0)]
+        if recursive:
+            root_st = root.stat()
+            visited = {(root_st.st_dev, root_st.st_ino)}
+            with os.scandir(root) as it:
+                # 同じディレクトリを指すものは、シンボリックリンクよりも実体を登録する
+                entries = sorted(it, key=lambda entry: (entry.is_symlink(), entry.name))
+                for entry in entries:
+                    if not entry.is_dir(follow_symlinks=follow_symlinks):
+                        continue
+                    if not (follow_symlinks or one_file_system):
+                        partitions.append((entry.path, 1))
+                        continue
+                    try:
+                        st = entry.stat(follow_symlinks=follow_symlinks)
+                    except OSError:
+                        continue
+                    if one_file_system and st.st_dev != root_st.st_dev:
+                        continue
+                    if (st.st_dev, st.st_ino) in visited:
+                        continue
+                    visited.add((st.st_dev, st.st_ino))
+                    partitions.append((entry.path, 1))
+
+        self._execute("BEGIN IMMEDIATE")
+        try:
+            self._execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('cutoff', ?)",
+                repr(_resolve_cutoff_timestamp(deadline, tz)),
+            )
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO partitions (path, recursive) VALUES (?, ?)",
+                sorted(partitions),
+            )
+            added = self._conn.total_changes - before
+            self._execute("COMMIT")
+        except BaseException:
+            self._execute("ROLLBACK")
+            raise
+        return added
+
+    def deadline(self) -> datetime:
+        """
+        populate で保存した基準日時を返します
+
+        Raises:
+            LookupError: キューにパーティションが登録されていない場合
+        """
+        row = self._execute("SELECT value FROM meta WHERE key = 'cutoff'").fetchone()
+        if row is None:
+            raise LookupError(f"作業キューが初期化されていません: {self.path}")
+        return datetime.fromtimestamp(float(row[0]), timezone.utc)
+
+    def claim(self, worker: str) -> Optional[Lease]:
+        """
+        未処理のパーティション、またはリースの期限が切れたパーティションを占有します
+
+        Args:
+            worker: ワーカーの名前（記録用）
+
+        Returns:
+            Optional[Lease]: 占有したパーティション。処理できるものがない場合はNone
+        """
+        now = time.time()
+        self._execute("BEGIN IMMEDIATE")
+        try:
+            # 再試行の上限に達したままリースの期限が切れたパーティションは失敗とする
+            self._execute(
+                "UPDATE partitions SET state = 'failed', owner = NULL, "
+                "error = 'lease expired' "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                now,
+                self.max_attempts,
+            )
+            row = self._execute(
+                "SELECT path, recursive, resume_token FROM partitions "
+                "WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY attempts, path LIMIT 1",
+                now,
+            ).fetchone()
+            if row is None:
+                self._execute("COMMIT")
+                return None
+            token = uuid.uuid4().hex
+            self._execute(
+                "UPDATE partitions SET state = 'leased', owner = ?, worker = ?, "
+                "lease_expires = ?, attempts = attempts + 1 WHERE path = ?",
+                token,
+                worker,
+                now + self.lease_seconds,
+                row[0],
+            )
+            self._execute("COMMIT")
+        except BaseException:
+            self._execute("ROLLBACK")
+            raise
+        return Lease(Path(row[0]), bool(row[1]), token, row[2])
+
+    def renew(self, lease: Lease) -> bool:
+        """
+        リースの期限を延長します
+
+        Returns:
+            bool: 延長できた場合はTrue。期限が切れて他のワーカーに割り当てられた場合はFalse
+        """
+        cursor = self._execute(
+            "UPDATE partitions SET lease_expires = ? "
+            "WHERE path = ? AND owner = ? AND state = 'leased'",
+            time.time() + self.lease_seconds,
+            str(lease.path),
+            lease.token,
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, lease: Lease, result: RemovalResult) -> bool:
+        """
+        パーティションの処理結果を記録します
+
+        上限に達して途中で停止した結果の場合は、再開位置を記録して未処理に戻します。
+
+        Returns:
+            bool: 記録できた場合はTrue。リースを失っていた場合はFalse
+        """
+        cursor = self._execute(
+            "UPDATE partitions SET state = ?, owner = NULL, resume_token = ?, "
+            "attempts = CASE WHEN ? THEN attempts ELSE 0 END, "
+            "deleted_count = deleted_count + ?, deleted_bytes = deleted_bytes + ?, "
+            "reclaimed_bytes = reclaimed_bytes + ?, error = NULL "
+            "WHERE path = ? AND owner = ? AND state = 'leased'",
+            "done" if result.completed else "pending",
+            result.resume_token,
+            result.completed,
+            int(result),
+            result.deleted_bytes,
+            result.reclaimed_bytes,
+            str(lease.path),
+            lease.token,
+        )
+        return cursor.rowcount == 1
+
+    def record_lost(self, lease: Lease, deleted_count: int, deleted_bytes: int) -> None:
+        """
+        リースを失ったワーカーがそれまでに削除した数を記録します
+
+        パーティションはすでに他のワーカーが処理しているため、占有しているかどうかに
+        かかわらず集計だけを加算し、状態は変更しません。
+
+        Args:
+            lease: 失ったリース
+            deleted_count: 削除したファイルの数
+            deleted_bytes: 削除したファイルの合計サイズ（バイト）
+        """
+        self._execute(
+            "UPDATE partitions SET deleted_count = deleted_count + ?, "
+            "deleted_bytes = deleted_bytes + ? WHERE path = ?",
+            deleted_count,
+            deleted_bytes,
+            str(lease.path),
+        )
+
+    def fail(self, lease: Lease, error: str) -> bool:
+        """
+        パーティションの処理に失敗したことを記録します
+
+        再試行の上限に達していなければ未処理に戻し、他のワーカーが処理し直します。
+
+        Returns:
+            bool: 記録できた場合はTrue。リースを失っていた場合はFalse
+        """
+        cursor = self._execute(
+            "UPDATE partitions SET owner = NULL, error = ?, "
+            "state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END "
+            "WHERE path = ? AND owner = ? AND state = 'leased'",
+            error,
+            self.max_attempts,
+            str(lease.path),
+            lease.token,
+        )
+        return cursor.rowcount == 1
+
+    def status(self) -> QueueStatus:
+        """作業キューの状態を返します"""
+        counts = dict(
+            self._execute(
+                "SELECT state, COUNT(*) FROM partitions GROUP BY state"
+            ).fetchall()
+        )
+        totals = self._execute(
+            "SELECT COALESCE(SUM(deleted_count), 0), COALESCE(SUM(deleted_bytes), 0), "
+            "COALESCE(SUM(reclaimed_bytes), 0) FROM partitions"
+        ).fetchone()
+        return QueueStatus(
+            counts.get("pending", 0),
+            counts.get("leased", 0),
+            counts.get("done", 0),
+            counts.get("failed", 0),
+            *totals,
+        )
+
+    def failures(self) -> List[Tuple[Path, Optional[str]]]:
+        """
+        失敗したパーティションを返します
+
+        Returns:
+            List[Tuple[Path, Optional[str]]]: (パス, エラーメッセージ) のリスト
+        """
+        return [
+            (Path(path), error)
+            for path, error in self._execute(
+                "SELECT path, error FROM partitions WHERE state = 'failed' ORDER BY path"
+            ).fetchall()
+        ]
+
+
+class _LeaseKeeper(threading.Thread):
+    """
+    処理中のパーティションのリースを一定の間隔で延長するスレッド
+
+    進捗の報告は走査したファイルの数に応じて呼び出されるため、走査が遅くなったり
+    ファイルの少ないサブツリーを処理したりしている間は間隔が空きます。リースは
+    ファイルの数によらず lease_seconds の 1/3 ごとに延長します。SQLite の接続は
+    スレッド間で共有できないため、キューのファイルをこのスレッドで別に開きます。
+
+    Args:
+        queue_path: 作業キューのファイルのパス
+        lease: 延長するリース
+        lease_seconds: リースの有効期間（秒）
+
+    Attributes:
+        lost: 期限が切れて他のワーカーに割り当てられ、延長できなかったかどうか
+    """
+
+    def __init__(self, queue_path: Path, lease: Lease, lease_seconds: float) -> None:
+        super().__init__(name=f"lease-keeper:{lease.path}", daemon=True)
+        self.queue_path = queue_path
+        self.lease = lease
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        with WorkQueue(self.queue_path, self.lease_seconds) as queue:
+            while not self._stop_event.wait(self.lease_seconds / 3):
+                try:
+                    renewed = queue.renew(self.lease)
+                except sqlite3.OperationalError:
+                    # 他の接続の書き込みによるロックの待機がタイムアウトした場合は次の間隔で再試行する
+                    continue
+                if not renewed:
+                    self.lost = True
+                    return
+
+    def stop(self) -> None:
+        """延長を停止し、スレッドの終了を待ちます"""
+        self._stop_event.set()
+        self.join()
+
+
+def run_worker(
+    queue_path: Union[str, Path],
+    worker: Optional[str] = None,
+    lease_seconds: float = 300.0,
+    max_attempts: int = 3,
+    poll_interval: float = 1.0,
+    **options: Any,
+) -> RemovalResult:
+    """
+    作業キューのパーティションを、処理できるものがなくなるまで処理します
+
+    パーティションは remove_expired_files で処理し、処理中は別のスレッドでリースを
+    一定の間隔で延長します。
+    max_duration、max_deletions、max_bytes はこのワーカーの処理全体に適用します。
+    上限に達した場合は処理中のパーティションを再開位置とともに未処理に戻し、
+    ワーカーを終了します（残りは他のワーカーか、次に起動したワーカーが処理します）。
+    他のワーカーが処理中のパーティションが残っている間は、そのリースの期限が切れる
+    （ワーカーが異常終了した）場合に備えて poll_interval 秒ごとに待機します。
+
+    Args:
+        queue_path: populate 済みの作業キューのファイルのパス
+        worker: ワーカーの名前 (デフォルト: ホスト名とプロセスID)
+        lease_seconds: リースの有効期間（秒） (デフォルト: 300.0)
+        max_attempts: パーティションを処理する回数の上限 (デフォルト: 3)
+        poll_interval: 他のワーカーの処理の終了を待つ間隔（秒） (デフォルト: 1.0)
+        **options: remove_expired_files に渡す追加の引数（file_filter、max_duration など）。
+            max_duration、max_deletions、max_bytes はパーティションごとではなく
+            ワーカー全体の上限になる
+
+    Returns:
+        RemovalResult: このワーカーが削除したファイルの数と合計サイズ
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    user_progress: Optional[Callable[[ProgressReport], None]] = options.pop(
+        "progress", None
+    )
+    budget = _RunBudget(
+        options.pop("max_duration", None),
+        options.pop("max_deletions", None),
+        options.pop("max_bytes", None),
+    )
+    deleted_count = 0
+    deleted_bytes = 0
+    reclaimed_bytes = 0
+
+    with WorkQueue(queue_path, lease_seconds, max_attempts) as queue:
+        deadline = queue.deadline()
+        while budget.exceeded(deleted_count, deleted_bytes) is None:
+            lease = queue.claim(worker)
+            if lease is None:
+                if queue.status().leased == 0:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            keeper = _LeaseKeeper(queue.path, lease, lease_seconds)
+
+            def check_lease(
+                report: ProgressReport, keeper: _LeaseKeeper = keeper
+            ) -> None:
+                if keeper.lost:
+                    raise LeaseLostError(
+                        f"リースを失いました: {keeper.lease.path}",
+                        report.deleted,
+                        report.deleted_bytes,
+                    )
+                if user_progress is not None:
+                    user_progress(report)
+
+            keeper.start()
+            try:
+                result = remove_expired_files(
+                    lease.path,
+                    deadline,
+                    recursive=lease.recursive,
+                    resume_token=lease.resume_token,
+                    progress=check_lease,
+                    progress_interval=lease_seconds / 3,
+                    **budget.remaining(deleted_count, deleted_bytes),
+                    **options,
+                )
+            except LeaseLostError as e:
+                # 続きは新しい所有者が処理するが、それまでに削除した数は集計に残す
+                queue.record_lost(lease, e.deleted_count, e.deleted_bytes)
+                deleted_count += e.deleted_count
+                deleted_bytes += e.deleted_bytes
+                continue
+            except Exception as e:
+                queue.fail(lease, f"{type(e).__name__}: {e}")
+                continue
+            finally:
+                keeper.stop()
+
+            if queue.complete(lease, result):
+                deleted_count += int(result)
+                deleted_bytes += result.deleted_bytes
+                reclaimed_bytes += result.reclaimed_bytes
+            if not result.completed:
+                # 上限に達したパーティションは未処理に戻したので、他のワーカーに任せる
+                break
+
+    return RemovalResult(deleted_count, deleted_bytes, reclaimed_bytes=reclaimed_bytes)
+
+
+def _worker_process(
+    queue_path: str,
+    worker: str,
+    lease_seconds: float,
+    max_attempts: int,
+    poll_interval: float,
+    options: Dict[str, Any],
+) -> None:
+    run_worker(
+        queue_path, worker, lease_seconds, max_attempts, poll_interval, **options
+    )
+
+
+def run_coordinator(
+    dir_path: Union[str, Path],
+    deadline: Union[datetime, timedelta, int],
+    queue_path: Union[str, Path],
+    workers: int = 4,
+    recursive: bool = True,
+    tz: Optional[tzinfo] = None,
+    lease_seconds: float = 300.0,
+    max_attempts: int = 3,
+    poll_interval: float = 1.0,
+    **options: Any,
+) -> QueueStatus:
+    """
+    ルートの第1階層を作業キューに登録し、ローカルのワーカープロセスで処理します
+
+    他のノードでも同じ queue_path を指定して run_worker を実行すれば、パーティションを
+    分担して処理します。
+
+    Args:
+        dir_path: 削除対象ディレクトリのパス
+        deadline: 期限を示すデータ（datetime、timedelta、または日数）
+        queue_path: 作業キューのファイルのパス
+        workers: 起動するワーカープロセスの数。0 の場合はこのプロセスで処理する
+            (デフォルト: 4)
+        recursive: サブディレクトリも対象とするかどうか (デフォルト: True)
+        tz: naive な datetime の deadline を解釈するタイムゾーン (デフォルト: None)
+        lease_seconds: リースの有効期間（秒） (デフォルト: 300.0)
+        max_attempts: パーティションを処理する回数の上限 (デフォルト: 3)
+        poll_interval: 他のワーカーの処理の終了を待つ間隔（秒） (デフォルト: 1.0)
+        **options: remove_expired_files に渡す追加の引数（file_filter など）。
+            ワーカープロセスに渡すため pickle できる値である必要がある。
+            max_duration などの上限はワーカーごとに適用される
+
+    Returns:
+        QueueStatus: すべてのワーカーが終了した後の作業キューの状態
+    """
+    if workers < 0:
+        raise ValueError("workersは0以上の整数である必要があります")
+    with WorkQueue(queue_path, lease_seconds, max_attempts) as queue:
+        queue.populate(
+            dir_path,
+            deadline,
+            recursive,
+            tz,
+            follow_symlinks=options.get("follow_symlinks", False),
+            one_file_system=options.get("one_file_system", False),
+        )
+
+    if workers == 0:
+        run_worker(
+            queue_path, None, lease_seconds, max_attempts, poll_interval, **options
+        )
+    else:
+        host = socket.gethostname()
+        processes = [
+            multiprocessing.Process(
+                target=_worker_process,
+                args=(
+                    str(queue_path),
+                    f"{host}:worker-{i}",
+                    lease_seconds,
+                    max_attempts,
+                    poll_interval,
+                    options,
+                ),
+            )
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+    with WorkQueue(queue_path, lease_seconds, max_attempts) as queue:
+        return queue.status()
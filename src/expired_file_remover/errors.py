@@ -0,0 +1,216 @@
+"""
+削除処理中のエラーの扱いを制御する機能を提供するモジュール
+
+ErrorPolicy を remove_expired_files などの errors 引数に渡すと、ファイルごとの
+エラーを出力せずに errno とディレクトリごとに集計し、一時的なエラーは待機して
+再試行します。集計結果は RemovalResult.errors の ErrorSummary で参照できます。
+"""
+
+import errno
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, TypeVar
+
+_T = TypeVar("_T")
+
+ON_ERROR = ("continue", "abort", "threshold")
+
+# NFS などで再試行すると成功する可能性のあるエラー
+TRANSIENT_ERRNOS: FrozenSet[int] = frozenset(
+    code
+    for code in (
+        errno.EBUSY,
+        errno.EAGAIN,
+        getattr(errno, "ESTALE", None),
+        getattr(errno, "ETXTBSY", None),
+    )
+    if code is not None
+)
+
+
+def _errno_name(error: OSError) -> str:
+    if error.errno is None:
+        return type(error).__name__
+    return errno.errorcode.get(error.errno, str(error.errno))
+
+
+class ErrorLimitExceeded(RuntimeError):
+    """
+    エラーの扱いが "abort" または "threshold" で、許容するエラー数を超えた場合の例外
+
+    Attributes:
+        summary: 停止するまでに発生したエラーの集計
+    """
+
+    def __init__(self, summary: "ErrorSummary") -> None:
+        super().__init__(
+            f"エラーが{summary.total}件発生したため削除を中止しました\n{summary.format()}"
+        )
+        self.summary = summary
+
+
+@dataclass(frozen=True)
+class ErrorPolicy:
+    """
+    ファイルごとのエラーの扱い
+
+    Attributes:
+        on_error: エラーが発生した場合の動作
+            - "continue": 集計して処理を続ける (デフォルト)
+            - "abort": 最初のエラーで ErrorLimitExceeded を送出する
+            - "threshold": エラーが max_errors 件を超えたら ErrorLimitExceeded を送出する
+        max_errors: on_error="threshold" のときに許容するエラー数
+        retries: 一時的なエラーを再試行する回数 (デフォルト: 3)
+        backoff: 最初の再試行までの待機時間（秒）。再試行ごとに2倍にする (デフォルト: 0.05)
+        max_backoff: 再試行までの待機時間の上限（秒） (デフォルト: 1.0)
+        transient_errnos: 再試行するエラーの errno (デフォルト: EBUSY, EAGAIN, ESTALE, ETXTBSY)
+        samples: errno ごとに記録するエラーの例の数 (デフォルト: 3)
+    """
+
+    on_error: str = "continue"
+    max_errors: Optional[int] = None
+    retries: int = 3
+    backoff: float = 0.05
+    max_backoff: float = 1.0
+    transient_errnos: FrozenSet[int] = TRANSIENT_ERRNOS
+    samples: int = 3
+
+    def __post_init__(self) -> None:
+        if self.on_error not in ON_ERROR:
+            raise ValueError(
+                f"on_errorは {', '.join(ON_ERROR)} のいずれかである必要があります: "
+                f"{self.on_error!r}"
+            )
+        if self.on_error == "threshold" and (
+            self.max_errors is None or self.max_errors < 0
+        ):
+            raise ValueError("on_error='threshold' には0以上のmax_errorsが必要です")
+        if self.retries < 0:
+            raise ValueError("retriesは0以上である必要があります")
+
+    def begin(self) -> "ErrorSummary":
+        """
+        1回の削除処理のエラーを集計する ErrorSummary を作成します
+
+        Returns:
+            ErrorSummary: このポリシーに従ってエラーを集計するオブジェクト
+        """
+        return ErrorSummary(self)
+
+
+class ErrorSummary:
+    """
+    削除処理中に発生したエラーの集計
+
+    エラーの件数を errno の名前（"EACCES" など）とディレクトリごとに数え、errno ごとに
+    policy.samples 件までパスとメッセージの例を保持します。走査した後に他のプロセスが
+    削除したファイル（ENOENT）はエラーに数えず、vanished に数えます。
+
+    Attributes:
+        policy: エラーの扱い
+        total: 発生したエラーの数（再試行して成功したものは含まない）
+        retried: 一時的なエラーで再試行した回数
+        vanished: 処理する前に存在しなくなっていたファイルの数
+        by_errno: errno の名前ごとのエラーの数
+        by_directory: ディレクトリごとのエラーの数
+        examples: errno の名前ごとの (パス, メッセージ) の例
+    """
+
+    def __init__(self, policy: Optional[ErrorPolicy] = None) -> None:
+        self.policy = policy if policy is not None else ErrorPolicy()
+        self.total = 0
+        self.retried = 0
+        self.vanished = 0
+        self.by_errno: Dict[str, int] = {}
+        self.by_directory: Dict[str, int] = {}
+        self.examples: Dict[str, List[Tuple[str, str]]] = {}
+
+    def call(self, func: Callable[..., _T], *args: Any) -> _T:
+        """
+        func を呼び出し、一時的なエラーの場合は待機時間を倍にしながら再試行します
+
+        Args:
+            func: 呼び出す関数
+            *args: func に渡す引数
+
+        Returns:
+            func の戻り値
+
+        Raises:
+            OSError: 一時的ではないエラー、または再試行しても失敗した場合
+        """
+        policy = self.policy
+        delay = policy.backoff
+        for _ in range(policy.retries):
+            try:
+                return func(*args)
+            except OSError as e:
+                if e.errno not in policy.transient_errnos:
+                    raise
+            self.retried += 1
+            time.sleep(delay)
+            delay = min(delay * 2, policy.max_backoff)
+        return func(*args)
+
+    def record(self, path: "os.PathLike[str]", error: OSError) -> None:
+        """
+        エラーを集計し、許容するエラー数を超えた場合は例外を送出します
+
+        FileNotFoundError は並行して削除されたファイルとして vanished に数え、
+        エラーには数えません。
+
+        Args:
+            path: エラーが発生したファイル（または読み込めなかったディレクトリ）のパス
+            error: 発生したエラー
+
+        Raises:
+            ErrorLimitExceeded: on_error が "abort" の場合、または "threshold" で
+                エラーが max_errors 件を超えた場合
+        """
+        if isinstance(error, FileNotFoundError):
+            self.vanished += 1
+            return
+        self.total += 1
+        name = _errno_name(error)
+        self.by_errno[name] = self.by_errno.get(name, 0) + 1
+        directory = os.path.dirname(os.fspath(path))
+        self.by_directory[directory] = self.by_directory.get(directory, 0) + 1
+        examples = self.examples.setdefault(name, [])
+        if len(examples) < self.policy.samples:
+            examples.append((os.fspath(path), str(error)))
+
+        policy = self.policy
+        if policy.on_error == "abort" or (
+            policy.on_error == "threshold"
+            and policy.max_errors is not None
+            and self.total > policy.max_errors
+        ):
+            raise ErrorLimitExceeded(self) from error
+
+    def format(self, limit: int = 10) -> str:
+        """
+        集計結果を人が読める形式の文字列にします
+
+        Args:
+            limit: 表示するディレクトリの数の上限 (デフォルト: 10)
+
+        Returns:
+            str: errno ごとの件数と例、エラーの多いディレクトリの一覧
+        """
+        lines = [f"エラー: {self.total}件 (再試行: {self.retried}回)"]
+        for name, count in sorted(self.by_errno.items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {name}: {count}件")
+            lines.extend(f"    例: {path}: {msg}" for path, msg in self.examples[name])
+        directories = sorted(self.by_directory.items(), key=lambda kv: -kv[1])
+        for directory, count in directories[:limit]:
+            lines.append(f"  {directory}: {count}件")
+        if len(directories) > limit:
+            lines.append(f"  ほか {len(directories) - limit} ディレクトリ")
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return (
+            f"ErrorSummary(total={self.total}, retried={self.retried}, "
+            f"vanished={self.vanished}, by_errno={self.by_errno!r})"
+        )
@@ -0,0 +1,81 @@
+"""
+複数のハードリンクを持つファイルを扱うための機能を提供するモジュール
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+def allocated_bytes(st: os.stat_result) -> int:
+    """
+    ファイルが実際にディスク上で占有しているバイト数を返します
+
+    st_blocks が利用できる環境では 512 バイト単位のブロック数から算出するため、
+    スパースファイルや末尾ブロックの端数も正しく反映されます。
+
+    Args:
+        st: ファイルの stat 結果
+
+    Returns:
+        int: 占有バイト数（st_blocks が利用できない環境では st_size）
+    """
+    blocks = getattr(st, "st_blocks", None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+class HardlinkTracker:
+    """
+    複数のハードリンクを持つ inode について、期限切れと判定されたリンクを集計します
+
+    すべてのリンクが期限切れになったときに初めて削除するために使用します。
+    (st_dev, st_ino) をキーに、残りのリンク数と、それまでに見つかったリンクのパスを
+    NUL で連結した1つの文字列だけを保持します。リンクが揃った inode はすぐに破棄し、
+    st_nlink が 1 のファイルは記録しないため、通常のツリーではほとんどメモリを使いません。
+    記録する inode 数は max_inodes で制限され、上限を超えた inode のリンクは
+    安全側に倒して削除しません。
+
+    Args:
+        max_inodes: 記録する inode 数の上限
+    """
+
+    def __init__(self, max_inodes: int = 1_000_000) -> None:
+        self.max_inodes = max_inodes
+        # (st_dev, st_ino) -> (まだ見つかっていないリンクの数, NUL で連結したパス)
+        self._pending: Dict[Tuple[int, int], Tuple[int, str]] = {}
+        self.overflowed = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, st: os.stat_result, path: Path) -> Optional[List[Path]]:
+        """
+        期限切れと判定されたリンクを登録します
+
+        Args:
+            st: リンクの stat 結果
+            path: リンクのパス
+
+        Returns:
+            Optional[List[Path]]: この inode のすべてのリンクが揃った場合はそのパスのリスト。
+                まだ揃っていない場合、または上限を超えて記録できなかった場合はNone
+        """
+        key = (st.st_dev, st.st_ino)
+        entry = self._pending.get(key)
+        if entry is None:
+            if len(self._pending) >= self.max_inodes:
+                self.overflowed += 1
+                return None
+            remaining, paths = st.st_nlink - 1, os.fspath(path)
+        else:
+            remaining, paths = entry[0] - 1, f"{entry[1]}\0{os.fspath(path)}"
+
+        if remaining > 0:
+            self._pending[key] = (remaining, paths)
+            return None
+        self._pending.pop(key, None)
+        return [Path(p) for p in paths.split("\0")]
+
+    def pending_links(self) -> int:
+        """一部のリンクしか期限切れになっておらず、削除を保留しているリンクの数を返します"""
+        return sum(paths.count("\0") + 1 for _, paths in self._pending.values())
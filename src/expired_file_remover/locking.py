@@ -0,0 +1,236 @@
+"""
+並行して動作する他のプロセスと安全に削除するための機能を提供するモジュール
+
+RootLock はルートのディレクトリ（またはロックファイル）を flock で排他ロックし、
+同じツリーを2つのクリーンアップが同時に処理しないようにします。DeletionGuard は
+unlink の直前にファイルを dir_fd からの stat で確認し直し、判定した後に書き換えられた
+ファイルや、他のプロセスが flock でロックしているファイルを削除しないようにします。
+
+fcntl が利用できない環境では RootLock は使用できず、ロックの確認は行いません。
+"""
+
+import os
+import stat
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+# unlink の直前に比較する (st_ino, st_mtime_ns, st_size)
+Identity = Tuple[int, int, int]
+
+_O_DIRECTORY = getattr(os, "O_DIRECTORY", 0)
+# ロックの確認のために開くときに、FIFO で待機したり端末を割り当てたりしない
+_PROBE_FLAGS = (
+    os.O_RDONLY
+    | getattr(os, "O_NONBLOCK", 0)
+    | getattr(os, "O_NOCTTY", 0)
+    | getattr(os, "O_CLOEXEC", 0)
+)
+
+
+def identity(st: os.stat_result) -> Identity:
+    """
+    stat 結果からファイルが書き換えられていないかを確認するための値を返します
+
+    Args:
+        st: ファイルの stat 結果
+
+    Returns:
+        Identity: (st_ino, st_mtime_ns, st_size)
+    """
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class RootLockedError(RuntimeError):
+    """他のクリーンアップが同じルートのロックを保持している場合の例外"""
+
+
+class RootLock:
+    """
+    ルートのディレクトリを flock で排他ロックします
+
+    ロックはディレクトリを開いたファイル記述子に対して取得するため、ツリーに
+    ロックファイルを作成しません。ディレクトリの flock に対応していないファイルシステム
+    （一部の NFS など）では lock_file にロックファイルのパスを指定してください。
+    ロックは同じパスのルートに対してのみ有効で、親子関係にあるルートは区別しません。
+
+    Args:
+        root: ロックするルートのディレクトリ
+        lock_file: ディレクトリの代わりにロックするファイルのパス。存在しない場合は作成する
+            (デフォルト: None)
+    """
+
+    def __init__(
+        self, root: Union[str, Path], lock_file: Optional[Union[str, Path]] = None
+    ) -> None:
+        if fcntl is None:
+            raise NotImplementedError("この環境では flock を使用できません")
+        self.root = Path(root)
+        self.lock_file = Path(lock_file) if lock_file is not None else None
+        self._fd = -1
+
+    def __enter__(self) -> "RootLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.release()
+
+    @property
+    def locked(self) -> bool:
+        """このオブジェクトがロックを保持しているかどうか"""
+        return self._fd >= 0
+
+    def acquire(self) -> None:
+        """
+        ロックを取得します。待機せず、取得できない場合は例外を送出します
+
+        Raises:
+            RootLockedError: 他のプロセスがロックを保持している場合
+        """
+        if self._fd >= 0:
+            return
+        if self.lock_file is None:
+            fd = os.open(self.root, os.O_RDONLY | _O_DIRECTORY)
+        else:
+            fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            raise RootLockedError(
+                f"他のクリーンアップが処理中です: {self.lock_file or self.root}"
+            ) from None
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def release(self) -> None:
+        """ロックを解放します。保持していない場合は何もしません"""
+        if self._fd >= 0:
+            # 閉じるとロックも解放される
+            os.close(self._fd)
+            self._fd = -1
+
+
+class DeletionGuard:
+    """
+    unlink の直前にファイルを確認し直し、削除してよいかどうかを判定します
+
+    直前に確認したディレクトリを開いた fd を1つだけ保持し、dir_fd からの相対パスで
+    stat するため、ファイルごとにパス全体を解決し直しません。同じディレクトリの
+    ファイルを続けて確認する走査の順序で効果があります。
+
+    Args:
+        recheck: 走査時の (st_ino, st_mtime_ns, st_size) と比較し、変わっていれば削除しない
+        lock_probe: 通常のファイルを開いて flock を試み、他のプロセスがロックしていれば
+            削除しない
+    """
+
+    def __init__(self, recheck: bool = True, lock_probe: bool = False) -> None:
+        self.recheck = recheck
+        self.lock_probe = lock_probe and fcntl is not None
+        self.skipped = 0
+        self._directory: Optional[str] = None
+        self._dir_fd = -1
+
+    def __enter__(self) -> "DeletionGuard":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """保持しているディレクトリの fd を閉じます"""
+        if self._dir_fd >= 0:
+            os.close(self._dir_fd)
+        self._dir_fd = -1
+        self._directory = None
+
+    def dir_fd(self, directory: str) -> int:
+        """
+        ディレクトリを開いた fd を返します。直前と同じディレクトリなら開き直しません
+
+        Args:
+            directory: ディレクトリのパス
+
+        Returns:
+            int: ディレクトリの fd
+        """
+        if directory != self._directory:
+            self.close()
+            self._dir_fd = os.open(directory, os.O_RDONLY | _O_DIRECTORY)
+            self._directory = directory
+        return self._dir_fd
+
+    def allows(
+        self,
+        directory: str,
+        name: str,
+        expected: Optional[Identity] = None,
+        follow_symlinks: bool = True,
+    ) -> bool:
+        """
+        ファイルを削除してよいかどうかを確認します
+
+        Args:
+            directory: ファイルがあるディレクトリのパス
+            name: ファイル名
+            expected: 走査時の (st_ino, st_mtime_ns, st_size)。Noneの場合は比較しない
+            follow_symlinks: 走査時と同じくシンボリックリンクをたどって stat するかどうか
+
+        Returns:
+            bool: 削除してよい場合はTrue。書き換えられた、ロックされている、または
+                すでに存在しない場合はFalse（skipped に数える）
+
+        Raises:
+            OSError: ディレクトリを開けない場合など、ファイルが存在しない以外のエラー
+        """
+        if not (self.recheck and expected is not None) and not self.lock_probe:
+            return True
+        fd = self.dir_fd(directory)
+        try:
+            st = os.stat(name, dir_fd=fd, follow_symlinks=follow_symlinks)
+        except FileNotFoundError:
+            self.skipped += 1
+            return False
+        if self.recheck and expected is not None and identity(st) != expected:
+            self.skipped += 1
+            return False
+        if self.lock_probe and stat.S_ISREG(st.st_mode) and self._is_locked(fd, name):
+            self.skipped += 1
+            return False
+        return True
+
+    def allows_path(
+        self,
+        path: Path,
+        expected: Optional[Identity] = None,
+        follow_symlinks: bool = True,
+    ) -> bool:
+        """Path を受け取る allows です"""
+        directory, name = os.path.split(os.fspath(path))
+        return self.allows(directory or ".", name, expected, follow_symlinks)
+
+    @staticmethod
+    def _is_locked(dir_fd: int, name: str) -> bool:
+        try:
+            fd = os.open(name, _PROBE_FLAGS, dir_fd=dir_fd)
+        except OSError:
+            # 読み取りで開けないファイルのロックは確認できない
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        finally:
+            # 取得できたロックは閉じると解放される
+            os.close(fd)
+        return False
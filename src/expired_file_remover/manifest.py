@@ -0,0 +1,509 @@
+"""
+削除したファイルの一覧を記録するマニフェストファイルを扱う機能を提供するモジュール
+
+マニフェストは次の順に並ぶバイナリファイルです。
+
+- ヘッダー（HEADER_SIZE バイト）
+- 固定長のレコード（RECORD_SIZE バイト × 件数）
+- 文字列テーブル（パスのバイト列を連結したもの）
+- パスのハッシュによる検索用のインデックス（オープンアドレス法のハッシュテーブル）
+
+書き込み中はレコードを追記するだけで、文字列テーブルは一時ファイルに追記し、
+close の時点でマニフェストの末尾に連結してインデックスを書き込みます。
+読み込み時はファイルをメモリマップするため、数千万件のマニフェストでも
+Python のリストに展開せずに検索・比較・再実行できます。
+
+レコードと文字列はバッファリングせずに1件ずつ書き込むため、強制終了された
+書き込み中のマニフェストも、append=True で開き直すと書き込み済みのレコードを
+復旧して追記を続けられます。
+"""
+
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import IO, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+from .result import RemovalResult
+
+MANIFEST_MAGIC = b"EFRMANI\x00"
+MANIFEST_VERSION = 1
+
+# magic, version, flags, count, records_offset, strings_offset, strings_size,
+# index_offset, index_slots, created_at
+_HEADER = struct.Struct("<8sIIQQQQQQd")
+HEADER_SIZE = 128
+
+# path_hash, path_offset, path_length, reserved, mtime, deleted_at, size
+_RECORD = struct.Struct("<QQIIddq")
+RECORD_SIZE = _RECORD.size
+
+# close によって文字列テーブルとインデックスが書き込まれたことを示すフラグ
+_FLAG_FINALIZED = 1
+
+# インデックスのスロット（レコード番号）と空きスロット
+_SLOT = struct.Struct("<I")
+_EMPTY_SLOT = 0xFFFFFFFF
+
+# レコード先頭のパスのハッシュ
+_HASH = struct.Struct("<Q")
+
+
+def _path_bytes(path: Union[str, Path]) -> bytes:
+    return os.fsencode(os.path.abspath(path))
+
+
+def _path_hash(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def _read_records(
+    source: IO[bytes], count: int
+) -> Iterator[Tuple[int, int, int, int, float, float, int]]:
+    """source の現在の位置から最大 count 件のレコードを順に読み込みます"""
+    while count > 0:
+        chunk = source.read(min(count, 65536) * RECORD_SIZE)
+        usable = len(chunk) - len(chunk) % RECORD_SIZE
+        if usable == 0:
+            return
+        yield from _RECORD.iter_unpack(chunk[:usable])
+        count -= usable // RECORD_SIZE
+
+
+def _copy_bytes(source: IO[bytes], target: IO[bytes], size: int) -> None:
+    """source の現在の位置から size バイトを target に書き込みます"""
+    while size > 0:
+        chunk = source.read(min(size, 1024 * 1024))
+        if not chunk:
+            break
+        target.write(chunk)
+        size -= len(chunk)
+
+
+class ManifestEntry(NamedTuple):
+    """
+    マニフェストの1件
+
+    Attributes:
+        path: ファイルの絶対パス
+        mtime: 記録時のファイルの更新日時（エポック秒）
+        size: 記録時のファイルサイズ（バイト）
+        deleted_at: 削除した日時（エポック秒）。削除せずに記録した場合はNone
+    """
+
+    path: Path
+    mtime: float
+    size: int
+    deleted_at: Optional[float]
+
+
+class ManifestWriter:
+    """
+    マニフェストファイルにレコードを追記します
+
+    with 文で使用するか、最後に close を呼び出してください。close されなかった
+    マニフェストは不完全なものとして読み込み時に ValueError になります。
+
+    append=True の場合、既存のマニフェストのレコードを残したまま追記します。
+    close されずに終了したマニフェストも、文字列まで書き込まれたレコードを復旧します
+    （すぐに close すれば、復旧したマニフェストを読み込めるようになります）。
+
+    Args:
+        manifest_path: マニフェストファイルのパス
+        append: 既存のマニフェストに追記するかどうか。Falseの場合は上書きする
+            (デフォルト: False)
+
+    Raises:
+        ValueError: append=True で、既存のファイルがマニフェストではない場合
+    """
+
+    def __init__(self, manifest_path: Union[str, Path], append: bool = False) -> None:
+        self.manifest_path = Path(manifest_path)
+        self._strings_path = self.manifest_path.with_name(
+            self.manifest_path.name + ".strings"
+        )
+        self._hashes = array("Q")
+        self._strings_size = 0
+        self._created_at = time.time()
+        self._closed = False
+        self._records: IO[bytes]
+        self._strings: IO[bytes]
+        if append and self.manifest_path.exists():
+            self._records, self._strings = self._reopen()
+        else:
+            # 強制終了されても書き込んだレコードが残るようバッファリングしない
+            self._records = open(self.manifest_path, "wb", buffering=0)
+            self._strings = open(self._strings_path, "w+b", buffering=0)
+        self._write_header(0, 0, 0, 0, 0)
+
+    def _reopen(self) -> Tuple[IO[bytes], IO[bytes]]:
+        """既存のマニフェストを開き、レコードと文字列を書き込み中の状態に戻します"""
+        records = open(self.manifest_path, "r+b", buffering=0)
+        strings: IO[bytes]
+        try:
+            header = records.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                raise ValueError(
+                    f"マニフェストファイルではありません: {self.manifest_path}"
+                )
+            (
+                magic,
+                version,
+                flags,
+                count,
+                records_offset,
+                strings_offset,
+                strings_size,
+                _,
+                _,
+                created_at,
+            ) = _HEADER.unpack_from(header)
+            if magic != MANIFEST_MAGIC or version != MANIFEST_VERSION:
+                raise ValueError(
+                    f"マニフェストファイルではありません: {self.manifest_path}"
+                )
+            self._created_at = created_at
+
+            if flags & _FLAG_FINALIZED:
+                # 文字列テーブルを一時ファイルに戻し、インデックスとともに切り離す。
+                # 切り詰める前にヘッダーを未完成に戻しておき、途中で強制終了されても
+                # 完成済みのヘッダーが切り詰められたファイルを指さないようにする
+                strings = open(self._strings_path, "w+b", buffering=0)
+                records.seek(strings_offset)
+                _copy_bytes(records, strings, strings_size)
+                os.fsync(strings.fileno())
+                self._records = records
+                self._write_header(0, 0, 0, 0, 0)
+                os.fsync(records.fileno())
+            else:
+                # close されずに終了した場合、文字列まで書き込まれたレコードだけを残す
+                count = (
+                    os.fstat(records.fileno()).st_size - HEADER_SIZE
+                ) // RECORD_SIZE
+                mode = "r+b" if self._strings_path.exists() else "w+b"
+                strings = open(self._strings_path, mode, buffering=0)
+                strings_size = os.fstat(strings.fileno()).st_size
+        except BaseException:
+            records.close()
+            raise
+
+        # 文字列は順に連結されているため、最初に文字列が欠けたレコード以降は使わない
+        # （完成の途中で終了したファイルの末尾にある文字列やインデックスもここで除く）
+        end = 0
+        records.seek(records_offset)
+        for path_hash, offset, length, _, _, _, _ in _read_records(records, count):
+            if offset != end or length == 0 or offset + length > strings_size:
+                break
+            self._hashes.append(path_hash)
+            end += length
+        self._strings_size = end
+        records.truncate(HEADER_SIZE + len(self._hashes) * RECORD_SIZE)
+        strings.truncate(end)
+        strings.seek(0, os.SEEK_END)
+        return records, strings
+
+    def __enter__(self) -> "ManifestWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def _write_header(
+        self,
+        flags: int,
+        strings_offset: int,
+        strings_size: int,
+        index_offset: int,
+        index_slots: int,
+    ) -> None:
+        header = _HEADER.pack(
+            MANIFEST_MAGIC,
+            MANIFEST_VERSION,
+            flags,
+            len(self._hashes),
+            HEADER_SIZE,
+            strings_offset,
+            strings_size,
+            index_offset,
+            index_slots,
+            self._created_at,
+        )
+        self._records.seek(0)
+        self._records.write(header.ljust(HEADER_SIZE, b"\0"))
+        self._records.seek(0, os.SEEK_END)
+
+    def add(
+        self,
+        path: Union[str, Path],
+        mtime: float,
+        size: int,
+        deleted_at: Optional[float] = None,
+    ) -> None:
+        """
+        ファイルを1件記録します
+
+        Args:
+            path: ファイルのパス（絶対パスに変換して記録される）
+            mtime: ファイルの更新日時（エポック秒）
+            size: ファイルサイズ（バイト）
+            deleted_at: 削除した日時（エポック秒）。Noneの場合は削除予定として記録する
+        """
+        data = _path_bytes(path)
+        path_hash = _path_hash(data)
+        # 強制終了されても文字列のないレコードが残らないよう、文字列を先に書き込む
+        self._strings.write(data)
+        self._records.write(
+            _RECORD.pack(
+                path_hash,
+                self._strings_size,
+                len(data),
+                0,
+                mtime,
+                deleted_at if deleted_at is not None else math.nan,
+                size,
+            )
+        )
+        self._strings_size += len(data)
+        self._hashes.append(path_hash)
+
+    def close(self) -> None:
+        """文字列テーブルとインデックスを書き込み、マニフェストを完成させます"""
+        if self._closed:
+            return
+        self._closed = True
+
+        count = len(self._hashes)
+        strings_offset = HEADER_SIZE + count * RECORD_SIZE
+        self._records.seek(strings_offset)
+        self._strings.seek(0)
+        _copy_bytes(self._strings, self._records, self._strings_size)
+
+        # 負荷率が 0.5 以下になる 2 のべき乗のスロット数で線形探査のテーブルを作る
+        slots = 8
+        while slots < count * 2:
+            slots *= 2
+        index = array("I", [_EMPTY_SLOT]) * slots
+        mask = slots - 1
+        for i, path_hash in enumerate(self._hashes):
+            slot = path_hash & mask
+            while index[slot] != _EMPTY_SLOT:
+                slot = (slot + 1) & mask
+            index[slot] = i
+        if sys.byteorder != "little":
+            index.byteswap()
+        index_offset = strings_offset + self._strings_size
+        self._records.seek(index_offset)
+        index.tofile(self._records)
+
+        self._write_header(
+            _FLAG_FINALIZED,
+            strings_offset,
+            self._strings_size,
+            index_offset,
+            slots,
+        )
+        self._records.flush()
+        os.fsync(self._records.fileno())
+        self._records.close()
+        # 完成したヘッダーを書き込むまでは、復旧に使う一時ファイルを残しておく
+        self._strings.close()
+        os.unlink(self._strings_path)
+        self._hashes = array("Q")
+
+
+class Manifest:
+    """
+    マニフェストファイルをメモリマップして読み込みます
+
+    Args:
+        manifest_path: マニフェストファイルのパス
+
+    Raises:
+        ValueError: マニフェストファイルではない、または close されていない場合
+    """
+
+    def __init__(self, manifest_path: Union[str, Path]) -> None:
+        self.manifest_path = Path(manifest_path)
+        with open(self.manifest_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mm) < HEADER_SIZE:
+            self._mm.close()
+            raise ValueError(f"マニフェストファイルではありません: {manifest_path}")
+        (
+            magic,
+            version,
+            flags,
+            self._count,
+            self._records_offset,
+            self._strings_offset,
+            self._strings_size,
+            self._index_offset,
+            self._index_slots,
+            self.created_at,
+        ) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MANIFEST_MAGIC or version != MANIFEST_VERSION:
+            self._mm.close()
+            raise ValueError(f"マニフェストファイルではありません: {manifest_path}")
+        if not flags & _FLAG_FINALIZED:
+            self._mm.close()
+            raise ValueError(
+                f"マニフェストが完成していません: {manifest_path} "
+                "(ManifestWriter(path, append=True) で開いて close すると復旧できます)"
+            )
+
+    def __enter__(self) -> "Manifest":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """メモリマップを解放します"""
+        self._mm.close()
+
+    def __len__(self) -> int:
+        return int(self._count)
+
+    def _path_data(self, index: int) -> bytes:
+        _, offset, length, _, _, _, _ = _RECORD.unpack_from(
+            self._mm, self._records_offset + index * RECORD_SIZE
+        )
+        start = self._strings_offset + offset
+        return self._mm[start : start + length]
+
+    def __getitem__(self, index: int) -> ManifestEntry:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Manifest index out of range")
+        _, offset, length, _, mtime, deleted_at, size = _RECORD.unpack_from(
+            self._mm, self._records_offset + index * RECORD_SIZE
+        )
+        start = self._strings_offset + offset
+        return ManifestEntry(
+            path=Path(os.fsdecode(self._mm[start : start + length])),
+            mtime=mtime,
+            size=size,
+            deleted_at=None if math.isnan(deleted_at) else deleted_at,
+        )
+
+    def __iter__(self) -> Iterator[ManifestEntry]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def find(self, path: Union[str, Path]) -> Optional[int]:
+        """
+        パスのレコード番号をインデックスから検索します
+
+        Args:
+            path: 検索するパス（絶対パスに変換して比較される）
+
+        Returns:
+            Optional[int]: レコード番号。記録されていない場合はNone
+        """
+        data = _path_bytes(path)
+        path_hash = _path_hash(data)
+        mask = self._index_slots - 1
+        slot = path_hash & mask
+        while True:
+            index: int = _SLOT.unpack_from(self._mm, self._index_offset + slot * 4)[0]
+            if index == _EMPTY_SLOT:
+                return None
+            (record_hash,) = _HASH.unpack_from(
+                self._mm, self._records_offset + index * RECORD_SIZE
+            )
+            if record_hash == path_hash and self._path_data(index) == data:
+                return index
+            slot = (slot + 1) & mask
+
+    def __contains__(self, path: object) -> bool:
+        if not isinstance(path, (str, Path)):
+            return False
+        return self.find(path) is not None
+
+    def difference(self, paths: Iterable[Union[str, Path]]) -> Iterator[Path]:
+        """
+        マニフェストに記録されていないパスだけを返します
+
+        次回の実行の候補（CandidateStore.paths() など）と比較するために使用します。
+
+        Args:
+            paths: 比較するパス
+
+        Returns:
+            Iterator[Path]: マニフェストに記録されていないパスのイテレータ
+        """
+        for path in paths:
+            if self.find(path) is None:
+                yield Path(path)
+
+    def export_ndjson(self, output_path: Union[str, Path]) -> int:
+        """
+        マニフェストを1行1件の JSON（NDJSON）として書き出します
+
+        Args:
+            output_path: 出力先のパス
+
+        Returns:
+            int: 書き出した件数
+        """
+        count = 0
+        with open(output_path, "w", encoding="utf-8", errors="surrogateescape") as f:
+            for entry in self:
+                record = {
+                    "path": str(entry.path),
+                    "mtime": entry.mtime,
+                    "size": entry.size,
+                    "deleted_at": entry.deleted_at,
+                }
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+
+def replay_manifest(
+    manifest_path: Union[str, Path], verify: bool = True
+) -> RemovalResult:
+    """
+    マニフェストに記録されたファイルを削除します
+
+    削除予定として記録したマニフェストを後から実行したり、別のホストで同じ削除を
+    再現したりするために使用します。すでに存在しないファイルは無視します。
+
+    Args:
+        manifest_path: マニフェストファイルのパス
+        verify: 記録時から更新日時またはサイズが変わったファイルを削除しないかどうか
+            (デフォルト: True)
+
+    Returns:
+        RemovalResult: 削除されたファイルの数（int互換）
+
+    Raises:
+        ValueError: マニフェストファイルではない、または完成していない場合
+    """
+    deleted_count = 0
+    deleted_bytes = 0
+    with Manifest(manifest_path) as manifest:
+        for entry in manifest:
+            try:
+                st = entry.path.lstat()
+                if verify and (st.st_mtime != entry.mtime or st.st_size != entry.size):
+                    continue
+                entry.path.unlink()
+                deleted_count += 1
+                deleted_bytes += st.st_size
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                print(f"ファイル {entry.path} の削除に失敗しました: {e}")
+    return RemovalResult(deleted_count, deleted_bytes)
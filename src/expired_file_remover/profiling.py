@@ -0,0 +1,296 @@
+"""
+削除処理のホットパスの所要時間を計測する機能を提供するモジュール
+
+ディレクトリの読み込み（scandir）、stat、ファイル名の正規表現のマッチ（match）、
+日付の組み立て（parse）、削除（unlink）の各呼び出しの所要時間を記録し、操作ごとの
+レイテンシのヒストグラム、最も時間のかかったパス、Chrome のトレースイベント形式の
+JSON（chrome://tracing や Perfetto で表示できる）を出力します。
+"""
+
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
+
+# 計測する操作
+OPERATIONS = ("scandir", "stat", "match", "parse", "unlink")
+
+# 環境変数による有効化
+PROFILE_ENV = "EXPIRED_FILE_REMOVER_PROFILE"
+TRACE_ENV = "EXPIRED_FILE_REMOVER_PROFILE_TRACE"
+
+T = TypeVar("T")
+
+
+class LatencyHistogram:
+    """
+    所要時間を2のべき乗のナノ秒単位のバケットに集計するヒストグラム
+
+    Attributes:
+        count: 記録した回数
+        total_ns: 所要時間の合計（ナノ秒）
+        max_ns: 所要時間の最大値（ナノ秒）
+        buckets: バケットごとの回数。i 番目のバケットは 2**(i-1) 以上 2**i 未満
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * 65
+
+    def add(self, duration_ns: int) -> None:
+        """所要時間を記録します"""
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        self.buckets[min(duration_ns.bit_length(), 64)] += 1
+
+    def percentile(self, q: float) -> int:
+        """
+        所要時間のパーセンタイルを返します
+
+        Args:
+            q: パーセンタイル（0〜100）
+
+        Returns:
+            int: 該当するバケットの上限（ナノ秒）。記録がない場合は0
+        """
+        if self.count == 0:
+            return 0
+        rank = self.count * q / 100
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min(1 << i, self.max_ns)
+        return self.max_ns
+
+
+class _TimedScandir:
+    """os.scandir のイテレータをラップし、エントリの読み込みにかかった時間を記録します"""
+
+    def __init__(self, profiler: "Profiler", directory: Path) -> None:
+        self._profiler = profiler
+        self._directory = directory
+        self._start = time.perf_counter_ns()
+        self._it = os.scandir(directory)
+        self._elapsed = time.perf_counter_ns() - self._start
+
+    def __enter__(self) -> "_TimedScandir":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._it.close()
+        self._profiler.record(
+            "scandir", self._directory, self._start, self._start + self._elapsed
+        )
+
+    def __iter__(self) -> Iterator["os.DirEntry[str]"]:
+        it = self._it
+        while True:
+            start = time.perf_counter_ns()
+            entry = next(it, None)
+            self._elapsed += time.perf_counter_ns() - start
+            if entry is None:
+                return
+            yield entry
+
+
+class Profiler:
+    """
+    削除処理の各操作の所要時間を記録します
+
+    remove_expired_files / remove_expired_files_by_filename_date の profile 引数に
+    指定するか、環境変数 EXPIRED_FILE_REMOVER_PROFILE=1 で有効化します。scandir の
+    所要時間はディレクトリごとに、エントリの読み込みにかかった時間の合計として記録されます。
+
+    Args:
+        slowest: 記録する最も時間のかかった呼び出しの数 (デフォルト: 20)
+        trace_file: 実行の終了時に Chrome のトレースイベント形式の JSON を書き込むパス
+        max_events: トレースに記録するイベント数の上限。超えた分は集計のみ行う
+
+    Attributes:
+        histograms: 操作ごとの LatencyHistogram
+        dropped_events: 上限を超えてトレースに記録しなかったイベントの数
+    """
+
+    def __init__(
+        self,
+        slowest: int = 20,
+        trace_file: Optional[Union[str, Path]] = None,
+        max_events: int = 1_000_000,
+    ) -> None:
+        if slowest < 0:
+            raise ValueError("slowestは0以上の整数である必要があります")
+        self.slowest_limit = slowest
+        self.trace_file = Path(trace_file) if trace_file is not None else None
+        self.max_events = max_events
+        self.histograms: Dict[str, LatencyHistogram] = {
+            op: LatencyHistogram() for op in OPERATIONS
+        }
+        self.dropped_events = 0
+        self._origin_ns = time.perf_counter_ns()
+        self._events: List[Tuple[str, str, int, int, int]] = []
+        self._slowest: List[Tuple[int, int, str, str]] = []
+        self._seq = 0
+
+    def record(self, op: str, path: Any, start_ns: int, end_ns: int) -> None:
+        """
+        1回の操作の所要時間を記録します
+
+        Args:
+            op: 操作の名前（OPERATIONS のいずれか）
+            path: 操作の対象のパス
+            start_ns: 開始時刻（time.perf_counter_ns の値）
+            end_ns: 終了時刻（time.perf_counter_ns の値）
+        """
+        duration = end_ns - start_ns
+        self.histograms[op].add(duration)
+        if len(self._events) < self.max_events:
+            self._events.append(
+                (op, os.fspath(path), start_ns, duration, threading.get_ident())
+            )
+        else:
+            self.dropped_events += 1
+        if self.slowest_limit:
+            self._seq += 1
+            item = (duration, self._seq, op, os.fspath(path))
+            if len(self._slowest) < self.slowest_limit:
+                heapq.heappush(self._slowest, item)
+            elif duration > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+
+    def call(self, op: str, path: Any, func: Callable[..., T], *args: Any) -> T:
+        """
+        関数を呼び出し、その所要時間を記録します
+
+        Args:
+            op: 操作の名前
+            path: 操作の対象のパス
+            func: 呼び出す関数
+            *args: 関数に渡す引数
+
+        Returns:
+            関数の戻り値
+        """
+        start = time.perf_counter_ns()
+        try:
+            return func(*args)
+        finally:
+            self.record(op, path, start, time.perf_counter_ns())
+
+    def scandir(self, directory: Path) -> _TimedScandir:
+        """所要時間を記録する os.scandir を返します"""
+        return _TimedScandir(self, directory)
+
+    def slowest(self) -> List[Tuple[str, str, float]]:
+        """
+        最も時間のかかった呼び出しを返します
+
+        Returns:
+            List[Tuple[str, str, float]]: (操作, パス, 所要時間（秒）) のリスト（遅い順）
+        """
+        return [
+            (op, path, duration / 1e9)
+            for duration, _, op, path in sorted(self._slowest, reverse=True)
+        ]
+
+    def dominant(self) -> Optional[str]:
+        """
+        合計の所要時間が最も長い操作を返します
+
+        Returns:
+            Optional[str]: 操作の名前。何も記録していない場合はNone
+        """
+        op, histogram = max(self.histograms.items(), key=lambda kv: kv[1].total_ns)
+        return op if histogram.total_ns else None
+
+    def summary(self) -> str:
+        """
+        操作ごとの集計と最も時間のかかった呼び出しを表形式の文字列で返します
+
+        Returns:
+            str: 集計結果
+        """
+        lines = [
+            f"{'op':<8} {'count':>10} {'total ms':>10} {'mean us':>10} "
+            f"{'p50 us':>10} {'p99 us':>10} {'max us':>10}"
+        ]
+        for op, h in self.histograms.items():
+            if h.count == 0:
+                continue
+            lines.append(
+                f"{op:<8} {h.count:>10} {h.total_ns / 1e6:>10.1f} "
+                f"{h.total_ns / h.count / 1e3:>10.1f} {h.percentile(50) / 1e3:>10.1f} "
+                f"{h.percentile(99) / 1e3:>10.1f} {h.max_ns / 1e3:>10.1f}"
+            )
+        dominant = self.dominant()
+        if dominant is not None:
+            lines.append(f"dominant: {dominant}")
+        for op, path, seconds in self.slowest():
+            lines.append(f"  {seconds * 1e3:>10.3f} ms  {op:<8} {path}")
+        return "\n".join(lines)
+
+    def write_trace(self, path: Union[str, Path]) -> None:
+        """
+        記録したイベントを Chrome のトレースイベント形式の JSON で書き込みます
+
+        Args:
+            path: 書き込むファイルのパス
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": op,
+                "cat": op,
+                "ph": "X",
+                "ts": (start - self._origin_ns) / 1e3,
+                "dur": duration / 1e3,
+                "pid": pid,
+                "tid": tid,
+                "args": {"path": target},
+            }
+            for op, target, start, duration, tid in self._events
+        ]
+        with open(path, "w", encoding="utf-8", errors="surrogateescape") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def finish(self) -> None:
+        """実行の終了時に呼び出され、trace_file が指定されていればトレースを書き込みます"""
+        if self.trace_file is not None:
+            self.write_trace(self.trace_file)
+
+
+class _EnvProfiler(Profiler):
+    """環境変数で有効化された場合に、終了時に集計を標準エラー出力に書き出す Profiler"""
+
+    def finish(self) -> None:
+        super().finish()
+        print(self.summary(), file=sys.stderr)
+
+
+def resolve_profiler(profile: Optional[Profiler]) -> Optional[Profiler]:
+    """
+    使用する Profiler を返します
+
+    profile が指定されていなければ、環境変数 EXPIRED_FILE_REMOVER_PROFILE が
+    空でも "0" でもない場合に、EXPIRED_FILE_REMOVER_PROFILE_TRACE をトレースの
+    出力先とする Profiler を作成します。
+
+    Args:
+        profile: 引数で指定された Profiler
+
+    Returns:
+        Optional[Profiler]: 使用する Profiler。計測しない場合はNone
+    """
+    if profile is not None:
+        return profile
+    if os.environ.get(PROFILE_ENV, "") in ("", "0"):
+        return None
+    return _EnvProfiler(trace_file=os.environ.get(TRACE_ENV) or None)
@@ -0,0 +1,233 @@
+"""
+長時間のクリーンアップの進捗を報告する機能を提供するモジュール
+"""
+
+import os
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional, TextIO
+
+if TYPE_CHECKING:
+    from .core import _DirectoryWalker
+
+
+@dataclass(frozen=True)
+class ProgressReport:
+    """
+    進捗の報告内容
+
+    Attributes:
+        scanned: 走査したファイルの数
+        deleted: 削除したファイルの数
+        deleted_bytes: 削除したファイルの合計サイズ（バイト）
+        current_dir: 処理中のディレクトリ
+        elapsed: 経過時間（秒）
+        rate: 走査速度（ファイル/秒）
+        fraction: 第1階層のディレクトリ数から推定した進捗率（0.0〜1.0）。推定できない場合はNone
+        eta: 推定残り時間（秒）。推定できない場合はNone
+        finished: 走査が終了した場合はTrue
+    """
+
+    scanned: int
+    deleted: int
+    deleted_bytes: int
+    current_dir: Optional[Path]
+    elapsed: float
+    rate: float
+    fraction: Optional[float]
+    eta: Optional[float]
+    finished: bool = False
+
+
+class ProgressReporter:
+    """
+    一定の時間間隔で進捗コールバックを呼び出します
+
+    ファイルごとに時刻を取得するとオーバーヘッドが大きいため、走査ループは
+    scanned が next_check に達したときだけ poll を呼び出します。next_check の間隔は
+    計測した走査速度から、1回の報告間隔におよそ POLLS_PER_INTERVAL 回 poll が
+    呼ばれるように調整されます。
+
+    Args:
+        callback: 進捗を受け取るコールバック
+        interval: コールバックを呼び出す間隔（秒）
+    """
+
+    # 1回の報告間隔あたりの poll 回数の目安
+    POLLS_PER_INTERVAL = 8
+
+    def __init__(
+        self, callback: Callable[[ProgressReport], None], interval: float = 1.0
+    ) -> None:
+        self.callback = callback
+        self.interval = interval
+        self.next_check = 1
+        self._root: Optional[Path] = None
+        self._total_top_level = 0
+        self._started = time.monotonic()
+        self._last_report = self._started
+        self._last_poll = self._started
+        self._last_poll_scanned = 0
+
+    def start(self, root: Path, recursive: bool) -> None:
+        """
+        走査の開始時に呼び出し、ETA推定のために第1階層のディレクトリ数を数えます
+
+        Args:
+            root: 走査のルートディレクトリ
+            recursive: 再帰的に走査するかどうか
+        """
+        self._root = root
+        self._started = self._last_report = self._last_poll = time.monotonic()
+        if recursive:
+            with os.scandir(root) as it:
+                self._total_top_level = sum(
+                    1 for e in it if e.is_dir(follow_symlinks=False)
+                )
+
+    def _estimate_fraction(self, walker: "_DirectoryWalker") -> Optional[float]:
+        if self._total_top_level == 0 or walker.current is None:
+            return None
+        if walker.current == self._root:
+            return 0.0
+        remaining = sum(1 for p in walker.pending if p.parent == self._root)
+        # 処理中の第1階層ディレクトリは半分終わったものとみなす
+        done = self._total_top_level - remaining - 0.5
+        return min(max(done / self._total_top_level, 0.0), 1.0)
+
+    def _report(
+        self,
+        walker: "_DirectoryWalker",
+        scanned: int,
+        deleted: int,
+        deleted_bytes: int,
+        now: float,
+        finished: bool = False,
+        completed: bool = False,
+    ) -> None:
+        elapsed = now - self._started
+        rate = scanned / elapsed if elapsed > 0 else 0.0
+        fraction = 1.0 if completed else self._estimate_fraction(walker)
+        eta = (
+            elapsed * (1.0 - fraction) / fraction
+            if fraction is not None and fraction > 0
+            else None
+        )
+        self.callback(
+            ProgressReport(
+                scanned=scanned,
+                deleted=deleted,
+                deleted_bytes=deleted_bytes,
+                current_dir=walker.current,
+                elapsed=elapsed,
+                rate=rate,
+                fraction=fraction,
+                eta=eta,
+                finished=finished,
+            )
+        )
+        self._last_report = now
+
+    def poll(
+        self,
+        walker: "_DirectoryWalker",
+        scanned: int,
+        deleted: int,
+        deleted_bytes: int,
+    ) -> None:
+        """
+        報告間隔が経過していればコールバックを呼び出し、次に poll する位置を更新します
+
+        Args:
+            walker: 走査中のウォーカー
+            scanned: 走査したファイルの数
+            deleted: 削除したファイルの数
+            deleted_bytes: 削除したファイルの合計サイズ（バイト）
+        """
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self._report(walker, scanned, deleted, deleted_bytes, now)
+
+        # 直近の走査速度から次の poll までのファイル数を決める
+        poll_elapsed = now - self._last_poll
+        if poll_elapsed > 0:
+            recent_rate = (scanned - self._last_poll_scanned) / poll_elapsed
+            stride = int(recent_rate * self.interval / self.POLLS_PER_INTERVAL)
+        else:
+            stride = (scanned - self._last_poll_scanned) * 2
+        self._last_poll = now
+        self._last_poll_scanned = scanned
+        self.next_check = scanned + max(stride, 1)
+
+    def finish(
+        self,
+        walker: "_DirectoryWalker",
+        scanned: int,
+        deleted: int,
+        deleted_bytes: int,
+        completed: bool = True,
+    ) -> None:
+        """
+        走査の終了時に最終的な進捗を報告します
+
+        Args:
+            walker: 走査したウォーカー
+            scanned: 走査したファイルの数
+            deleted: 削除したファイルの数
+            deleted_bytes: 削除したファイルの合計サイズ（バイト）
+            completed: 走査を最後まで完了したかどうか
+        """
+        self._report(
+            walker,
+            scanned,
+            deleted,
+            deleted_bytes,
+            time.monotonic(),
+            finished=True,
+            completed=completed,
+        )
+
+
+def _format_seconds(seconds: float) -> str:
+    minutes, sec = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{sec:02d}"
+
+
+class TTYProgressBar:
+    """
+    ProgressReport を端末に1行のプログレスバーとして表示するコールバック
+
+    出力先が端末でない場合は、上書きせずに1報告につき1行を出力します。
+
+    Args:
+        stream: 出力先 (デフォルト: sys.stderr)
+        width: バーの幅（文字数）
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, width: int = 30) -> None:
+        self.stream = stream if stream is not None else sys.stderr
+        self.width = width
+        self.is_tty = self.stream.isatty()
+
+    def __call__(self, report: ProgressReport) -> None:
+        if report.fraction is not None:
+            filled = int(report.fraction * self.width)
+            bar = "#" * filled + "-" * (self.width - filled)
+            head = f"[{bar}] {report.fraction * 100:5.1f}%"
+        else:
+            head = f"[{'?' * self.width}]"
+        eta = f" ETA {_format_seconds(report.eta)}" if report.eta is not None else ""
+        line = (
+            f"{head} 走査 {report.scanned} 削除 {report.deleted} "
+            f"({report.deleted_bytes / 1024**2:.1f}MiB) "
+            f"{report.rate:.0f}件/秒{eta}"
+        )
+        if self.is_tty:
+            end = "\n" if report.finished else ""
+            self.stream.write(f"\r\x1b[K{line}{end}")
+        else:
+            self.stream.write(f"{line}\n")
+        self.stream.flush()
@@ -0,0 +1,71 @@
+"""
+削除処理の結果を表すクラスを提供するモジュール
+"""
+
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from .errors import ErrorSummary
+
+
+class RemovalResult(int):
+    """
+    削除処理の結果
+
+    int のサブクラスで、値は削除されたファイルの数です。従来どおり削除数として
+    比較・演算でき、追加の情報を属性として参照できます。
+
+    Attributes:
+        deleted_bytes: 削除したファイルの合計サイズ（バイト）。ハードリンクはリンクごとに数える
+        reclaimed_bytes: 削除によって実際に解放されたディスク容量（バイト）。
+            st_blocks から算出し、他のリンクが残っている inode は含めない
+        kept_links: すべてのリンクが期限切れではないため削除を保留したハードリンクの数
+        skipped: 削除の直前の確認で、判定した後に書き換えられていた、他のプロセスが
+            ロックしていた、またはすでに存在しなかったため削除しなかったファイルの数。
+            ErrorPolicy を指定した場合は、削除の時点で存在しなかった（ENOENT）ファイルも含む
+        completed: 走査を最後まで完了した場合はTrue、上限に達して途中で停止した場合はFalse
+        stop_reason: 停止した理由（"max_duration", "max_deletions", "max_bytes"）。
+            完了した場合はNone
+        resume_token: 途中で停止した場合に、続きから再開するためのトークン。
+            完了した場合はNone
+        errors: errors 引数に ErrorPolicy を指定した場合のエラーの集計。
+            指定しなかった場合はNone
+    """
+
+    deleted_bytes: int
+    reclaimed_bytes: int
+    kept_links: int
+    skipped: int
+    completed: bool
+    stop_reason: Optional[str]
+    resume_token: Optional[str]
+    errors: Optional["ErrorSummary"]
+
+    def __new__(
+        cls,
+        deleted_count: int,
+        deleted_bytes: int = 0,
+        stop_reason: Optional[str] = None,
+        resume_token: Optional[str] = None,
+        reclaimed_bytes: int = 0,
+        kept_links: int = 0,
+        errors: Optional["ErrorSummary"] = None,
+        skipped: int = 0,
+    ) -> "RemovalResult":
+        result = super().__new__(cls, deleted_count)
+        result.deleted_bytes = deleted_bytes
+        result.reclaimed_bytes = reclaimed_bytes
+        result.kept_links = kept_links
+        result.skipped = skipped
+        result.completed = stop_reason is None
+        result.stop_reason = stop_reason
+        result.resume_token = resume_token
+        result.errors = errors
+        return result
+
+    def __repr__(self) -> str:
+        return (
+            f"RemovalResult({int(self)}, deleted_bytes={self.deleted_bytes}, "
+            f"reclaimed_bytes={self.reclaimed_bytes}, "
+            f"stop_reason={self.stop_reason!r})"
+        )
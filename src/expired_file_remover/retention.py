@@ -0,0 +1,182 @@
+"""
+グループごとに新しいファイルを指定した数だけ残して削除する機能を提供するモジュール
+"""
+
+import heapq
+import os
+from datetime import datetime, tzinfo
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from .bulk import _stem
+from .core import (
+    _acquire_root_lock,
+    _count_skipped,
+    _DirectoryWalker,
+    _FilenameDateParser,
+    _perform,
+    _report_error,
+    _start_guard,
+)
+from .result import RemovalResult
+from .store import _suffix
+
+if TYPE_CHECKING:
+    from .errors import ErrorPolicy
+
+# ヒープの要素: (日付または更新日時, パス, サイズ, 走査時の (st_ino, st_mtime_ns, st_size))
+_HeapItem = Tuple[Union[datetime, float], str, int, Optional[Tuple[int, int, int]]]
+
+
+def remove_all_but_newest(
+    dir_path: Union[str, Path],
+    keep: int,
+    date_format: Optional[Union[str, List[str]]] = None,
+    group_by: Optional[Callable[[Path], Optional[Hashable]]] = None,
+    recursive: bool = False,
+    file_filter: Optional[List[str]] = None,
+    tz: Optional[tzinfo] = None,
+    errors: Optional["ErrorPolicy"] = None,
+    recheck: bool = False,
+    lock_probe: bool = False,
+    root_lock: Union[bool, str, Path] = False,
+) -> RemovalResult:
+    """
+    ファイルをグループに分け、グループごとに新しいものから keep 個を残して削除します
+
+    グループごとに大きさ keep のヒープ（最も古いものが先頭）を保持し、走査しながら
+    keep 個より古いことが確定したファイルをその場で削除します。すべてのファイルの
+    一覧を作成して並べ替えることはなく、メモリ使用量はグループ数 × keep に比例します。
+
+    date_format を指定した場合はファイル名の日付で新しさを判定し、既定のグループは
+    ディレクトリと、ファイル名の日付より前の部分（例: "db1_20240101.dump" なら "db1_"）の
+    組になります。日付を含まないファイルは削除しません。date_format を指定しない場合は
+    更新日時で判定し、既定のグループはディレクトリです。
+
+    Args:
+        dir_path: 削除対象ディレクトリのパス
+        keep: グループごとに残すファイルの数（1以上）
+        date_format: ファイル名の日付フォーマットまたはそのリスト。Noneの場合は更新日時で判定する
+        group_by: ファイルのパスからグループのキーを返す関数。Noneを返したファイルは
+            削除しない。指定しない場合は上記の既定のグループを使用する
+        recursive: サブディレクトリも対象とするかどうか (デフォルト: False)
+        file_filter: 対象とするファイル拡張子のリスト (例: ['.dump', '.gz'])
+        tz: ファイル名の日付のタイムゾーン (デフォルト: None、ローカル時刻)
+        errors: ファイルごとのエラーの扱い。指定した場合はエラーを出力せずに集計して
+            結果の errors に設定する (デフォルト: None、エラーごとに出力する)
+        recheck: 更新日時で判定する場合に、unlink の直前にファイルを stat し直し、
+            走査時から (st_ino, st_mtime_ns, st_size) が変わっていれば削除しない。
+            ヒープから押し出されるまでに時間がかかるファイルが書き換えられた場合に有効
+            (デフォルト: False)
+        lock_probe: 他のプロセスが flock でロックしているファイルを削除しない
+            (デフォルト: False)
+        root_lock: True の場合はルートのディレクトリを、パスの場合はそのファイルを
+            flock でロックし、同じツリーを他のクリーンアップと同時に処理しない
+            (デフォルト: False)
+
+    Returns:
+        RemovalResult: 削除されたファイルの数（int互換）。ファイル名の日付で判定する
+            場合は stat を行わないため deleted_bytes は 0 になる。recheck / lock_probe で
+            削除しなかったファイルの数は skipped に設定される
+
+    Raises:
+        FileNotFoundError: 指定されたディレクトリが存在しない場合
+        NotADirectoryError: 指定されたパスがディレクトリではない場合
+        ValueError: keep が1未満の場合、または無効な日付フォーマットが指定された場合
+        ErrorLimitExceeded: errors の on_error が "abort" または "threshold" で、
+            許容するエラー数を超えた場合
+        RootLockedError: root_lock を指定し、他のクリーンアップがロックを保持している場合
+    """
+    path = Path(dir_path) if isinstance(dir_path, str) else dir_path
+
+    if not path.exists():
+        raise FileNotFoundError(f"ディレクトリが存在しません: {path}")
+
+    if not path.is_dir():
+        raise NotADirectoryError(f"指定されたパスはディレクトリではありません: {path}")
+
+    if keep < 1:
+        raise ValueError("keepは1以上の整数である必要があります")
+
+    formats = [date_format] if isinstance(date_format, str) else date_format or []
+    parsers = [_FilenameDateParser(fmt, tz) for fmt in formats]
+
+    heaps: Dict[Hashable, List[_HeapItem]] = {}
+    deleted_count = 0
+    deleted_bytes = 0
+    summary = errors.begin() if errors is not None else None
+    lock = _acquire_root_lock(path, root_lock)
+    guard = _start_guard(recheck, lock_probe)
+    walker = _DirectoryWalker(path, recursive)
+    walker.errors = summary
+    try:
+        for directory, entry in walker.entries():
+            if file_filter is not None:
+                suffix = _suffix(entry.name)
+                if not suffix or suffix not in file_filter:
+                    continue
+
+            key: Optional[Hashable]
+            if parsers:
+                stem = _stem(entry.name)
+                located = None
+                for parser in parsers:
+                    located = parser.locate(stem)
+                    if located is not None:
+                        break
+                if located is None:
+                    continue
+                item: _HeapItem = (located[0], entry.path, 0, None)
+                key = (directory, stem[: located[1]])
+            else:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    # 走査中に削除されたファイルや壊れたシンボリックリンクは対象外とする
+                    continue
+                item = (
+                    st.st_mtime,
+                    entry.path,
+                    st.st_size,
+                    (st.st_ino, st.st_mtime_ns, st.st_size),
+                )
+                key = directory
+            if group_by is not None:
+                key = group_by(Path(entry.path))
+                if key is None:
+                    continue
+
+            heap = heaps.setdefault(key, [])
+            if len(heap) < keep:
+                heapq.heappush(heap, item)
+                continue
+            # ヒープの先頭より新しければ入れ替え、押し出されたファイルを削除する
+            victim = heapq.heapreplace(heap, item) if item > heap[0] else item
+
+            try:
+                if guard is not None and not guard.allows_path(
+                    Path(victim[1]), victim[3]
+                ):
+                    continue
+                if summary is None:
+                    os.unlink(victim[1])
+                else:
+                    _perform(
+                        "unlink", Path(victim[1]), os.unlink, victim[1], errors=summary
+                    )
+                deleted_count += 1
+                deleted_bytes += victim[2]
+            except OSError as e:
+                _report_error(summary, Path(victim[1]), e)
+    finally:
+        if guard is not None:
+            guard.close()
+        if lock is not None:
+            lock.release()
+
+    return RemovalResult(
+        deleted_count,
+        deleted_bytes,
+        errors=summary,
+        skipped=_count_skipped(guard, summary),
+    )
@@ -0,0 +1,423 @@
+"""
+大量のファイルの走査結果を少ないメモリで保持する機能を提供するモジュール
+
+ファイルごとに Path オブジェクトを保持すると1件あたり数百バイトを消費するため、
+数千万件のファイルを扱うとメモリが不足します。CandidateStore はディレクトリを
+テーブルに登録して番号で参照し、更新日時・サイズ・ファイル名を配列とバイト列に
+詰めて保持するため、1件あたり数十バイトで済みます。
+"""
+
+import os
+import stat
+from array import array
+from datetime import datetime, timedelta, tzinfo
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Union
+
+from .bulk import _load_numpy
+from .core import (
+    _acquire_root_lock,
+    _count_skipped,
+    _DirectoryWalker,
+    _perform,
+    _report_error,
+    _resolve_cutoff_timestamp,
+)
+from .result import RemovalResult
+
+if TYPE_CHECKING:
+    from .errors import ErrorPolicy
+
+# 並べ替えに使用できるキー
+SORT_KEYS = ("mtime", "size", "path")
+
+
+def _suffix(name: str) -> str:
+    """pathlib.PurePath.suffix と同じ規則でファイル名の拡張子を返します"""
+    i = name.rfind(".")
+    if 0 < i < len(name) - 1:
+        return name[i:]
+    return ""
+
+
+class CandidateRecord:
+    """
+    CandidateStore の1件を参照するビュー
+
+    値はストアの配列から都度読み出すため、ビュー自体はストアと番号しか保持しません。
+
+    Args:
+        store: 参照先のストア
+        index: ストア内の番号
+    """
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "CandidateStore", index: int) -> None:
+        self._store = store
+        self._index = index
+
+    @property
+    def index(self) -> int:
+        """ストア内の番号"""
+        return self._index
+
+    @property
+    def directory(self) -> str:
+        """ファイルがあるディレクトリのパス"""
+        return self._store._dirs[self._store._dir_ids[self._index]]
+
+    @property
+    def name(self) -> str:
+        """ファイル名"""
+        return self._store._name(self._index)
+
+    @property
+    def path(self) -> Path:
+        """ファイルのパス"""
+        return Path(self.directory, self.name)
+
+    @property
+    def mtime(self) -> float:
+        """ファイルの更新日時（エポック秒）"""
+        return self._store._mtimes[self._index]
+
+    @property
+    def size(self) -> int:
+        """ファイルサイズ（バイト）"""
+        return self._store._sizes[self._index]
+
+    @property
+    def ino(self) -> int:
+        """走査時の inode 番号（記録していない場合は0）"""
+        return self._store._inodes[self._index]
+
+    @property
+    def mtime_ns(self) -> int:
+        """走査時の更新日時（エポックからのナノ秒）"""
+        return self._store._mtime_ns[self._index]
+
+    def __repr__(self) -> str:
+        return f"CandidateRecord({self.path!s}, mtime={self.mtime}, size={self.size})"
+
+
+class CandidateStore:
+    """
+    走査したファイルのディレクトリ・名前・更新日時・サイズを詰めて保持するストア
+
+    ディレクトリのパスは1回だけ登録して番号で参照し、更新日時は array('d')、
+    サイズは array('q')、削除の直前の確認に使用する inode 番号とナノ秒の更新日時は
+    array('Q') と array('q')、ファイル名は UTF-8（surrogateescape）でエンコードして
+    1つのバイト列に連結して保持します。ファイルごとの Python オブジェクトは作らず、
+    参照するときに CandidateRecord のビューを生成します。
+    """
+
+    def __init__(self) -> None:
+        self._dirs: List[str] = []
+        self._dir_index: Dict[str, int] = {}
+        self._dir_ids = array("I")
+        self._mtimes = array("d")
+        self._sizes = array("q")
+        self._inodes = array("Q")
+        self._mtime_ns = array("q")
+        # i 番目のファイル名は _names[_name_offsets[i]:_name_offsets[i + 1]]
+        self._name_offsets = array("Q", [0])
+        self._names = bytearray()
+
+    def __len__(self) -> int:
+        return len(self._mtimes)
+
+    def __getitem__(self, index: int) -> CandidateRecord:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("CandidateStore index out of range")
+        return CandidateRecord(self, index)
+
+    def __iter__(self) -> Iterator[CandidateRecord]:
+        for index in range(len(self)):
+            yield CandidateRecord(self, index)
+
+    def _name(self, index: int) -> str:
+        start = self._name_offsets[index]
+        end = self._name_offsets[index + 1]
+        return os.fsdecode(bytes(self._names[start:end]))
+
+    def _intern_dir(self, directory: str) -> int:
+        dir_id = self._dir_index.get(directory)
+        if dir_id is None:
+            dir_id = self._dir_index[directory] = len(self._dirs)
+            self._dirs.append(directory)
+        return dir_id
+
+    def append(
+        self,
+        directory: Union[str, Path],
+        name: str,
+        mtime: float,
+        size: int,
+        ino: int = 0,
+        mtime_ns: int = 0,
+    ) -> None:
+        """
+        ファイルを1件追加します
+
+        Args:
+            directory: ファイルがあるディレクトリのパス
+            name: ファイル名
+            mtime: 更新日時（エポック秒）
+            size: ファイルサイズ（バイト）
+            ino: inode 番号。0の場合は remove_candidates で削除の直前の確認を行わない
+            mtime_ns: 更新日時（エポックからのナノ秒）
+        """
+        self._dir_ids.append(self._intern_dir(os.fspath(directory)))
+        self._mtimes.append(mtime)
+        self._sizes.append(size)
+        self._inodes.append(ino)
+        self._mtime_ns.append(mtime_ns)
+        self._names += os.fsencode(name)
+        self._name_offsets.append(len(self._names))
+
+    @property
+    def directory_count(self) -> int:
+        """登録されているディレクトリの数"""
+        return len(self._dirs)
+
+    @property
+    def total_size(self) -> int:
+        """保持しているファイルの合計サイズ（バイト）"""
+        return sum(self._sizes)
+
+    @property
+    def nbytes(self) -> int:
+        """配列とバイト列が使用しているおおよそのメモリ量（バイト）"""
+        return (
+            self._dir_ids.itemsize * len(self._dir_ids)
+            + self._mtimes.itemsize * len(self._mtimes)
+            + self._sizes.itemsize * len(self._sizes)
+            + self._inodes.itemsize * len(self._inodes)
+            + self._mtime_ns.itemsize * len(self._mtime_ns)
+            + self._name_offsets.itemsize * len(self._name_offsets)
+            + len(self._names)
+            + sum(len(d) for d in self._dirs)
+        )
+
+    def sorted_indices(self, key: str = "mtime", reverse: bool = False) -> array:
+        """
+        指定したキーで並べ替えた番号の配列を返します
+
+        NumPy がインストールされている場合は配列をコピーせずに argsort で並べ替えます。
+        インストールされていない場合は番号のリストを一時的に作成して並べ替えます。
+
+        Args:
+            key: 並べ替えのキー（"mtime", "size", "path"）
+            reverse: 降順に並べ替えるかどうか
+
+        Returns:
+            array: 並べ替えた番号の配列（array('q')）
+
+        Raises:
+            ValueError: 不正なキーが指定された場合
+        """
+        if key not in SORT_KEYS:
+            raise ValueError(
+                f"keyは {', '.join(SORT_KEYS)} のいずれかである必要があります: {key}"
+            )
+
+        if key != "path":
+            values = self._mtimes if key == "mtime" else self._sizes
+            np = _load_numpy()
+            if np is not None and len(values):
+                data = np.frombuffer(values, dtype=values.typecode)
+                # 同じ値の順序は sorted と同じく元の順序を保つ
+                order = np.argsort(-data if reverse else data, kind="stable")
+                return array("q", order.astype(np.int64).tobytes())
+            indices = sorted(range(len(self)), key=values.__getitem__, reverse=reverse)
+        else:
+            indices = sorted(
+                range(len(self)),
+                key=lambda i: (self._dirs[self._dir_ids[i]], self._name(i)),
+                reverse=reverse,
+            )
+        return array("q", indices)
+
+    def iter_sorted(
+        self, key: str = "mtime", reverse: bool = False
+    ) -> Iterator[CandidateRecord]:
+        """
+        指定したキーで並べ替えた順にビューを返します
+
+        Args:
+            key: 並べ替えのキー（"mtime", "size", "path"）
+            reverse: 降順に並べ替えるかどうか
+
+        Returns:
+            Iterator[CandidateRecord]: ビューのイテレータ
+        """
+        for index in self.sorted_indices(key, reverse):
+            yield CandidateRecord(self, index)
+
+    def paths(self) -> Iterator[Path]:
+        """保持しているファイルのパスを追加した順に返します"""
+        for index in range(len(self)):
+            yield Path(self._dirs[self._dir_ids[index]], self._name(index))
+
+
+def scan_expired_files(
+    dir_path: Union[str, Path],
+    deadline: Union[datetime, timedelta, int],
+    recursive: bool = False,
+    file_filter: Optional[List[str]] = None,
+    tz: Optional[tzinfo] = None,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+    skip_special_files: bool = False,
+) -> CandidateStore:
+    """
+    ファイルを削除せずに、更新日時が期限切れのファイルを CandidateStore に集めます
+
+    remove_expired_files と同じ条件で判定します。走査中もファイルごとの Path
+    オブジェクトは生成しません。
+
+    Args:
+        dir_path: 対象ディレクトリのパス
+        deadline: 期限を示すデータ（datetime、timedelta、または日数）
+        recursive: サブディレクトリも対象とするかどうか (デフォルト: False)
+        file_filter: 対象とするファイル拡張子のリスト (例: ['.txt', '.log'])
+        tz: naive な datetime の deadline を解釈するタイムゾーン (デフォルト: None、ローカル時刻)
+        follow_symlinks: シンボリックリンク先のディレクトリにも潜るかどうか (デフォルト: False)
+        one_file_system: ルートと異なるファイルシステムのディレクトリに潜らないかどうか
+            (デフォルト: False)
+        skip_special_files: ソケット・FIFO・デバイスファイルを対象外とするかどうか
+            (デフォルト: False)
+
+    Returns:
+        CandidateStore: 期限切れのファイルを保持するストア
+
+    Raises:
+        FileNotFoundError: 指定されたディレクトリが存在しない場合
+        NotADirectoryError: 指定されたパスがディレクトリではない場合
+    """
+    path = Path(dir_path) if isinstance(dir_path, str) else dir_path
+
+    if not path.exists():
+        raise FileNotFoundError(f"ディレクトリが存在しません: {path}")
+
+    if not path.is_dir():
+        raise NotADirectoryError(f"指定されたパスはディレクトリではありません: {path}")
+
+    cutoff = _resolve_cutoff_timestamp(deadline, tz)
+    store = CandidateStore()
+    walker = _DirectoryWalker(
+        path,
+        recursive,
+        follow_symlinks=follow_symlinks,
+        one_file_system=one_file_system,
+        skip_special_files=skip_special_files,
+    )
+    for directory, entry in walker.entries():
+        if file_filter is not None:
+            suffix = _suffix(entry.name)
+            if not suffix or suffix not in file_filter:
+                continue
+        try:
+            st = entry.stat()
+        except OSError:
+            # 走査中に削除されたファイルや壊れたシンボリックリンクは対象外とする
+            continue
+        if skip_special_files and not stat.S_ISREG(st.st_mode):
+            continue
+        if st.st_mtime < cutoff:
+            store.append(
+                directory,
+                entry.name,
+                st.st_mtime,
+                st.st_size,
+                st.st_ino,
+                st.st_mtime_ns,
+            )
+    return store
+
+
+def remove_candidates(
+    store: CandidateStore,
+    recheck: bool = True,
+    lock_probe: bool = False,
+    root: Optional[Union[str, Path]] = None,
+    root_lock: Union[bool, str, Path] = False,
+    errors: Optional["ErrorPolicy"] = None,
+) -> RemovalResult:
+    """
+    CandidateStore に集めたファイルを削除します
+
+    走査から削除までに時間が空く場合（scan_expired_files で集めた一覧を確認してから
+    削除する場合など）に、判定した後に書き換えられたファイルを削除しないよう、
+    unlink の直前にディレクトリの fd からの stat で (st_ino, st_mtime_ns, st_size) を
+    走査時の値と比較します（scan_expired_files と同じくシンボリックリンクはたどる）。
+    ファイルはストアに追加した順（ディレクトリごと）に処理し、
+    ディレクトリの fd を開き直さずに stat と unlink を行います。
+
+    Args:
+        store: 削除するファイルを保持するストア
+        recheck: 走査時から変わったファイルを削除しないかどうか (デフォルト: True)
+        lock_probe: 他のプロセスが flock でロックしているファイルを削除しないかどうか
+            (デフォルト: False)
+        root: root_lock でロックするルートのディレクトリ
+        root_lock: True の場合は root を、パスの場合はそのファイルを flock でロックし、
+            同じツリーを他のクリーンアップと同時に処理しない (デフォルト: False)
+        errors: ファイルごとのエラーの扱い (デフォルト: None、エラーごとに出力する)
+
+    Returns:
+        RemovalResult: 削除されたファイルの数（int互換）。走査時から変わった、
+            ロックされていた、またはすでに存在しなかったファイルの数は skipped に設定される
+
+    Raises:
+        ValueError: root を指定せずに root_lock=True を指定した場合
+        RootLockedError: 他のクリーンアップがロックを保持している場合
+        ErrorLimitExceeded: errors の on_error が "abort" または "threshold" で、
+            許容するエラー数を超えた場合
+    """
+    if root_lock is True and root is None:
+        raise ValueError("root_lock=True にはrootの指定が必要です")
+    from .locking import DeletionGuard
+
+    lock = _acquire_root_lock(Path(root or "."), root_lock)
+    summary = errors.begin() if errors is not None else None
+    guard = DeletionGuard(recheck, lock_probe)
+    deleted_count = 0
+    deleted_bytes = 0
+    try:
+        for record in store:
+            directory = record.directory
+            name = record.name
+            try:
+                # inode を記録していないファイルは比較しない
+                expected = (
+                    (record.ino, record.mtime_ns, record.size) if record.ino else None
+                )
+                if not guard.allows(directory, name, expected):
+                    continue
+                dir_fd = guard.dir_fd(directory)
+                if summary is None:
+                    os.unlink(name, dir_fd=dir_fd)
+                else:
+                    _perform(
+                        "unlink",
+                        record.path,
+                        lambda: os.unlink(name, dir_fd=dir_fd),
+                        errors=summary,
+                    )
+                deleted_count += 1
+                deleted_bytes += record.size
+            except OSError as e:
+                _report_error(summary, record.path, e)
+    finally:
+        guard.close()
+        if lock is not None:
+            lock.release()
+    return RemovalResult(
+        deleted_count,
+        deleted_bytes,
+        errors=summary,
+        skipped=_count_skipped(guard, summary),
+    )
@@ -0,0 +1,219 @@
+"""
+期限切れの判定に使用するファイルの時刻を選択する機能を提供するモジュール
+
+更新日時（mtime）のほか、最終アクセス日時（atime）、メタデータの変更日時（ctime）、
+作成日時（birthtime）と、それらの最大値・最小値を使用できます。作成日時は
+os.stat が st_birthtime を返す環境（macOS、BSD、Windows）ではその値を使い、
+Linux では statx(2) を ctypes で呼び出して取得します。いずれの場合も1ファイルに
+つき1回のシステムコールで stat 結果と時刻の両方を取得します。
+"""
+
+import ctypes
+import os
+import sys
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+# 選択できる時刻
+TIME_SOURCES = ("mtime", "atime", "ctime", "birthtime")
+
+# 複数の時刻を組み合わせる方法
+TIME_COMBINE = ("max", "min")
+
+_AT_FDCWD = -100
+_STATX_BASIC_STATS = 0x7FF
+_STATX_BTIME = 0x800
+
+
+class _StatxTimestamp(ctypes.Structure):
+    _fields_ = [
+        ("tv_sec", ctypes.c_int64),
+        ("tv_nsec", ctypes.c_uint32),
+        ("reserved", ctypes.c_int32),
+    ]
+
+
+class _Statx(ctypes.Structure):
+    """linux/stat.h の struct statx"""
+
+    _fields_ = [
+        ("stx_mask", ctypes.c_uint32),
+        ("stx_blksize", ctypes.c_uint32),
+        ("stx_attributes", ctypes.c_uint64),
+        ("stx_nlink", ctypes.c_uint32),
+        ("stx_uid", ctypes.c_uint32),
+        ("stx_gid", ctypes.c_uint32),
+        ("stx_mode", ctypes.c_uint16),
+        ("spare0", ctypes.c_uint16),
+        ("stx_ino", ctypes.c_uint64),
+        ("stx_size", ctypes.c_uint64),
+        ("stx_blocks", ctypes.c_uint64),
+        ("stx_attributes_mask", ctypes.c_uint64),
+        ("stx_atime", _StatxTimestamp),
+        ("stx_btime", _StatxTimestamp),
+        ("stx_ctime", _StatxTimestamp),
+        ("stx_mtime", _StatxTimestamp),
+        ("stx_rdev_major", ctypes.c_uint32),
+        ("stx_rdev_minor", ctypes.c_uint32),
+        ("stx_dev_major", ctypes.c_uint32),
+        ("stx_dev_minor", ctypes.c_uint32),
+        ("spare2", ctypes.c_uint64 * 14),
+    ]
+
+
+def _load_statx() -> Any:
+    """libc の statx 関数を返します。利用できない場合はNone"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        func = libc.statx
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [
+        ctypes.c_int,
+        ctypes.c_char_p,
+        ctypes.c_int,
+        ctypes.c_uint,
+        ctypes.POINTER(_Statx),
+    ]
+    func.restype = ctypes.c_int
+    return func
+
+
+_statx = _load_statx()
+
+
+def _seconds(ts: _StatxTimestamp) -> float:
+    return float(ts.tv_sec + ts.tv_nsec / 1e9)
+
+
+def _nanoseconds(ts: _StatxTimestamp) -> int:
+    return int(ts.tv_sec * 1_000_000_000 + ts.tv_nsec)
+
+
+def statx(
+    path: Union[str, Path, "os.PathLike[str]"],
+) -> Tuple[os.stat_result, Optional[float]]:
+    """
+    statx(2) でファイルの stat 結果と作成日時を1回のシステムコールで取得します
+
+    Args:
+        path: 対象ファイルのパス（シンボリックリンクは辿る）
+
+    Returns:
+        Tuple[os.stat_result, Optional[float]]: stat 結果と作成日時（エポック秒）。
+            ファイルシステムが作成日時を記録していない場合、作成日時はNone
+
+    Raises:
+        OSError: statx が利用できない、またはファイルの情報を取得できない場合
+    """
+    if _statx is None:
+        raise OSError("statx はこの環境では利用できません")
+    buf = _Statx()
+    if _statx(_AT_FDCWD, os.fsencode(path), 0, _STATX_BASIC_STATS | _STATX_BTIME, buf):
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno), os.fspath(path))
+
+    st = os.stat_result(
+        (
+            buf.stx_mode,
+            buf.stx_ino,
+            os.makedev(buf.stx_dev_major, buf.stx_dev_minor),
+            buf.stx_nlink,
+            buf.stx_uid,
+            buf.stx_gid,
+            buf.stx_size,
+            buf.stx_atime.tv_sec,
+            buf.stx_mtime.tv_sec,
+            buf.stx_ctime.tv_sec,
+        ),
+        {
+            "st_atime": _seconds(buf.stx_atime),
+            "st_mtime": _seconds(buf.stx_mtime),
+            "st_ctime": _seconds(buf.stx_ctime),
+            "st_atime_ns": _nanoseconds(buf.stx_atime),
+            "st_mtime_ns": _nanoseconds(buf.stx_mtime),
+            "st_ctime_ns": _nanoseconds(buf.stx_ctime),
+            "st_blksize": buf.stx_blksize,
+            "st_blocks": buf.stx_blocks,
+            "st_rdev": os.makedev(buf.stx_rdev_major, buf.stx_rdev_minor),
+        },
+    )
+    birthtime = _seconds(buf.stx_btime) if buf.stx_mask & _STATX_BTIME else None
+    return st, birthtime
+
+
+class TimeSource:
+    """
+    期限切れの判定に使用する時刻を stat 結果から取り出します
+
+    Args:
+        source: 使用する時刻（"mtime", "atime", "ctime", "birthtime"）またはそのシーケンス
+        combine: 複数の時刻を指定した場合の組み合わせ方。"max" は最も新しい時刻、
+            "min" は最も古い時刻を使用する
+
+    Raises:
+        ValueError: 不正な時刻または組み合わせ方が指定された場合
+    """
+
+    def __init__(
+        self, source: Union[str, Sequence[str]] = "mtime", combine: str = "max"
+    ) -> None:
+        sources = (source,) if isinstance(source, str) else tuple(source)
+        if not sources or any(s not in TIME_SOURCES for s in sources):
+            raise ValueError(
+                f"time_sourceは {', '.join(TIME_SOURCES)} のいずれかである必要があります: "
+                f"{source}"
+            )
+        if combine not in TIME_COMBINE:
+            raise ValueError(
+                f"time_combineは'max'または'min'である必要があります: {combine}"
+            )
+        self.sources = sources
+        self.combine = combine
+        self.needs_birthtime = "birthtime" in sources
+        self._attrs = [f"st_{s}" for s in sources if s != "birthtime"]
+
+    def stat(
+        self, path: Union[Path, "os.DirEntry[str]"]
+    ) -> Tuple[os.stat_result, Optional[float]]:
+        """
+        1回のシステムコールで stat 結果と判定に使用する時刻を取得します
+
+        Args:
+            path: 対象ファイルのパスまたはディレクトリエントリ（シンボリックリンクは辿る）
+
+        Returns:
+            Tuple[os.stat_result, Optional[float]]: stat 結果と時刻（エポック秒）。
+                作成日時を取得できず、他に時刻がない場合、時刻はNone
+        """
+        if self.needs_birthtime and _statx is not None:
+            st, birthtime = statx(path)
+        else:
+            st = path.stat()
+            birthtime = getattr(st, "st_birthtime", None)
+        return st, self.select(st, birthtime)
+
+    def select(
+        self, st: os.stat_result, birthtime: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        stat 結果から判定に使用する時刻を取り出します
+
+        Args:
+            st: ファイルの stat 結果
+            birthtime: 作成日時（エポック秒）。Noneの場合は st_birthtime を参照する
+
+        Returns:
+            Optional[float]: 時刻（エポック秒）。取得できる時刻がない場合はNone
+        """
+        values: List[float] = [getattr(st, attr) for attr in self._attrs]
+        if self.needs_birthtime:
+            if birthtime is None:
+                birthtime = getattr(st, "st_birthtime", None)
+            if birthtime is not None:
+                values.append(birthtime)
+        if not values:
+            return None
+        return max(values) if self.combine == "max" else min(values)
@@ -0,0 +1,100 @@
+"""
+ディレクトリごとの最新ファイルの更新日時（ウォーターマーク）を記録する機能を提供するモジュール
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# ウォーターマークファイルのフォーマットバージョン
+WATERMARK_VERSION = 1
+
+
+class WatermarkStore:
+    """
+    ディレクトリごとに、前回の走査で見つかった最も新しいファイルの更新日時を保持します
+
+    ファイルが作成後に変更されない（write-once の）アーカイブでは、ディレクトリ自体の
+    更新日時と前回のウォーターマークの両方が基準日時より前であれば、そのディレクトリの
+    ファイルはすべて期限切れであると判断できます。
+
+    ウォーターマークは対象とする拡張子の組み合わせに依存するため、異なる file_filter で
+    使用すると（bind の呼び出し時に）内容を破棄します。
+
+    Args:
+        path: ウォーターマークを保存するファイルのパス。ファイルがあれば読み込む
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._filter: Optional[List[str]] = None
+        self._entries: Dict[str, float] = {}
+        self._load(self.path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self, path: Path) -> None:
+        try:
+            with open(path, encoding="utf-8", errors="surrogateescape") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if not isinstance(state, dict) or state.get("version") != WATERMARK_VERSION:
+            return
+        self._filter = state.get("file_filter")
+        self._entries = {
+            directory: float(newest)
+            for directory, newest in state.get("entries", {}).items()
+        }
+
+    def bind(self, file_filter: Optional[List[str]]) -> None:
+        """
+        対象とする拡張子の組み合わせを設定します
+
+        以前と異なる組み合わせが指定された場合はウォーターマークを破棄します。
+
+        Args:
+            file_filter: 対象とするファイル拡張子のリスト。Noneの場合はすべてのファイル
+        """
+        file_filter = sorted(file_filter) if file_filter is not None else None
+        if self._filter != file_filter:
+            self._entries.clear()
+        self._filter = file_filter
+
+    def get(self, directory: Path) -> Optional[float]:
+        """
+        ディレクトリのウォーターマークを返します
+
+        Args:
+            directory: 対象ディレクトリのパス
+
+        Returns:
+            Optional[float]: 最も新しいファイルの更新日時（エポック秒）。記録がない場合はNone
+        """
+        return self._entries.get(os.path.abspath(directory))
+
+    def update(self, directory: Path, newest: float) -> None:
+        """
+        ディレクトリのウォーターマークを記録します
+
+        Args:
+            directory: 最後まで走査したディレクトリのパス
+            newest: ディレクトリ内で最も新しいファイルの更新日時（エポック秒）
+        """
+        self._entries[os.path.abspath(directory)] = newest
+
+    def save(self) -> None:
+        """ウォーターマークをファイルにアトミックに書き込みます"""
+        state = {
+            "version": WATERMARK_VERSION,
+            "file_filter": self._filter,
+            "entries": self._entries,
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8", errors="surrogateescape") as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
@@ -1,11 +1,49 @@
 """
 pytestの設定ファイル
-テスト実行時のパス設定などを行う
+テスト実行時のパス設定や、テストで共通して使用するヘルパー・フィクスチャを定義する
 """
 
+import os
+import shutil
 import sys
+import tempfile
+import time
 from pathlib import Path
 
+import pytest
+
 # srcディレクトリをパスに追加
 # これにより、テストコードから直接 'expired_file_remover' をインポートできる
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+DAY = 24 * 60 * 60
+
+
+def backdate(path, days=30):
+    """パスのアクセス日時と更新日時を days 日前にする（シンボリックリンクはたどらない）"""
+    stamp = time.time() - days * DAY
+    os.utime(path, (stamp, stamp), follow_symlinks=False)
+
+
+def make_old_file(path, days=30, data=b""):
+    """data を書き込んだファイルを作成し、更新日時を days 日前にする"""
+    path.write_bytes(data)
+    backdate(path, days)
+    return path
+
+
+@pytest.fixture
+def other_filesystem(tmp_path):
+    """tmp_path と異なるファイルシステム上の一時ディレクトリ"""
+    tmp_dev = os.stat(tmp_path).st_dev
+    for candidate in ("/dev/shm", "/run/user", tempfile.gettempdir()):
+        if (
+            os.path.isdir(candidate)
+            and os.access(candidate, os.W_OK)
+            and os.stat(candidate).st_dev != tmp_dev
+        ):
+            directory = tempfile.mkdtemp(dir=candidate)
+            yield directory
+            shutil.rmtree(directory, ignore_errors=True)
+            return
+    pytest.skip("異なるファイルシステムの書き込み可能なディレクトリがない")
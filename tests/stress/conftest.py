@@ -0,0 +1,38 @@
+"""
+負荷・障害注入テストの設定
+
+生成するファイル数は環境変数 EXPIRED_FILE_REMOVER_STRESS_FILES で指定します
+（既定は3000件）。指定しない通常のテストの実行では、削除数の正確さだけを確認し、
+処理速度・RSS の下限は確認しません。ツリーは書き込み可能であれば tmpfs（/dev/shm）に
+生成します。
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from .harness import generate_tree, scale
+
+TMPFS = "/dev/shm"
+
+
+@pytest.fixture
+def stress_root(tmp_path):
+    """ツリーを生成するディレクトリ。tmpfs が使えない場合は tmp_path を使用する"""
+    if os.path.isdir(TMPFS) and os.access(TMPFS, os.W_OK):
+        directory = tempfile.mkdtemp(prefix="expired-file-remover-", dir=TMPFS)
+        yield directory
+        shutil.rmtree(directory, ignore_errors=True)
+    else:
+        yield str(tmp_path)
+
+
+@pytest.fixture
+def tree(stress_root):
+    """期限切れと期限内のファイルを含む2階層のツリー"""
+    root = Path(stress_root, "tree")
+    root.mkdir()
+    return generate_tree(root, scale())
@@ -0,0 +1,363 @@
+"""
+負荷・障害注入テストのためのツリーの生成と障害の注入
+
+ファイル名は "<日付>_<o または n><通し番号>.log" で、"o" は期限切れ、"n" は期限内を
+表します。ファイル名の日付と更新日時をそれに合わせるため、更新日時による削除とファイル名の
+日付による削除のどちらでも、削除されるべきファイルの数が生成時に確定します。
+"""
+
+import errno
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from unittest.mock import patch
+
+# 生成するファイル数。既定は通常のテストで短時間に終わる規模
+SCALE_ENV = "EXPIRED_FILE_REMOVER_STRESS_FILES"
+DEFAULT_FILES = 3000
+# 削除の処理速度の下限（ファイル/秒）。共有の CI でも失敗しない控えめな既定値
+MIN_RATE_ENV = "EXPIRED_FILE_REMOVER_STRESS_MIN_RATE"
+DEFAULT_MIN_RATE = 2000.0
+# ファイル数によらない削除処理の RSS の増加の上限
+RSS_BUDGET_BYTES = 64 * 1024 * 1024
+
+OLD_DATE = "20000101"
+OLD_STAMP = 946684800.0  # 2000-01-01T00:00:00Z
+# 期限切れと判定する日数
+DEADLINE_DAYS = 30
+
+SRC = str(Path(__file__).resolve().parents[2] / "src")
+
+_real_unlink = os.unlink
+_real_scandir = os.scandir
+
+
+def scale() -> int:
+    """環境変数で指定された、生成するファイル数を返します"""
+    return int(os.environ.get(SCALE_ENV, DEFAULT_FILES))
+
+
+def opted_in() -> bool:
+    """
+    負荷テストとして実行されているかどうかを返します
+
+    ファイル数の環境変数が指定されている場合（make stress）だけ、処理速度・RSS の
+    下限の確認や、プロセス全体の設定を変えて競合を起こりやすくする確認を行います。
+    通常のテストの実行では、共有の CI の負荷で失敗しないよう正確さだけを確認します。
+    """
+    return SCALE_ENV in os.environ
+
+
+def min_rate() -> float:
+    """環境変数で指定された、処理速度の下限を返します"""
+    return float(os.environ.get(MIN_RATE_ENV, DEFAULT_MIN_RATE))
+
+
+def file_name(stamp: str, state: str, n: int) -> str:
+    """
+    ファイル名を返します。辞書順が日付順と一致するよう日付を先頭に置きます
+
+    Args:
+        stamp: ファイル名の日付（%Y%m%d）
+        state: "o"（期限切れ）または "n"（期限内）
+        n: 通し番号
+    """
+    return f"{stamp}_{state}{n:09d}.log"
+
+
+def file_number(path: Any) -> int:
+    """生成したファイルの名前から通し番号を返します（dir_fd からの相対パスにも対応）"""
+    return int(os.path.basename(os.fspath(path))[10:19])
+
+
+def is_expired_name(name: str) -> bool:
+    return name[9:10] == "o"
+
+
+@dataclass(frozen=True)
+class TreeSpec:
+    """
+    生成したツリー
+
+    Attributes:
+        root: ルートのディレクトリ
+        files: ファイル数
+        expired: 期限切れのファイル数
+        directories: ファイルを置いたディレクトリの数
+    """
+
+    root: Path
+    files: int
+    expired: int
+    directories: int
+
+    @property
+    def fresh(self) -> int:
+        return self.files - self.expired
+
+
+def generate_tree(
+    root: Path,
+    files: int,
+    files_per_dir: int = 256,
+    fanout: int = 64,
+    fresh_every: int = 4,
+) -> TreeSpec:
+    """
+    root/<上位>/<下位>/ の2階層のディレクトリにファイルを生成します
+
+    通し番号が fresh_every の倍数のファイルを期限内、それ以外を期限切れとし、
+    期限切れのファイルの更新日時は 2000-01-01 にします。
+
+    Args:
+        root: ルートのディレクトリ（作成済み）
+        files: ファイル数
+        files_per_dir: 1つのディレクトリに置くファイル数
+        fanout: 上位のディレクトリごとの下位のディレクトリの数
+        fresh_every: 期限内のファイルの間隔
+
+    Returns:
+        TreeSpec: 生成したツリー
+    """
+    today = date.today().strftime("%Y%m%d")
+    flags = os.O_CREAT | os.O_WRONLY | getattr(os, "O_CLOEXEC", 0)
+    expired = 0
+    directories = 0
+    directory = root
+    for n in range(files):
+        if n % files_per_dir == 0:
+            leaf = n // files_per_dir
+            directory = root / f"{leaf // fanout:04d}" / f"{leaf % fanout:04d}"
+            directory.mkdir(parents=True)
+            directories += 1
+        if n % fresh_every == 0:
+            os.close(os.open(directory / file_name(today, "n", n), flags, 0o644))
+        else:
+            path = directory / file_name(OLD_DATE, "o", n)
+            os.close(os.open(path, flags, 0o644))
+            os.utime(path, (OLD_STAMP, OLD_STAMP))
+            expired += 1
+    return TreeSpec(root, files, expired, directories)
+
+
+def survivors(root: Path) -> Tuple[int, int]:
+    """
+    ツリーに残っているファイルを数えます
+
+    Returns:
+        Tuple[int, int]: (期限切れのファイルの数, 期限内のファイルの数)
+    """
+    expired = fresh = 0
+    for _, _, names in os.walk(root):
+        for name in names:
+            if is_expired_name(name):
+                expired += 1
+            else:
+                fresh += 1
+    return expired, fresh
+
+
+def expired_paths(root: Path, every: int = 1) -> List[str]:
+    """期限切れのファイルのパスを every 件ごとに返します"""
+    paths = []
+    for directory, _, names in os.walk(root):
+        for name in sorted(names):
+            if is_expired_name(name) and file_number(name) % every == 0:
+                paths.append(os.path.join(directory, name))
+    return paths
+
+
+class UnlinkFaults:
+    """
+    os.unlink を置き換えて障害を注入します
+
+    pathlib.Path.unlink や dir_fd を指定した unlink も os.unlink を経由するため、
+    すべての削除関数に同じ障害を注入できます。
+
+    Args:
+        code: 失敗させる errno。Noneの場合は失敗させない
+        every: 通し番号が every の倍数に1を足した値のファイルを失敗させる
+        delay: unlink ごとに待機する時間（秒）
+    """
+
+    def __init__(
+        self, code: Optional[int] = None, every: int = 7, delay: float = 0.0
+    ) -> None:
+        self.code = code
+        self.every = every
+        self.delay = delay
+        self.failed: set = set()
+        self.calls = 0
+
+    def targets(self, path: Any) -> bool:
+        return self.code is not None and file_number(path) % self.every == 1
+
+    def _unlink(self, path: Any, *args: Any, **kwargs: Any) -> None:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.code is not None and self.targets(path):
+            self.failed.add(os.path.basename(os.fspath(path)))
+            raise OSError(self.code, os.strerror(self.code), os.fspath(path))
+        _real_unlink(path, *args, **kwargs)
+
+    def expected_failures(self, root: Path) -> int:
+        """このツリーで失敗させる期限切れのファイルの数"""
+        return sum(1 for p in expired_paths(root) if self.targets(p))
+
+    def __enter__(self) -> "UnlinkFaults":
+        self._patch = patch("os.unlink", self._unlink)
+        self._patch.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._patch.stop()
+
+
+class ScandirFaults:
+    """
+    os.scandir を置き換え、after 回目以降の呼び出しを errno で失敗させます
+
+    ファイル記述子の枯渇（EMFILE）のように、走査の途中でディレクトリを開けなくなる
+    状況を再現します。
+
+    Args:
+        code: 失敗させる errno
+        after: 成功させる呼び出しの回数
+    """
+
+    def __init__(self, code: int = errno.EMFILE, after: int = 3) -> None:
+        self.code = code
+        self.after = after
+        self.calls = 0
+
+    def _scandir(self, path: Any = ".") -> Any:
+        self.calls += 1
+        if self.calls > self.after:
+            raise OSError(self.code, os.strerror(self.code), os.fspath(path))
+        return _real_scandir(path)
+
+    def __enter__(self) -> "ScandirFaults":
+        self._patch = patch("os.scandir", self._scandir)
+        self._patch.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._patch.stop()
+
+
+class ConcurrentMutator(threading.Thread):
+    """
+    削除処理と並行して期限切れのファイルを削除し、期限内のファイルを作成するスレッド
+
+    削除処理からは、走査した後に消えるファイル（ENOENT）と走査中に増えるファイルに見えます。
+    自身で削除できたファイルの数を deleted、作成したファイルを created に記録します。
+
+    Args:
+        victims: 削除する期限切れのファイルのパス
+        directories: 期限内のファイルを作成するディレクトリ
+    """
+
+    def __init__(self, victims: List[str], directories: List[str]) -> None:
+        super().__init__(daemon=True)
+        self.victims = victims
+        self.directories = directories
+        self.deleted = 0
+        self.created: List[str] = []
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        today = date.today().strftime("%Y%m%d")
+        for i, victim in enumerate(self.victims):
+            if self._stop_event.is_set():
+                break
+            try:
+                _real_unlink(victim)
+                self.deleted += 1
+            except FileNotFoundError:
+                pass
+            directory = self.directories[i % len(self.directories)]
+            path = os.path.join(directory, file_name(today, "n", 900_000_000 + i))
+            with open(path, "w"):
+                pass
+            self.created.append(path)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def iter_runs(
+    func: Callable[..., Any], *args: Any, **kwargs: Any
+) -> Iterator[Tuple[Any, float]]:
+    """
+    上限に達して停止した削除を resume_token で完了するまで繰り返します
+
+    Yields:
+        Tuple[RemovalResult, float]: 各回の結果と所要時間（秒）
+    """
+    token = None
+    while True:
+        start = time.perf_counter()
+        result = func(*args, resume_token=token, **kwargs)
+        yield result, time.perf_counter() - start
+        if result.completed:
+            return
+        token = result.resume_token
+
+
+_CHILD = """
+import json, resource, sys, time
+from expired_file_remover import core, store
+
+func = getattr({module}, {name!r})
+args = json.loads(sys.argv[1])
+kwargs = json.loads(sys.argv[2])
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+result = func(*args, **kwargs)
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+count = len(result) if isinstance(result, store.CandidateStore) else int(result)
+print(json.dumps({{"count": count, "seconds": elapsed,
+                  "rss_growth": (peak - baseline) * 1024}}))
+"""
+
+
+def run_isolated(
+    module: str, name: str, args: List[Any], kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    削除関数を子プロセスで実行し、件数・所要時間・RSS の増加（バイト）を返します
+
+    pytest 自身のメモリ使用量の影響を受けないよう、インポートした後の最大 RSS を
+    基準に増加量を測ります。
+
+    Args:
+        module: "core" または "store"
+        name: 関数名
+        args: 位置引数（JSON に変換できる値）
+        kwargs: キーワード引数（JSON に変換できる値）
+
+    Returns:
+        Dict[str, Any]: "count"（結果の件数）、"seconds"、"rss_growth"
+    """
+    env = dict(os.environ, PYTHONPATH=SRC)
+    env.pop("EXPIRED_FILE_REMOVER_PROFILE", None)
+    code = _CHILD.format(module=module, name=name)
+    completed = subprocess.run(
+        [sys.executable, "-c", code, json.dumps(args), json.dumps(kwargs)],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result: Dict[str, Any] = json.loads(completed.stdout.strip().splitlines()[-1])
+    return result
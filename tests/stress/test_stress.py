@@ -0,0 +1,200 @@
+"""
+大量のファイルと障害の注入による削除処理の負荷テスト
+
+削除数が正確であること、期限内のファイルを削除しないこと、RSS の増加が
+ファイル数によらず抑えられていること、処理速度が下限を下回らないことを確認します。
+RSS と処理速度の確認は、EXPIRED_FILE_REMOVER_STRESS_FILES を指定した場合
+（make stress）だけ行います。
+"""
+
+import errno
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from expired_file_remover.core import (
+    remove_expired_files,
+    remove_expired_files_by_filename_date,
+)
+from expired_file_remover.errors import ErrorPolicy
+from expired_file_remover.store import remove_candidates, scan_expired_files
+
+from .harness import (
+    DEADLINE_DAYS,
+    RSS_BUDGET_BYTES,
+    SCALE_ENV,
+    ConcurrentMutator,
+    ScandirFaults,
+    UnlinkFaults,
+    expired_paths,
+    generate_tree,
+    iter_runs,
+    min_rate,
+    opted_in,
+    run_isolated,
+    survivors,
+)
+
+ENGINES = {
+    "mtime": lambda root, **kw: remove_expired_files(
+        root, DEADLINE_DAYS, recursive=True, **kw
+    ),
+    "filename_date": lambda root, **kw: remove_expired_files_by_filename_date(
+        root, "%Y%m%d", DEADLINE_DAYS, recursive=True, **kw
+    ),
+    "bulk_parse": lambda root, **kw: remove_expired_files_by_filename_date(
+        root, "%Y%m%d", DEADLINE_DAYS, recursive=True, bulk_parse=True, **kw
+    ),
+    "sorted_names": lambda root, **kw: remove_expired_files_by_filename_date(
+        root, "%Y%m%d", DEADLINE_DAYS, recursive=True, sorted_names=True, **kw
+    ),
+}
+
+# 処理速度と RSS の下限は、負荷テストとして実行した場合だけ確認する
+stress_only = pytest.mark.skipif(
+    not opted_in(), reason=f"{SCALE_ENV} を指定した場合のみ実行する（make stress）"
+)
+
+
+class TestExactCounts:
+    @pytest.mark.parametrize("engine", list(ENGINES))
+    def test_all_expired_removed(self, tree, engine):
+        """期限切れのファイルだけをすべて削除し、削除数が一致する"""
+        result = ENGINES[engine](tree.root)
+
+        assert result == tree.expired
+        assert survivors(tree.root) == (0, tree.fresh)
+
+    @pytest.mark.parametrize("engine", ["mtime", "filename_date"])
+    def test_resume_after_budget(self, tree, engine):
+        """上限で停止して再開を繰り返しても、合計の削除数が一致する"""
+        limit = max(tree.expired // 3, 1)
+        runs = list(iter_runs(ENGINES[engine], tree.root, max_deletions=limit))
+
+        assert len(runs) > 1
+        assert all(result <= limit for result, _ in runs)
+        assert sum(result for result, _ in runs) == tree.expired
+        assert survivors(tree.root) == (0, tree.fresh)
+
+    def test_scan_then_remove(self, tree):
+        """scan_expired_files で集めたファイルを確認しながら削除する"""
+        store = scan_expired_files(tree.root, DEADLINE_DAYS, recursive=True)
+        result = remove_candidates(store)
+
+        assert len(store) == result == tree.expired
+        assert result.skipped == 0
+        assert survivors(tree.root) == (0, tree.fresh)
+
+
+class TestFaultInjection:
+    @pytest.mark.parametrize("engine", ["mtime", "filename_date", "sorted_names"])
+    def test_permission_errors(self, tree, engine, capsys):
+        """EACCES で削除できないファイルだけが残り、エラーの集計が一致する"""
+        with UnlinkFaults(errno.EACCES) as faults:
+            expected = faults.expected_failures(tree.root)
+            result = ENGINES[engine](tree.root, errors=ErrorPolicy())
+
+        assert expected > 0
+        assert result == tree.expired - expected
+        assert result.errors is not None
+        assert result.errors.by_errno == {"EACCES": expected}
+        assert len(faults.failed) == expected
+        assert survivors(tree.root) == (expected, tree.fresh)
+        assert capsys.readouterr().out == ""
+
+    @pytest.mark.parametrize("engine", ["mtime", "filename_date"])
+    def test_concurrent_writer_and_deleter(self, tree, engine):
+        """並行して削除・作成されるファイルがあっても二重に数えず、期限内のファイルを削除しない"""
+        victims = expired_paths(tree.root, every=3)
+        directories = sorted({os.path.dirname(p) for p in victims})
+        switch_interval = sys.getswitchinterval()
+        if opted_in():
+            # スレッドの切り替えを増やして競合を起こりやすくする（プロセス全体の設定のため
+            # 負荷テストとして実行した場合のみ）
+            sys.setswitchinterval(1e-5)
+        mutator = ConcurrentMutator(victims, directories)
+        try:
+            mutator.start()
+            result = ENGINES[engine](tree.root, errors=ErrorPolicy())
+        finally:
+            mutator.stop()
+            sys.setswitchinterval(switch_interval)
+
+        assert result + mutator.deleted == tree.expired
+        assert result.errors is not None
+        # 並行して削除されたファイルはエラーではなく skipped に数える
+        assert result.errors.total == 0
+        assert result.skipped == result.errors.vanished
+        assert all(os.path.exists(p) for p in mutator.created)
+        assert survivors(tree.root) == (0, tree.fresh + len(mutator.created))
+
+    @pytest.mark.parametrize("engine", ["mtime", "filename_date"])
+    def test_descriptor_exhaustion(self, tree, engine, stress_root):
+        """EMFILE で走査が中断されてもチェックポイントから再開して正確に完了する"""
+        checkpoint = Path(stress_root, "state.json")
+
+        with ScandirFaults(errno.EMFILE, after=4):
+            with pytest.raises(OSError) as info:
+                ENGINES[engine](tree.root, checkpoint=checkpoint)
+        assert info.value.errno == errno.EMFILE
+        assert checkpoint.exists()
+        remaining, fresh = survivors(tree.root)
+        assert fresh == tree.fresh
+
+        result = ENGINES[engine](tree.root, checkpoint=checkpoint)
+
+        assert result == remaining
+        assert survivors(tree.root) == (0, tree.fresh)
+        assert not checkpoint.exists()
+
+    def test_slow_unlink_respects_duration(self, stress_root):
+        """unlink が遅いファイルシステムでも max_duration で停止し、再開して完了する"""
+        root = Path(stress_root, "slow")
+        root.mkdir()
+        spec = generate_tree(root, 600, files_per_dir=64)
+        delay = 0.002
+        max_duration = 0.1
+
+        with UnlinkFaults(delay=delay):
+            runs = list(
+                iter_runs(ENGINES["mtime"], spec.root, max_duration=max_duration)
+            )
+
+        assert len(runs) > 1
+        assert sum(result for result, _ in runs) == spec.expired
+        # 上限の判定はファイルごとに行うため、超過は unlink 1回分と余裕に収まる
+        assert max(elapsed for _, elapsed in runs) < max_duration + delay + 0.5
+        assert survivors(spec.root) == (0, spec.fresh)
+
+
+@stress_only
+class TestResourceBounds:
+    @pytest.mark.parametrize(
+        "name, args",
+        [
+            ("remove_expired_files", [DEADLINE_DAYS]),
+            ("remove_expired_files_by_filename_date", ["%Y%m%d", DEADLINE_DAYS]),
+        ],
+    )
+    def test_rss_and_throughput(self, tree, name, args):
+        """RSS の増加がファイル数によらず上限内で、処理速度が下限を上回る"""
+        stats = run_isolated("core", name, [str(tree.root), *args], {"recursive": True})
+
+        assert stats["count"] == tree.expired
+        assert stats["rss_growth"] < RSS_BUDGET_BYTES
+        assert tree.files / stats["seconds"] >= min_rate()
+        assert survivors(tree.root) == (0, tree.fresh)
+
+    def test_candidate_store_memory(self, tree):
+        """CandidateStore の RSS の増加はファイル数に比例し、1件あたり数百バイト以内"""
+        stats = run_isolated(
+            "store",
+            "scan_expired_files",
+            [str(tree.root), DEADLINE_DAYS],
+            {"recursive": True},
+        )
+
+        assert stats["count"] == tree.expired
+        assert stats["rss_growth"] < RSS_BUDGET_BYTES + 256 * tree.expired
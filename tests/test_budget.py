@@ -0,0 +1,91 @@
+"""
+実行時間・削除数・削除バイト数の上限による停止と再開のテスト
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from expired_file_remover.core import (
+    _DirectoryWalker,
+    remove_expired_files,
+    remove_expired_files_by_filename_date,
+)
+from expired_file_remover.result import RemovalResult
+
+from .conftest import backdate
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """更新日時の異なる3つのサブディレクトリを持つツリー"""
+    for name, days in [("a", 10), ("b", 30), ("c", 20)]:
+        sub = tmp_path / name
+        sub.mkdir()
+        for i in range(3):
+            f = sub / f"{name}{i}_20200101.txt"
+            f.write_bytes(b"x" * 100)
+            backdate(f, 40)
+        backdate(sub, days)
+    return tmp_path
+
+
+class TestRemovalResult:
+    def test_int_compatible(self):
+        """RemovalResultは削除数としてintと同様に扱える"""
+        result = RemovalResult(3, deleted_bytes=300)
+        assert result == 3
+        assert result + 1 == 4
+        assert result.completed
+        assert result.resume_token is None
+
+
+class TestBudget:
+    def test_oldest_subtree_first(self, tree):
+        """上限を指定するとサブディレクトリは更新日時の古い順に処理される"""
+        walker = _DirectoryWalker(tree, True, oldest_first=True)
+        dirs = [p.parent.name for p in walker]
+        assert dirs == ["b"] * 3 + ["c"] * 3 + ["a"] * 3
+
+    def test_max_deletions_and_resume(self, tree):
+        """削除数の上限で停止し、resume_tokenで続きから再開できる"""
+        result = remove_expired_files(tree, 5, recursive=True, max_deletions=4)
+        assert result == 4
+        assert not result.completed
+        assert result.stop_reason == "max_deletions"
+        assert result.deleted_bytes == 400
+        # 最も古い b が先に処理されている
+        assert not any((tree / "b").iterdir())
+
+        result = remove_expired_files(
+            tree, 5, recursive=True, resume_token=result.resume_token
+        )
+        assert result == 5
+        assert result.completed
+        assert list(tree.rglob("*.txt")) == []
+
+    def test_max_bytes(self, tree):
+        """削除バイト数の上限で停止する"""
+        result = remove_expired_files_by_filename_date(
+            tree, "%Y%m%d", datetime(2025, 1, 1), recursive=True, max_bytes=250
+        )
+        assert result == 3
+        assert result.deleted_bytes == 300
+        assert result.stop_reason == "max_bytes"
+
+    def test_max_duration(self, tree):
+        """実行時間の上限で停止する"""
+        with patch("expired_file_remover.core.time.monotonic") as mock_time:
+            mock_time.side_effect = [0.0] + [100.0] * 10
+            result = remove_expired_files(
+                tree, 5, recursive=True, max_duration=timedelta(seconds=10)
+            )
+        assert result == 0
+        assert result.stop_reason == "max_duration"
+
+    def test_invalid_resume_token(self, tree):
+        """別の走査のトークンはValueError"""
+        result = remove_expired_files(tree, 5, recursive=True, max_deletions=1)
+        with pytest.raises(ValueError):
+            remove_expired_files(tree, 5, resume_token=result.resume_token)
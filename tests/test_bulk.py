@@ -0,0 +1,166 @@
+"""
+ファイル名一覧の一括日付解析のテスト
+"""
+
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from expired_file_remover.bulk import expired_mask
+from expired_file_remover.core import (
+    is_filename_date_expired,
+    remove_expired_files_by_filename_date,
+)
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+NAMES = [
+    "log_20240101.txt",
+    "log_20240229.txt",  # 閏日
+    "log_20230229.txt",  # 存在しない日付
+    "log_20241301.txt",  # 存在しない月
+    "log_20240100.txt",  # 0日
+    "log_20250101.txt",
+    "log_20240110.tar.gz",
+    ".20240101",
+    "20240101.",
+    "README",
+    "log_2024_01_01.txt",
+]
+
+
+def _expected(names, date_format, deadline):
+    return [is_filename_date_expired(name, date_format, deadline) for name in names]
+
+
+@pytest.fixture(params=[False, pytest.param(True, id="numpy")])
+def use_numpy(request):
+    if request.param and not HAS_NUMPY:
+        pytest.skip("NumPy がインストールされていません")
+    return request.param
+
+
+class TestExpiredMask:
+    @pytest.mark.parametrize(
+        "date_format",
+        ["%Y%m%d", "%Y_%m_%d", "%y%m%d", "%Y%m%d%H", "%m%d"],
+    )
+    def test_same_result_as_is_filename_date_expired(self, date_format, use_numpy):
+        """is_filename_date_expired を1件ずつ呼び出した場合と同じ結果になる"""
+        deadline = datetime(2024, 6, 1)
+        names = NAMES + ["app_240101.log", "app_991231.log", "x_2024010125.log"]
+        assert expired_mask(
+            names, date_format, deadline, use_numpy=use_numpy
+        ) == _expected(names, date_format, deadline)
+
+    def test_twelve_hour_clock(self, use_numpy):
+        """%I は strptime と同じく 12 を 0 時とし、範囲外の値は無効とする"""
+        names = ["a_2024010112.log", "a_2024010100.log", "a_2024010113.log"]
+        deadline = datetime(2024, 1, 1, 6)
+        mask = expired_mask(names, "%Y%m%d%I", deadline, use_numpy=use_numpy)
+        assert mask == [True, False, False]
+        assert mask == _expected(names, "%Y%m%d%I", deadline)
+
+    def test_cutoff_boundary(self, use_numpy):
+        """基準日時と同じ日付は期限切れにならない"""
+        names = ["a_20240531235959", "a_20240601000000"]
+        mask = expired_mask(
+            names, "%Y%m%d%H%M%S", datetime(2024, 6, 1), use_numpy=use_numpy
+        )
+        assert mask == [True, False]
+
+    def test_multiple_formats(self, use_numpy):
+        """いずれかのフォーマットで期限切れならTrueになる"""
+        names = ["a_20240101.log", "b_01-02-2024.log", "c_20250101.log"]
+        mask = expired_mask(
+            names, ["%Y%m%d", "%m-%d-%Y"], datetime(2024, 6, 1), use_numpy=use_numpy
+        )
+        assert mask == [True, True, False]
+
+    def test_other_directives_fall_back(self):
+        """その他の指定子を含むフォーマットは通常の解析にフォールバックする"""
+        names = ["a_20240101%j.log", "a_20240101.log"]
+        deadline = datetime(2024, 6, 1)
+        assert expired_mask(names, "%Y%m%d%j", deadline) == _expected(
+            names, "%Y%m%d%j", deadline
+        )
+
+    @pytest.mark.parametrize(
+        "date_format, names",
+        [
+            ("%s", ["dump_1704067200.sql", "dump_1893456000.sql", "dump_17040672.sql"]),
+            ("%Q", ["t_1704067200000.json", "t_1893456000000.json"]),
+            ("%Y%j", ["d_2024001.log", "d_2024366.log", "d_2023366.log"]),
+            ("%d%b%Y", ["r_01Jan2024.csv", "r_01Dec2024.csv", "r_01Foo2024.csv"]),
+            ("%B_%d_%Y", ["r_January_01_2024.csv", "r_July_01_2024.csv"]),
+            ("%G-W%V-%u", ["w_2024-W01-1.log", "w_2024-W30-7.log", "w_2024-W01-8"]),
+            ("%Y%m%d_%H%M%S_%f", ["a_20240101_000000_5.log", "a_20240701_0_1"]),
+            (
+                "%Y-%m-%dT%H:%M:%S%z",
+                ["b_2024-05-31T23:00:00Z", "b_2024-06-01T09:00:00+09:00"],
+            ),
+        ],
+    )
+    def test_other_specifiers_fall_back(self, date_format, names, use_numpy):
+        """固定幅の数字ではない指定子を含むフォーマットも通常の判定と同じ結果になる"""
+        deadline = datetime(2024, 6, 1)
+        assert expired_mask(
+            names, date_format, deadline, use_numpy=use_numpy
+        ) == _expected(names, date_format, deadline)
+
+    @pytest.mark.parametrize("batch_size", [1, 3, 1000])
+    def test_batch_size(self, batch_size):
+        """バッチの区切りに関係なく同じ結果になる"""
+        deadline = datetime(2024, 6, 1)
+        assert expired_mask(
+            NAMES, "%Y%m%d", deadline, use_numpy=False, batch_size=batch_size
+        ) == _expected(NAMES, "%Y%m%d", deadline)
+
+    def test_empty(self):
+        """空の一覧には空のマスクを返す"""
+        assert expired_mask([], "%Y%m%d", 1) == []
+
+    def test_invalid_format(self):
+        """有効な指定子を含まないフォーマットはValueErrorになる"""
+        with pytest.raises(ValueError):
+            expired_mask(NAMES, "date", 1)
+
+    @pytest.mark.skipif(HAS_NUMPY, reason="NumPy がインストールされている")
+    def test_numpy_required(self):
+        """NumPy がない環境で use_numpy=True を指定するとImportErrorになる"""
+        with pytest.raises(ImportError):
+            expired_mask(NAMES, "%Y%m%d", 1, use_numpy=True)
+
+
+class TestBulkParse:
+    def test_same_result_as_default(self, tmp_path):
+        """bulk_parse を指定しても削除されるファイルは通常の処理と同じ"""
+        for name in NAMES:
+            (tmp_path / name).touch()
+        sub = tmp_path / "sub"
+        sub.mkdir()
+        (sub / "log_20240102.txt").touch()
+        deadline = datetime(2024, 6, 1)
+        expected = [
+            name
+            for name in NAMES
+            if is_filename_date_expired(Path(name), "%Y%m%d", deadline)
+        ]
+
+        count = remove_expired_files_by_filename_date(
+            tmp_path, "%Y%m%d", deadline, recursive=True, bulk_parse=True
+        )
+
+        assert count == len(expected) + 1
+        remaining = {p.name for p in tmp_path.iterdir()}
+        assert remaining == set(NAMES) - set(expected) | {"sub"}
+        assert list(sub.iterdir()) == []
+
+    def test_conflicts_with_sorted_names(self, tmp_path):
+        """sorted_names と同時に指定するとValueErrorになる"""
+        with pytest.raises(ValueError):
+            remove_expired_files_by_filename_date(
+                tmp_path, "%Y%m%d", 1, sorted_names=True, bulk_parse=True
+            )
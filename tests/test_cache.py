@@ -0,0 +1,174 @@
+"""
+ファイル名の解析結果のキャッシュのテスト
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from expired_file_remover.cache import ParseCache
+from expired_file_remover.core import (
+    _FilenameDateParser,
+    remove_expired_files_by_filename_date,
+)
+
+
+def _recording_parse():
+    real_parse = _FilenameDateParser.parse
+    parsed = []
+
+    def recording_parse(self, filename):
+        parsed.append(filename)
+        return real_parse(self, filename)
+
+    return parsed, recording_parse
+
+
+class TestParseCache:
+    def test_caches_negative_and_positive_results(self):
+        """日付を含まない名前の結果もキャッシュする"""
+        cache = ParseCache()
+        calls = []
+
+        def parse(stem):
+            calls.append(stem)
+            return datetime(2024, 1, 1) if stem == "log_20240101" else None
+
+        assert cache.get_or_parse("README", parse) is None
+        assert cache.get_or_parse("README", parse) is None
+        assert cache.get_or_parse("log_20240101", parse) == datetime(2024, 1, 1)
+        assert cache.get_or_parse("log_20240101", parse) == datetime(2024, 1, 1)
+        assert calls == ["README", "log_20240101"]
+        assert (cache.hits, cache.misses) == (2, 2)
+
+    def test_lru_eviction(self):
+        """上限を超えると最も長く使われていない結果から破棄する"""
+        cache = ParseCache(max_entries=2)
+        cache.get_or_parse("a", lambda s: None)
+        cache.get_or_parse("b", lambda s: None)
+        cache.get_or_parse("a", lambda s: None)
+        cache.get_or_parse("c", lambda s: None)
+
+        assert len(cache) == 2
+        assert "a" in cache and "c" in cache and "b" not in cache
+        assert cache.evictions == 1
+
+    def test_invalid_max_entries(self):
+        """max_entries が正でない場合はValueErrorになる"""
+        with pytest.raises(ValueError):
+            ParseCache(max_entries=0)
+
+    def test_bind_discards_other_formats(self):
+        """異なるフォーマットで使用すると内容を破棄する"""
+        cache = ParseCache()
+        cache.bind(["%Y%m%d"])
+        cache.get_or_parse("a", lambda s: None)
+        cache.bind(["%Y%m%d"])
+        assert "a" in cache
+        cache.bind(["%Y-%m-%d"])
+        assert len(cache) == 0
+
+    def test_bind_discards_other_timezone(self, tmp_path):
+        """異なるタイムゾーンで使用すると、保存したキャッシュでも内容を破棄する"""
+        path = tmp_path / "cache.json"
+        cache = ParseCache(path=path)
+        cache.bind(["%s"], timezone.utc)
+        cache.get_or_parse("a", lambda s: None)
+        cache.save()
+
+        loaded = ParseCache(path=path)
+        loaded.bind(["%s"], timezone.utc)
+        assert "a" in loaded
+        loaded.bind(["%s"], timezone(timedelta(hours=9)))
+        assert len(loaded) == 0
+
+    def test_persistence(self, tmp_path):
+        """保存したキャッシュを次回読み込める"""
+        path = tmp_path / "cache.json"
+        cache = ParseCache(path=path)
+        cache.bind(["%Y%m%d"])
+        cache.get_or_parse("README", lambda s: None)
+        cache.get_or_parse("log_20240101", lambda s: datetime(2024, 1, 1))
+        cache.save()
+
+        loaded = ParseCache(path=path)
+        loaded.bind(["%Y%m%d"])
+        assert loaded.get_or_parse("README", pytest.fail) is None
+        assert loaded.get_or_parse("log_20240101", pytest.fail) == datetime(2024, 1, 1)
+
+    def test_broken_file_is_ignored(self, tmp_path):
+        """壊れたキャッシュファイルは無視する"""
+        path = tmp_path / "cache.json"
+        path.write_text("{broken")
+        assert len(ParseCache(path=path)) == 0
+
+    def test_save_without_path(self):
+        """path を指定していない場合は保存できない"""
+        with pytest.raises(ValueError):
+            ParseCache().save()
+
+
+class TestRemovalWithParseCache:
+    def test_second_run_skips_parsing(self, tmp_path):
+        """2回目の実行ではキャッシュ済みの名前を解析しない"""
+        for name in ["README", "notes.txt", "log_20200101.log", "log_29991231.log"]:
+            (tmp_path / name).touch()
+        cache = ParseCache(path=tmp_path.parent / f"{tmp_path.name}-cache.json")
+
+        first = remove_expired_files_by_filename_date(
+            tmp_path, ["%Y%m%d", "%Y-%m-%d"], 1, parse_cache=cache
+        )
+        assert first == 1
+
+        parsed, recording_parse = _recording_parse()
+        reloaded = ParseCache(path=cache.path)
+        with patch.object(_FilenameDateParser, "parse", recording_parse):
+            count = remove_expired_files_by_filename_date(
+                tmp_path, ["%Y%m%d", "%Y-%m-%d"], 1, parse_cache=reloaded
+            )
+
+        assert count == 0
+        assert parsed == []
+        assert reloaded.hits == 3
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "README",
+            "log_29991231.log",
+            "notes.txt",
+        ]
+
+    def test_uses_earliest_date_of_all_formats(self, tmp_path):
+        """複数のフォーマットのうちいずれかで期限切れなら削除する"""
+        (tmp_path / "20991231_2000-01-01.log").touch()
+        cache = ParseCache()
+
+        count = remove_expired_files_by_filename_date(
+            tmp_path, ["%Y%m%d", "%Y-%m-%d"], 1, parse_cache=cache
+        )
+
+        assert count == 1
+
+    def test_cache_from_other_timezone_is_not_reused(self, tmp_path):
+        """別のタイムゾーンで保存したキャッシュのエポック秒の解析結果を使わない"""
+        jst = timezone(timedelta(hours=9))
+        # 2024-01-01 05:00 UTC（14:00 JST）
+        (tmp_path / "job_1704085200.log").touch()
+        cache_path = tmp_path.parent / f"{tmp_path.name}-cache.json"
+
+        first = remove_expired_files_by_filename_date(
+            tmp_path,
+            "%s",
+            datetime(2024, 1, 1, 4),
+            tz=timezone.utc,
+            parse_cache=ParseCache(path=cache_path),
+        )
+        second = remove_expired_files_by_filename_date(
+            tmp_path,
+            "%s",
+            datetime(2024, 1, 1, 12),
+            tz=jst,
+            parse_cache=ParseCache(path=cache_path),
+        )
+
+        assert (first, second) == (0, 0)
+        assert (tmp_path / "job_1704085200.log").exists()
@@ -0,0 +1,155 @@
+"""
+チェックポイントによる中断・再開機能のテスト
+"""
+
+import errno
+import json
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from expired_file_remover.checkpoint import Checkpoint
+from expired_file_remover.core import (
+    _DirectoryWalker,
+    remove_expired_files,
+    remove_expired_files_by_filename_date,
+)
+
+from .conftest import make_old_file
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """a, b, c の3つのサブディレクトリに古いファイルを持つツリー"""
+    root = tmp_path / "root"
+    for name in ["a", "b", "c"]:
+        (root / name).mkdir(parents=True)
+        make_old_file(root / name / f"{name}.txt")
+    make_old_file(root / "top.txt")
+    return root
+
+
+class TestDirectoryWalker:
+    def test_sorted_directory_order(self, tree):
+        """サブディレクトリは名前順に走査される"""
+        walked = [p.relative_to(tree).as_posix() for p in _DirectoryWalker(tree, True)]
+        assert walked == ["top.txt", "a/a.txt", "b/b.txt", "c/c.txt"]
+
+    def test_frontier_includes_current_directory(self, tree):
+        """処理中のディレクトリはフロンティアに含まれる"""
+        walker = _DirectoryWalker(tree, True)
+        it = iter(walker)
+        next(it)  # top.txt
+        next(it)  # a/a.txt
+        assert walker.frontier() == [tree / "c", tree / "b", tree / "a"]
+
+
+def _failing_scandir(failing, code):
+    """failing のディレクトリの os.scandir を errno で失敗させる"""
+    real_scandir = os.scandir
+
+    def scandir(path="."):
+        if os.fspath(path) == os.fspath(failing):
+            raise OSError(code, os.strerror(code), os.fspath(path))
+        return real_scandir(path)
+
+    return patch("os.scandir", scandir)
+
+
+class TestUnreadableDirectory:
+    def test_unreadable_subdirectory_is_skipped(self, tree, capsys):
+        """読み込めないサブディレクトリは報告して飛ばし、後続のディレクトリを処理する"""
+        with _failing_scandir(tree / "a", errno.EACCES):
+            count = remove_expired_files(tree, 5, recursive=True)
+
+        assert count == 3
+        assert (tree / "a" / "a.txt").exists()
+        assert "読み込めませんでした" in capsys.readouterr().out
+
+    def test_unreadable_root_raises(self, tree):
+        """ルートのディレクトリを読み込めない場合は例外を送出する"""
+        with _failing_scandir(tree, errno.EACCES):
+            with pytest.raises(PermissionError):
+                remove_expired_files(tree, 5, recursive=True)
+
+    def test_descriptor_exhaustion_raises(self, tree, tmp_path):
+        """EMFILE は飛ばさずに中断し、チェックポイントから再開できる"""
+        state = tmp_path / "state.json"
+        with _failing_scandir(tree / "b", errno.EMFILE):
+            with pytest.raises(OSError):
+                remove_expired_files(tree, 5, recursive=True, checkpoint=state)
+
+        assert remove_expired_files(tree, 5, recursive=True, checkpoint=state) == 2
+        assert not (tree / "b" / "b.txt").exists()
+
+
+class TestCheckpoint:
+    def test_save_and_load(self, tree, tmp_path):
+        """保存したフロンティアを読み込める"""
+        state = tmp_path / "state.json"
+        cp = Checkpoint(state, tree, True)
+        cp.save([tree / "c", tree / "b"])
+
+        assert Checkpoint(state, tree, True).load() == [tree / "c", tree / "b"]
+        # 再帰設定が異なる状態ファイルは無視される
+        assert Checkpoint(state, tree, False).load() is None
+
+        cp.clear()
+        assert not state.exists()
+
+    def test_broken_state_file_is_ignored(self, tree, tmp_path):
+        """壊れた状態ファイルは無視してルートから走査する"""
+        state = tmp_path / "state.json"
+        state.write_text("{broken")
+        assert Checkpoint(state, tree, True).load() is None
+
+
+class TestResume:
+    def test_interrupted_run_resumes_from_checkpoint(self, tree, tmp_path):
+        """中断された走査はチェックポイントから再開される"""
+        state = tmp_path / "state.json"
+
+        # b ディレクトリの処理中に中断させる
+        real_unlink = os.unlink
+
+        def interrupting_unlink(self, *args, **kwargs):
+            if self.name == "b.txt":
+                raise KeyboardInterrupt
+            real_unlink(self)
+
+        with patch("pathlib.Path.unlink", interrupting_unlink):
+            with pytest.raises(KeyboardInterrupt):
+                remove_expired_files(tree, 5, recursive=True, checkpoint=state)
+
+        saved = json.loads(state.read_text())
+        assert saved["pending"] == ["c", "b"]
+        assert not (tree / "a" / "a.txt").exists()
+
+        # 再開時は b と c のみ走査される
+        with patch(
+            "expired_file_remover.core.os.scandir", wraps=os.scandir
+        ) as mock_scandir:
+            count = remove_expired_files(tree, 5, recursive=True, checkpoint=state)
+
+        assert count == 2
+        assert [c.args[0] for c in mock_scandir.call_args_list] == [
+            tree / "b",
+            tree / "c",
+        ]
+        assert not state.exists()
+
+    def test_periodic_checkpoint(self, tree, tmp_path):
+        """checkpoint_interval ごとに状態ファイルが保存される"""
+        state = tmp_path / "state.json"
+        with patch.object(Checkpoint, "save") as mock_save:
+            remove_expired_files_by_filename_date(
+                tree,
+                "%Y%m%d",
+                datetime(2025, 1, 1),
+                recursive=True,
+                checkpoint=state,
+                checkpoint_interval=0,
+            )
+        assert mock_save.call_count == 4
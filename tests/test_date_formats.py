@@ -0,0 +1,133 @@
+"""
+strptime を使わない日付フォーマットの解析のテスト
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from expired_file_remover.core import (
+    _FilenameDateParser,
+    extract_date_from_filename,
+    remove_expired_files_by_filename_date,
+)
+
+
+def _local(dt):
+    """UTC の日時をローカル時刻の naive な datetime に変換する"""
+    return dt.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+
+class TestExtendedSpecifiers:
+    def test_epoch_seconds(self):
+        """%s はエポック秒をローカル時刻として解釈する"""
+        assert extract_date_from_filename(
+            "dump_1704067200.sql", "%s"
+        ) == datetime.fromtimestamp(1704067200)
+
+    def test_epoch_milliseconds(self):
+        """%Q はエポックミリ秒を解釈する"""
+        assert extract_date_from_filename(
+            "trace-1704067200123.json", "%Q"
+        ) == datetime.fromtimestamp(1704067200.123)
+
+    @pytest.mark.parametrize(
+        "filename, expected",
+        [
+            ("log_2024001.txt", datetime(2024, 1, 1)),
+            ("log_2024060.txt", datetime(2024, 2, 29)),
+            ("log_2024366.txt", datetime(2024, 12, 31)),
+            ("log_2023366.txt", None),
+            ("log_2024000.txt", None),
+        ],
+    )
+    def test_day_of_year(self, filename, expected):
+        """%j は年間通算日として解釈し、範囲外の値は無効とする"""
+        assert extract_date_from_filename(filename, "%Y%j") == expected
+
+    @pytest.mark.parametrize(
+        "filename, date_format, expected",
+        [
+            ("app-15Mar2024.log", "%d%b%Y", datetime(2024, 3, 15)),
+            ("app-15mar2024.log", "%d%b%Y", datetime(2024, 3, 15)),
+            ("app-15-SEP-2024.log", "%d-%b-%Y", datetime(2024, 9, 15)),
+            ("report_September_01_2024", "%B_%d_%Y", datetime(2024, 9, 1)),
+            ("app-31Feb2024.log", "%d%b%Y", None),
+            ("app-15Foo2024.log", "%d%b%Y", None),
+        ],
+    )
+    def test_month_names(self, filename, date_format, expected):
+        """%b / %B は英語の月名を大文字小文字を区別せずに解釈する"""
+        assert extract_date_from_filename(filename, date_format) == expected
+
+    def test_iso_week(self):
+        """%G / %V / %u は ISO 8601 の週番号として解釈する"""
+        assert extract_date_from_filename("weekly_2024-W01-3", "%G-W%V-%u") == (
+            datetime(2024, 1, 3)
+        )
+        assert extract_date_from_filename("weekly_2021-W01", "%G-W%V") == (
+            datetime(2021, 1, 4)
+        )
+        assert extract_date_from_filename("weekly_2024-W54", "%G-W%V") is None
+
+    @pytest.mark.parametrize(
+        "filename, utc",
+        [
+            ("backup_2024-01-01T12:30:45Z", datetime(2024, 1, 1, 12, 30, 45)),
+            ("backup_2024-01-01T21:30:45+09:00", datetime(2024, 1, 1, 12, 30, 45)),
+            ("backup_2024-01-01T07:30:45-0500", datetime(2024, 1, 1, 12, 30, 45)),
+        ],
+    )
+    def test_iso8601_with_offset(self, filename, utc):
+        """T 区切りと Z / UTC オフセットを含む ISO 8601 の日時をローカル時刻に変換する"""
+        assert extract_date_from_filename(filename, "%Y-%m-%dT%H:%M:%S%z") == _local(
+            utc
+        )
+
+    def test_fraction(self):
+        """%f は 1〜6 桁の小数秒として解釈する"""
+        assert extract_date_from_filename(
+            "snap_20240101_120000.250.tar", "%Y%m%d_%H%M%S.%f"
+        ) == datetime(2024, 1, 1, 12, 0, 0, 250000)
+
+    def test_incomplete_date_is_not_parsed(self):
+        """日付が決まらないフォーマットでは従来どおりNoneを返す"""
+        assert extract_date_from_filename("log_202401.txt", "%Y%m") is None
+        assert extract_date_from_filename("log_2024.txt", "%G") is None
+        assert not _FilenameDateParser("%Y%m").checkable
+        assert _FilenameDateParser("%s").checkable
+
+
+class TestParserMatchesExtract:
+    @pytest.mark.parametrize(
+        "date_format, filename",
+        [
+            ("%Y%m%d", "log_20240229.txt"),
+            ("%Y%m%d%I", "log_2024010112.txt"),
+            ("%d%b%Y", "app-15Mar2024.log"),
+            ("%Y%j", "log_2024060.txt"),
+            ("%s", "dump_1704067200.sql"),
+        ],
+    )
+    def test_same_result(self, date_format, filename):
+        """コンパイル済みのパーサーも extract_date_from_filename と同じ結果を返す"""
+        stem = filename.rsplit(".", 1)[0]
+        assert _FilenameDateParser(date_format).parse(
+            stem
+        ) == extract_date_from_filename(filename, date_format)
+
+
+class TestRemovalWithExtendedFormats:
+    def test_remove_by_epoch_and_month_name(self, tmp_path):
+        """新しい指定子のフォーマットでも期限切れのファイルを削除できる"""
+        now = datetime.now()
+        old = int((now - timedelta(days=10)).timestamp())
+        new = int((now - timedelta(days=1)).timestamp())
+        (tmp_path / f"dump_{old}.sql").touch()
+        (tmp_path / f"dump_{new}.sql").touch()
+        (tmp_path / "app-15Mar2001.log").touch()
+
+        count = remove_expired_files_by_filename_date(tmp_path, ["%s", "%d%b%Y"], 5)
+
+        assert count == 2
+        assert [p.name for p in tmp_path.iterdir()] == [f"dump_{new}.sql"]
@@ -0,0 +1,242 @@
+"""
+作業キューによる分散削除のテスト
+"""
+
+import os
+import sqlite3
+import time
+from unittest.mock import patch
+
+import pytest
+
+from expired_file_remover.distributed import (
+    WorkQueue,
+    run_coordinator,
+    run_worker,
+)
+from expired_file_remover.progress import ProgressReport
+from expired_file_remover.result import RemovalResult
+
+
+def _make_tree(root, partitions=3, files=2, days=30):
+    stamp = time.time() - days * 24 * 60 * 60
+    for name in ["root.log", "fresh.log"]:
+        (root / name).touch()
+    os.utime(root / "root.log", (stamp, stamp))
+    for i in range(partitions):
+        sub = root / f"part{i}" / "nested"
+        sub.mkdir(parents=True)
+        for j in range(files):
+            (sub / f"{j}.log").touch()
+            os.utime(sub / f"{j}.log", (stamp, stamp))
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "data"
+    root.mkdir()
+    _make_tree(root)
+    return root
+
+
+class TestWorkQueue:
+    def test_populate_is_idempotent(self, tree, tmp_path):
+        """第1階層をパーティションとして登録し、再登録しても重複しない"""
+        with WorkQueue(tmp_path / "queue.db") as queue:
+            assert queue.populate(tree, 10, recursive=True) == 4
+            assert queue.populate(tree, 10, recursive=True) == 0
+            assert queue.status().pending == 4
+
+    def test_claim_each_partition_once(self, tree, tmp_path):
+        """パーティションは1つのワーカーだけが占有する"""
+        with WorkQueue(tmp_path / "queue.db") as queue:
+            queue.populate(tree, 10, recursive=True)
+            leases = [queue.claim("w") for _ in range(5)]
+
+        assert leases[4] is None
+        assert len({lease.path for lease in leases[:4] if lease is not None}) == 4
+
+    def test_lease_expiry(self, tree, tmp_path):
+        """リースの期限が切れたパーティションは他のワーカーが占有し、元のワーカーの結果は記録しない"""
+        with WorkQueue(tmp_path / "queue.db", lease_seconds=0.05) as queue:
+            queue.populate(tree, 10)
+            crashed = queue.claim("crashed")
+            assert crashed is not None
+            assert queue.claim("other") is None
+
+            time.sleep(0.1)
+            taken = queue.claim("other")
+
+            assert taken is not None and taken.path == crashed.path
+            assert not queue.renew(crashed)
+            assert not queue.complete(crashed, RemovalResult(1))
+            assert queue.complete(taken, RemovalResult(1))
+            assert queue.status().done == 1
+
+    def test_max_attempts(self, tree, tmp_path):
+        """再試行の上限に達したパーティションは失敗として記録する"""
+        with WorkQueue(tmp_path / "queue.db", 0.05, max_attempts=1) as queue:
+            queue.populate(tree, 10)
+            queue.claim("crashed")
+            time.sleep(0.1)
+
+            assert queue.claim("other") is None
+            assert queue.status().failed == 1
+            assert queue.failures() == [(tree, "lease expired")]
+
+    def test_populate_follows_walk_policy(self, tree, tmp_path, other_filesystem):
+        """第1階層のディレクトリは follow_symlinks / one_file_system に従って選ぶ"""
+        (tree / "alias").symlink_to(tree / "part0")
+        (tree / "mnt").symlink_to(other_filesystem)
+
+        def registered(**policy):
+            with WorkQueue(tmp_path / f"queue-{'-'.join(policy)}.db") as queue:
+                queue.populate(tree, 10, recursive=True, **policy)
+                return {
+                    lease.path.name
+                    for lease in iter(lambda: queue.claim("w"), None)
+                    if lease.recursive
+                }
+
+        assert registered() == {"part0", "part1", "part2"}
+        assert registered(follow_symlinks=True) == {"part0", "part1", "part2", "mnt"}
+        assert registered(follow_symlinks=True, one_file_system=True) == {
+            "part0",
+            "part1",
+            "part2",
+        }
+
+    def test_uninitialized_queue(self, tmp_path):
+        """populate していないキューの基準日時は取得できない"""
+        with WorkQueue(tmp_path / "queue.db") as queue:
+            with pytest.raises(LookupError):
+                queue.deadline()
+
+
+class TestRunWorkers:
+    def test_in_process(self, tree, tmp_path):
+        """workers=0 ではこのプロセスですべてのパーティションを処理する"""
+        status = run_coordinator(tree, 10, tmp_path / "queue.db", workers=0)
+
+        assert status.finished
+        assert (status.done, status.deleted_count) == (4, 7)
+        assert sorted(p.name for p in tree.rglob("*.log")) == ["fresh.log"]
+
+    def test_worker_processes(self, tree, tmp_path):
+        """複数のワーカープロセスで分担して処理する"""
+        status = run_coordinator(
+            tree, 10, tmp_path / "queue.db", workers=2, file_filter=[".log"]
+        )
+
+        assert status.finished
+        assert status.deleted_count == 7
+        assert sorted(p.name for p in tree.rglob("*.log")) == ["fresh.log"]
+
+    def test_reclaims_crashed_worker(self, tree, tmp_path):
+        """異常終了したワーカーのパーティションをリースの期限後に処理し直す"""
+        queue_path = tmp_path / "queue.db"
+        with WorkQueue(queue_path, lease_seconds=0.2) as queue:
+            queue.populate(tree, 10, recursive=True)
+            queue.claim("crashed")
+
+        result = run_worker(
+            queue_path, "survivor", lease_seconds=0.2, poll_interval=0.05
+        )
+
+        assert result == 7
+        with WorkQueue(queue_path) as queue:
+            assert queue.status().done == 4
+
+    def test_lease_renewed_without_progress(self, tree, tmp_path):
+        """進捗の報告がない間もリースを延長し、他のワーカーに処理し直されない"""
+        queue_path = tmp_path / "queue.db"
+        with WorkQueue(queue_path) as queue:
+            queue.populate(tree, 10)
+        stolen = []
+
+        def slow_removal(*args, **kwargs):
+            # 進捗を報告せずにリースの有効期間より長く処理する
+            time.sleep(1.0)
+            with WorkQueue(queue_path, lease_seconds=0.3) as other:
+                stolen.append(other.claim("other"))
+            return RemovalResult(1)
+
+        with patch(
+            "expired_file_remover.distributed.remove_expired_files", slow_removal
+        ):
+            result = run_worker(queue_path, "slow", lease_seconds=0.3)
+
+        assert stolen == [None]
+        assert result == 1
+        with WorkQueue(queue_path) as queue:
+            assert queue.status().done == 1
+
+    def test_budget_limits_whole_worker(self, tree, tmp_path):
+        """上限はワーカー全体に適用し、上限に達したパーティションは未処理に戻して終了する"""
+        status = run_coordinator(
+            tree, 10, tmp_path / "queue.db", workers=0, max_deletions=1
+        )
+
+        assert status.deleted_count == 1
+        assert not status.finished
+        assert len(list(tree.rglob("*.log"))) == 7
+
+        # 次に起動したワーカーが再開位置から残りを処理する
+        run_worker(tmp_path / "queue.db")
+        assert sorted(p.name for p in tree.rglob("*.log")) == ["fresh.log"]
+
+    def test_lost_lease_keeps_partial_counts(self, tree, tmp_path):
+        """リースを失うまでに削除した数は、新しい所有者の結果とともに集計に残る"""
+        queue_path = tmp_path / "queue.db"
+        with WorkQueue(queue_path) as queue:
+            queue.populate(tree, 10)
+        calls = []
+
+        def removal(path, deadline, progress, **kwargs):
+            calls.append(path)
+            if len(calls) > 1:
+                return RemovalResult(1, 10)
+            # 他のワーカーにリースを奪われ、延長に失敗するまで待つ
+            with sqlite3.connect(queue_path) as conn:
+                conn.execute("UPDATE partitions SET owner = 'other'")
+            time.sleep(0.5)
+            progress(ProgressReport(5, 2, 20, path, 0.5, 10.0, None, None))
+            raise AssertionError("リースを失ったことが通知されなかった")
+
+        with patch("expired_file_remover.distributed.remove_expired_files", removal):
+            result = run_worker(
+                queue_path, "slow", lease_seconds=0.3, poll_interval=0.05
+            )
+
+        assert len(calls) == 2
+        assert (int(result), result.deleted_bytes) == (3, 30)
+        with WorkQueue(queue_path) as queue:
+            status = queue.status()
+            assert (status.done, status.deleted_count, status.deleted_bytes) == (
+                1,
+                3,
+                30,
+            )
+
+    def test_errors_are_recorded(self, tree, tmp_path):
+        """処理中の例外はパーティションの失敗として記録し、他のパーティションを処理し続ける"""
+        queue_path = tmp_path / "queue.db"
+
+        status = run_coordinator(
+            tree, 10, queue_path, workers=0, max_attempts=2, hardlinks="invalid"
+        )
+
+        assert status.failed == 4
+        with WorkQueue(queue_path) as queue:
+            assert all(
+                error is not None and "ValueError" in error
+                for _, error in queue.failures()
+            )
+
+    def test_same_cutoff_for_all_workers(self, tree, tmp_path):
+        """基準日時は populate の時点で固定される"""
+        with WorkQueue(tmp_path / "queue.db") as queue:
+            queue.populate(tree, 10)
+            first = queue.deadline()
+            queue.populate(tree, 0)
+            assert queue.deadline() == first
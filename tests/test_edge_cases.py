@@ -211,17 +211,15 @@ class TestFormatHandling:
                 # OSErrorが正しく処理される
                 pass
 
-        # 外側のtry-exceptブロックのPermissionError（347-348行のカバレッジ）
-        # これは外側のtry-exceptブロックに入るケースをテスト
-        with patch("os.access", return_value=True):  # アクセス権チェックをバイパス
-            with patch(
-                "expired_file_remover.core.is_filename_date_expired",
-                side_effect=PermissionError("外側の処理エラー"),
-            ):
-                with pytest.raises(PermissionError):
-                    remove_expired_files_by_filename_date(
-                        tmp_path, "%Y%m%d", datetime(2025, 1, 1)
-                    )
+        # ファイル名の判定中に発生したPermissionErrorはそのまま送出される
+        with patch(
+            "expired_file_remover.core._FilenameDateParser.parse",
+            side_effect=PermissionError("外側の処理エラー"),
+        ):
+            with pytest.raises(PermissionError):
+                remove_expired_files_by_filename_date(
+                    tmp_path, "%Y%m%d", datetime(2025, 1, 1)
+                )
 
 
 class TestExceptionHandling:
@@ -0,0 +1,221 @@
+"""
+削除処理中のエラーの扱いのテスト
+"""
+
+import errno
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from expired_file_remover.core import (
+    remove_expired_files,
+    remove_expired_files_by_filename_date,
+)
+from expired_file_remover.errors import (
+    ErrorLimitExceeded,
+    ErrorPolicy,
+    ErrorSummary,
+)
+from expired_file_remover.retention import remove_all_but_newest
+
+from .conftest import make_old_file
+
+NO_WAIT = ErrorPolicy(backoff=0.0)
+
+
+def _failing_unlink(codes):
+    """名前の先頭が codes のキーのファイルの unlink を対応する errno で失敗させる"""
+    real_unlink = Path.unlink
+
+    def unlink(self, missing_ok=False):
+        for prefix, code in codes.items():
+            if self.name.startswith(prefix):
+                raise OSError(code, os.strerror(code), str(self))
+        real_unlink(self, missing_ok)
+
+    return patch.object(Path, "unlink", unlink)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for sub in ("a", "b"):
+        (tmp_path / sub).mkdir()
+        for name in ["locked1.log", "locked2.log", "ok.log"]:
+            make_old_file(tmp_path / sub / name)
+    make_old_file(tmp_path / "a" / "gone.log")
+    return tmp_path
+
+
+class TestErrorSummary:
+    def test_aggregate_by_errno_and_directory(self, tree, capsys):
+        """エラーを出力せずに errno とディレクトリごとに集計し、例は samples 件まで保持する"""
+        policy = ErrorPolicy(samples=2)
+        with _failing_unlink({"locked": errno.EACCES}):
+            result = remove_expired_files(tree, 10, recursive=True, errors=policy)
+
+        assert result == 3
+        assert capsys.readouterr().out == ""
+        summary = result.errors
+        assert summary is not None
+        assert summary.total == 4
+        assert summary.by_errno == {"EACCES": 4}
+        assert summary.by_directory == {
+            str(tree / "a"): 2,
+            str(tree / "b"): 2,
+        }
+        assert len(summary.examples["EACCES"]) == 2
+        assert "EACCES: 4件" in summary.format()
+
+    @pytest.mark.parametrize("on_error", ["continue", "abort"])
+    def test_vanished_file_is_skipped(self, tree, on_error):
+        """並行して削除されたファイル（ENOENT）はエラーに数えず skipped に数える"""
+        policy = ErrorPolicy(on_error)
+        with _failing_unlink({"gone": errno.ENOENT}):
+            result = remove_expired_files(tree, 10, recursive=True, errors=policy)
+
+        assert result == 6
+        assert result.skipped == 1
+        assert result.errors is not None
+        assert (result.errors.total, result.errors.vanished) == (0, 1)
+
+    def test_unreadable_directory_is_aggregated(self, tree, capsys):
+        """読み込めないサブディレクトリのエラーもエラーの扱いに従って集計する"""
+        real_scandir = os.scandir
+
+        def scandir(path="."):
+            if os.fspath(path) == str(tree / "a"):
+                raise PermissionError(errno.EACCES, "denied", os.fspath(path))
+            return real_scandir(path)
+
+        with patch("os.scandir", scandir):
+            result = remove_expired_files(tree, 10, recursive=True, errors=NO_WAIT)
+            with pytest.raises(ErrorLimitExceeded):
+                remove_expired_files(
+                    tree, 10, recursive=True, errors=ErrorPolicy("abort")
+                )
+
+        assert result == 3
+        assert capsys.readouterr().out == ""
+        assert result.errors is not None
+        assert result.errors.by_errno == {"EACCES": 1}
+        assert (tree / "a" / "ok.log").exists()
+
+    def test_filename_date_continues(self, tmp_path):
+        """errors を指定した場合は権限のエラーでも中断しない"""
+        for name in ["locked_20000101", "data_20000101"]:
+            (tmp_path / name).touch()
+
+        with _failing_unlink({"locked": errno.EPERM}):
+            result = remove_expired_files_by_filename_date(
+                tmp_path, "%Y%m%d", 10, errors=ErrorPolicy()
+            )
+
+        assert result == 1
+        assert result.errors is not None
+        assert result.errors.by_errno == {"EPERM": 1}
+
+    def test_default_behavior(self, tree, capsys):
+        """errors を指定しない場合は従来どおりエラーごとに出力する"""
+        with _failing_unlink({"locked": errno.EACCES}):
+            result = remove_expired_files(tree, 10, recursive=True)
+
+        assert result == 3
+        assert result.errors is None
+        assert capsys.readouterr().out.count("削除に失敗しました") == 4
+
+    def test_retention(self, tmp_path):
+        """remove_all_but_newest でもエラーを集計する"""
+        for day in range(1, 4):
+            (tmp_path / f"db_2024010{day}").touch()
+        with patch("os.unlink", side_effect=PermissionError(errno.EACCES, "denied")):
+            result = remove_all_but_newest(tmp_path, 1, "%Y%m%d", errors=NO_WAIT)
+
+        assert result == 0
+        assert result.errors is not None
+        assert result.errors.by_errno == {"EACCES": 2}
+
+
+class TestOnError:
+    def test_abort(self, tree):
+        """on_error="abort" では最初のエラーで中止する"""
+        with _failing_unlink({"locked": errno.EACCES}):
+            with pytest.raises(ErrorLimitExceeded) as info:
+                remove_expired_files(
+                    tree, 10, recursive=True, errors=ErrorPolicy("abort")
+                )
+
+        assert info.value.summary.total == 1
+        assert isinstance(info.value.__cause__, PermissionError)
+
+    def test_threshold(self, tree):
+        """on_error="threshold" では max_errors 件を超えたら中止する"""
+        policy = ErrorPolicy("threshold", max_errors=3)
+        with _failing_unlink({"locked": errno.EACCES}):
+            with pytest.raises(ErrorLimitExceeded) as info:
+                remove_expired_files(tree, 10, recursive=True, errors=policy)
+
+        assert info.value.summary.total == 4
+
+    def test_threshold_not_reached(self, tree):
+        """エラーが max_errors 件以下なら最後まで処理する"""
+        policy = ErrorPolicy("threshold", max_errors=4)
+        with _failing_unlink({"locked": errno.EACCES}):
+            result = remove_expired_files(tree, 10, recursive=True, errors=policy)
+
+        assert result == 3
+        assert result.completed
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{"on_error": "ignore"}, {"on_error": "threshold"}, {"retries": -1}],
+    )
+    def test_invalid_policy(self, kwargs):
+        """無効な設定はValueErrorになる"""
+        with pytest.raises(ValueError):
+            ErrorPolicy(**kwargs)
+
+
+class TestRetry:
+    def test_transient_error_is_retried(self, tmp_path):
+        """一時的なエラーは待機時間を倍にしながら再試行する"""
+        make_old_file(tmp_path / "busy.log")
+        real_unlink = Path.unlink
+        attempts = []
+
+        def unlink(self, missing_ok=False):
+            attempts.append(self.name)
+            if len(attempts) < 3:
+                raise OSError(errno.ESTALE, "Stale file handle")
+            real_unlink(self, missing_ok)
+
+        policy = ErrorPolicy(backoff=0.1, max_backoff=0.15)
+        with patch.object(Path, "unlink", unlink), patch("time.sleep") as sleep:
+            result = remove_expired_files(tmp_path, 10, errors=policy)
+
+        assert result == 1
+        assert result.errors is not None
+        assert result.errors.total == 0
+        assert result.errors.retried == 2
+        assert [c.args[0] for c in sleep.call_args_list] == [0.1, 0.15]
+
+    def test_retries_exhausted(self):
+        """再試行の回数を超えたら元のエラーを送出し、一時的でないエラーは再試行しない"""
+        summary = ErrorSummary(ErrorPolicy(retries=2, backoff=0.0))
+        busy = OSError(errno.EBUSY, "busy")
+        calls = []
+
+        def fail(error):
+            calls.append(error)
+            raise error
+
+        with pytest.raises(OSError) as info:
+            summary.call(fail, busy)
+        assert info.value is busy
+        assert len(calls) == 3
+
+        with pytest.raises(PermissionError):
+            summary.call(fail, PermissionError(errno.EACCES, "denied"))
+        assert len(calls) == 4
+        assert summary.retried == 2
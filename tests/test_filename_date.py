@@ -298,22 +298,24 @@ class TestRemoveExpiredFilesByFilenameDate:
         """パーミッションエラーが発生する場合のテスト"""
 
         # テスト用ファイルを作成
-        test_file = tmp_path / "data_20230101.txt"
+        test_dir = tmp_path / "locked"
+        test_dir.mkdir()
+        test_file = test_dir / "data_20230101.txt"
         test_file.touch()
 
-        # ファイルのパーミッションを読み取り専用に設定
-        current_mode = test_file.stat().st_mode
-        test_file.chmod(current_mode & ~0o222)  # 書き込み権限を削除
+        # ディレクトリを読み取り専用に設定（unlink が権限エラーになる）
+        current_mode = test_dir.stat().st_mode
+        test_dir.chmod(current_mode & ~0o222)  # 書き込み権限を削除
 
         try:
             with pytest.raises(PermissionError):
                 remove_expired_files_by_filename_date(
-                    tmp_path, "%Y%m%d", datetime(2025, 1, 1)
+                    test_dir, "%Y%m%d", datetime(2025, 1, 1)
                 )
         finally:
-            # テストファイルが存在する場合は権限を戻してから削除
+            # 権限を戻してから削除
+            test_dir.chmod(current_mode | 0o222)  # 書き込み権限を追加
             if test_file.exists():
-                test_file.chmod(current_mode | 0o222)  # 書き込み権限を追加
                 test_file.unlink()
 
     def test_remove_files_with_different_date_formats(self, tmp_path):
@@ -334,3 +336,65 @@ class TestRemoveExpiredFilesByFilenameDate:
             tmp_path, "%Y%m%d", reference_date
         )
         assert deleted == 1  # YYYYMMDD形式のファイルのみが削除されるべき
+
+
+class TestFilenameOnlyDecision:
+    def test_no_inode_access_for_kept_files(self, tmp_path):
+        """削除しないファイルには stat も access も行わない"""
+        (tmp_path / "file_20240101.txt").touch()
+        (tmp_path / "file_20990101.txt").touch()
+        (tmp_path / "nodate.txt").touch()
+
+        real_stat = Path.stat
+        stat_calls = []
+
+        def recording_stat(self, *args, **kwargs):
+            stat_calls.append(self)
+            return real_stat(self, *args, **kwargs)
+
+        with (
+            patch("os.access") as mock_access,
+            patch("pathlib.Path.stat", recording_stat),
+        ):
+            deleted = remove_expired_files_by_filename_date(
+                tmp_path, "%Y%m%d", datetime(2025, 1, 1)
+            )
+
+        assert deleted == 1
+        mock_access.assert_not_called()
+        # ルートディレクトリの存在確認以外に stat は行わない
+        assert set(stat_calls) == {tmp_path}
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "file_20990101.txt",
+            "nodate.txt",
+        ]
+
+    def test_invalid_format_raises_before_walk(self, tmp_path):
+        """無効なフォーマットはファイルがなくても走査前にValueError"""
+        with pytest.raises(ValueError):
+            remove_expired_files_by_filename_date(
+                tmp_path, ["%Y%m%d", "invalid"], datetime(2025, 1, 1)
+            )
+
+    @pytest.mark.parametrize("date_format", ["%b_%B_%Y", "%B_%b_%Y"])
+    def test_conflicting_specifiers_raise(self, tmp_path, date_format):
+        """同じフィールドを表す異なる指定子は、正規表現のエラーではなくValueError"""
+        (tmp_path / "file_01Jan_January_2024.txt").touch()
+        with pytest.raises(ValueError, match="重複"):
+            remove_expired_files_by_filename_date(
+                tmp_path, date_format, datetime(2025, 1, 1)
+            )
+        with pytest.raises(ValueError, match="重複"):
+            extract_date_from_filename("file_01Jan_January_2024.txt", date_format)
+
+    def test_repeated_specifier_must_match_same_value(self, tmp_path):
+        """同じ指定子の繰り返しは、最初と同じ値の場合だけ日付として扱う"""
+        (tmp_path / "copy_20240101_20240101.txt").touch()
+        (tmp_path / "copy_20240101_20240102.txt").touch()
+
+        deleted = remove_expired_files_by_filename_date(
+            tmp_path, "%Y%m%d_%Y%m%d", datetime(2025, 1, 1)
+        )
+
+        assert deleted == 1
+        assert [p.name for p in tmp_path.iterdir()] == ["copy_20240101_20240102.txt"]
@@ -0,0 +1,104 @@
+"""
+ハードリンクを考慮した削除とディスク容量の集計のテスト
+"""
+
+import os
+
+import pytest
+
+from expired_file_remover.core import remove_expired_files
+from expired_file_remover.hardlinks import HardlinkTracker, allocated_bytes
+
+from .conftest import make_old_file
+
+
+@pytest.fixture
+def snapshots(tmp_path):
+    """rsync スナップショットのように同じ inode を共有する2つのディレクトリ"""
+    old = tmp_path / "snap1"
+    new = tmp_path / "snap2"
+    old.mkdir()
+    new.mkdir()
+    make_old_file(old / "shared.dat", data=b"x" * 8192)
+    os.link(old / "shared.dat", new / "shared.dat")
+    make_old_file(old / "only_old.dat", data=b"x" * 8192)
+    return tmp_path
+
+
+class TestHardlinkAccounting:
+    def test_reclaimed_bytes_excludes_remaining_links(self, snapshots):
+        """他のリンクが残る inode は解放容量に数えない"""
+        only_old = (snapshots / "snap1" / "only_old.dat").stat()
+        result = remove_expired_files(snapshots / "snap1", 5)
+        assert result == 2
+        assert result.deleted_bytes == 2 * 8192
+        # 解放されるのは only_old.dat の分のみ
+        assert result.reclaimed_bytes == allocated_bytes(only_old)
+        assert (snapshots / "snap2" / "shared.dat").exists()
+
+    def test_last_link_reclaims_space(self, snapshots):
+        """最後のリンクを削除したときに容量が解放される"""
+        shared = (snapshots / "snap2" / "shared.dat").stat()
+        only_old = (snapshots / "snap1" / "only_old.dat").stat()
+        result = remove_expired_files(snapshots, 5, recursive=True)
+        assert result == 3
+        assert result.reclaimed_bytes == allocated_bytes(shared) + allocated_bytes(
+            only_old
+        )
+
+
+class TestAllLinksPolicy:
+    def test_deletes_only_when_all_links_expired(self, snapshots):
+        """hardlinks="all" ではすべてのリンクが期限切れの場合のみ削除する"""
+        result = remove_expired_files(snapshots / "snap1", 5, hardlinks="all")
+        assert result == 1
+        assert result.kept_links == 1
+        assert (snapshots / "snap1" / "shared.dat").exists()
+
+        result = remove_expired_files(snapshots, 5, recursive=True, hardlinks="all")
+        assert result == 2
+        assert result.kept_links == 0
+        assert not (snapshots / "snap2" / "shared.dat").exists()
+
+    def test_budget_checked_per_link(self, tmp_path):
+        """リンクのグループを削除する途中でも、リンクごとに max_deletions を守る"""
+        for name in ["a", "b", "c"]:
+            (tmp_path / name).mkdir()
+        make_old_file(tmp_path / "a" / "x.dat", data=b"x" * 8192)
+        for name in ["b", "c"]:
+            os.link(tmp_path / "a" / "x.dat", tmp_path / name / "x.dat")
+
+        result = remove_expired_files(
+            tmp_path, 5, recursive=True, hardlinks="all", max_deletions=2
+        )
+
+        assert result == 2
+        assert result.stop_reason == "max_deletions"
+        assert result.reclaimed_bytes == 0
+        assert len(list(tmp_path.rglob("x.dat"))) == 1
+
+    def test_invalid_policy(self, tmp_path):
+        """不正な hardlinks はValueError"""
+        with pytest.raises(ValueError):
+            remove_expired_files(tmp_path, 5, hardlinks="some")
+
+
+class TestHardlinkTracker:
+    def test_max_inodes_bound(self, snapshots):
+        """上限を超えた inode は記録せず削除もしない"""
+        tracker = HardlinkTracker(max_inodes=0)
+        path = snapshots / "snap1" / "shared.dat"
+        assert tracker.add(path.stat(), path) is None
+        assert tracker.overflowed == 1
+        assert len(tracker) == 0
+
+    def test_releases_complete_groups(self, snapshots):
+        """リンクが揃った inode はすぐに破棄し、揃うまでの間だけパスを保持する"""
+        tracker = HardlinkTracker()
+        first = snapshots / "snap1" / "shared.dat"
+        second = snapshots / "snap2" / "shared.dat"
+
+        assert tracker.add(first.stat(), first) is None
+        assert (len(tracker), tracker.pending_links()) == (1, 1)
+        assert tracker.add(second.stat(), second) == [first, second]
+        assert (len(tracker), tracker.pending_links()) == (0, 0)
@@ -0,0 +1,129 @@
+"""
+パッケージのインポート時間のテスト
+
+短時間で終了するプロセスから呼び出されることを想定し、`import expired_file_remover`
+で読み込まれるモジュールとインポート時間の上限（リグレッションの予算）を確認します。
+通常のテストの実行では読み込まれるモジュールだけを確認します。インポート時間は
+環境変数 EXPIRED_FILE_REMOVER_IMPORT_TIME を指定した場合（make import-time）だけ、
+python -X importtime で別プロセスごとに計測し、最小値を予算と比較します。
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = str(Path(__file__).parent.parent / "src")
+
+# インポート時間の予算を確認するかどうかを指定する環境変数
+IMPORT_TIME_ENV = "EXPIRED_FILE_REMOVER_IMPORT_TIME"
+
+# インポート時間の予算（マイクロ秒）。標準ライブラリの読み込みを含む累積時間
+PACKAGE_IMPORT_BUDGET_US = 10_000
+CORE_IMPORT_BUDGET_US = 80_000
+
+# 基本的な削除処理では読み込まない任意の機能のモジュール
+OPTIONAL_MODULES = [
+    "numpy",
+    "ctypes",
+    "mmap",
+    "sqlite3",
+    "expired_file_remover.bulk",
+    "expired_file_remover.cache",
+    "expired_file_remover.checkpoint",
+    "expired_file_remover.distributed",
+    "expired_file_remover.errors",
+    "expired_file_remover.locking",
+    "expired_file_remover.manifest",
+    "expired_file_remover.profiling",
+    "expired_file_remover.progress",
+    "expired_file_remover.retention",
+    "expired_file_remover.store",
+    "expired_file_remover.timesource",
+    "expired_file_remover.watermark",
+]
+
+
+def _run(code, *args):
+    env = dict(os.environ, PYTHONPATH=SRC)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env.pop("EXPIRED_FILE_REMOVER_PROFILE", None)
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _loaded_modules(code):
+    """code を実行した後に読み込まれているモジュールの一覧を返す"""
+    output = _run(f"{code}\nimport sys\nprint('\\n'.join(sys.modules))").stdout
+    return set(output.split())
+
+
+def _import_time_us(module, runs=5):
+    """module のインポートにかかった累積時間（マイクロ秒）の最小値を返す"""
+    # バイトコードのキャッシュを作成してから計測する
+    _run(f"import {module}")
+    times = []
+    for _ in range(runs):
+        stderr = _run(f"import {module}", "-X", "importtime").stderr
+        for line in stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                times.append(int(fields[1]))
+    return min(times)
+
+
+class TestLazyImport:
+    def test_package_import_loads_no_submodules(self):
+        """パッケージのインポートだけではサブモジュールを読み込まない"""
+        loaded = _loaded_modules("import expired_file_remover")
+        assert {m for m in loaded if m.startswith("expired_file_remover.")} == set()
+
+    def test_package_import_skips_optional_modules(self):
+        """パッケージのインポートだけでは core も任意の機能のモジュールも読み込まない"""
+        loaded = _loaded_modules("import expired_file_remover")
+        assert "expired_file_remover.core" not in loaded
+        assert [m for m in OPTIONAL_MODULES if m in loaded] == []
+
+    def test_basic_api_skips_optional_modules(self):
+        """基本的な API を使用しても任意の機能のモジュールは読み込まない"""
+        loaded = _loaded_modules(
+            "import tempfile\n"
+            "import expired_file_remover as efr\n"
+            "with tempfile.TemporaryDirectory() as d:\n"
+            "    efr.remove_expired_files(d, 1, recursive=True)"
+        )
+        assert "expired_file_remover.core" in loaded
+        assert [m for m in OPTIONAL_MODULES if m in loaded] == []
+
+    def test_public_api(self):
+        """公開 API は遅延インポートで参照でき、未知の名前はAttributeErrorになる"""
+        import expired_file_remover
+        from expired_file_remover.core import remove_expired_files
+        from expired_file_remover.result import RemovalResult
+
+        assert expired_file_remover.remove_expired_files is remove_expired_files
+        assert expired_file_remover.RemovalResult is RemovalResult
+        assert set(expired_file_remover.__all__) <= set(dir(expired_file_remover))
+        with pytest.raises(AttributeError):
+            expired_file_remover.no_such_name
+
+
+@pytest.mark.skipif(
+    IMPORT_TIME_ENV not in os.environ,
+    reason=f"{IMPORT_TIME_ENV} を指定した場合のみ実行する（make import-time）",
+)
+class TestImportTimeBudget:
+    def test_package_import_budget(self):
+        """パッケージのインポート時間が予算内に収まる"""
+        assert _import_time_us("expired_file_remover") < PACKAGE_IMPORT_BUDGET_US
+
+    def test_core_import_budget(self):
+        """core のインポート時間が予算内に収まる"""
+        assert _import_time_us("expired_file_remover.core") < CORE_IMPORT_BUDGET_US
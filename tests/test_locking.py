@@ -0,0 +1,187 @@
+"""
+並行して動作する他のプロセスと安全に削除する機能のテスト
+"""
+
+import fcntl
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from expired_file_remover.core import (
+    remove_expired_files,
+    remove_expired_files_by_filename_date,
+)
+from expired_file_remover.locking import DeletionGuard, RootLock, RootLockedError
+from expired_file_remover.retention import remove_all_but_newest
+from expired_file_remover.store import (
+    CandidateStore,
+    remove_candidates,
+    scan_expired_files,
+)
+
+from .conftest import make_old_file
+
+
+@pytest.fixture
+def locked_file(tmp_path):
+    """他のプロセスが flock でロックしているファイル"""
+    path = tmp_path / "locked_20000101.log"
+    make_old_file(path)
+    with open(path, "rb") as f:
+        fcntl.flock(f, fcntl.LOCK_SH)
+        yield path
+
+
+class TestRootLock:
+    def test_exclusive(self, tmp_path):
+        """同じルートのロックは同時に1つだけ取得できる"""
+        with RootLock(tmp_path) as lock:
+            assert lock.locked
+            with pytest.raises(RootLockedError):
+                RootLock(tmp_path).acquire()
+        with RootLock(tmp_path):
+            pass
+        assert list(tmp_path.iterdir()) == []
+
+    def test_remove_while_locked(self, tmp_path):
+        """他のクリーンアップが処理中のツリーでは何も削除しない"""
+        make_old_file(tmp_path / "a_20000101.log")
+        with RootLock(tmp_path):
+            with pytest.raises(RootLockedError):
+                remove_expired_files(tmp_path, 10, root_lock=True)
+            with pytest.raises(RootLockedError):
+                remove_expired_files_by_filename_date(
+                    tmp_path, "%Y%m%d", 10, root_lock=True
+                )
+            with pytest.raises(RootLockedError):
+                remove_all_but_newest(tmp_path, 1, root_lock=True)
+
+        assert (tmp_path / "a_20000101.log").exists()
+        assert remove_expired_files(tmp_path, 10, root_lock=True) == 1
+
+    def test_lock_file(self, tmp_path):
+        """lock_file を指定した場合はそのファイルをロックする"""
+        root = tmp_path / "data"
+        root.mkdir()
+        make_old_file(root / "a.log")
+        lock_file = tmp_path / "cleanup.lock"
+
+        with RootLock(root, lock_file):
+            with pytest.raises(RootLockedError):
+                remove_expired_files(root, 10, root_lock=lock_file)
+            # ディレクトリのロックとは独立している
+            assert remove_expired_files(root, 10, root_lock=True) == 1
+        assert lock_file.exists()
+
+
+class TestRecheck:
+    def test_rewritten_after_scan(self, tmp_path):
+        """走査した後に書き換えられたファイルや置き換えられたファイルは削除しない"""
+        for name in ["kept.log", "rewritten.log", "replaced.log"]:
+            make_old_file(tmp_path / name, data=b"old")
+        store = scan_expired_files(tmp_path, 10)
+
+        with open(tmp_path / "rewritten.log", "ab") as f:
+            f.write(b"new")
+        stamp = os.stat(tmp_path / "replaced.log").st_mtime_ns
+        (tmp_path / "replaced.log").unlink()
+        (tmp_path / "placeholder").touch()
+        (tmp_path / "replaced.log").write_bytes(b"new")
+        os.utime(tmp_path / "replaced.log", ns=(stamp, stamp))
+
+        result = remove_candidates(store)
+
+        assert result == 1
+        assert result.skipped == 2
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "placeholder",
+            "replaced.log",
+            "rewritten.log",
+        ]
+
+    def test_without_recheck(self, tmp_path):
+        """recheck=False や inode を記録していないファイルは確認せずに削除する"""
+        make_old_file(tmp_path / "a.log")
+        store = scan_expired_files(tmp_path, 10)
+        (tmp_path / "a.log").write_bytes(b"new")
+        assert remove_candidates(store, recheck=False) == 1
+
+        manual = CandidateStore()
+        manual.append(tmp_path, "b.log", 0.0, 0)
+        (tmp_path / "b.log").write_bytes(b"new")
+        assert remove_candidates(manual) == 1
+        assert list(tmp_path.iterdir()) == []
+
+    def test_missing_file(self, tmp_path):
+        """すでに存在しないファイルは skipped に数える"""
+        make_old_file(tmp_path / "a.log")
+        store = scan_expired_files(tmp_path, 10)
+        (tmp_path / "a.log").unlink()
+
+        result = remove_candidates(store)
+        assert (result, result.skipped, result.errors) == (0, 1, None)
+
+    def test_remove_expired_files(self, tmp_path):
+        """判定の stat の後に書き換えられたファイルは削除しない"""
+        make_old_file(tmp_path / "busy.log")
+        make_old_file(tmp_path / "idle.log")
+        real_stat = Path.stat
+
+        def stat_then_write(self, **kwargs):
+            st = real_stat(self, **kwargs)
+            if self.name == "busy.log":
+                with open(self, "ab") as f:
+                    f.write(b"appended")
+            return st
+
+        with patch.object(Path, "stat", stat_then_write):
+            result = remove_expired_files(tmp_path, 10, recheck=True)
+
+        assert (result, result.skipped) == (1, 1)
+        assert [p.name for p in tmp_path.iterdir()] == ["busy.log"]
+
+    def test_guard_reuses_directory_fd(self, tmp_path):
+        """同じディレクトリのファイルは fd を開き直さずに確認する"""
+        for name in ["a", "b", "c"]:
+            (tmp_path / name).touch()
+
+        with (
+            DeletionGuard(lock_probe=True) as guard,
+            patch("os.open", wraps=os.open) as opened,
+        ):
+            for name in ["a", "b", "c"]:
+                assert guard.allows(str(tmp_path), name)
+
+        directory_opens = [
+            c for c in opened.call_args_list if c.args[0] == str(tmp_path)
+        ]
+        assert len(directory_opens) == 1
+
+
+class TestLockProbe:
+    def test_skip_locked_files(self, locked_file):
+        """他のプロセスがロックしているファイルは削除しない"""
+        make_old_file(locked_file.parent / "free_20000101.log")
+
+        result = remove_expired_files(locked_file.parent, 10, lock_probe=True)
+
+        assert (result, result.skipped) == (1, 1)
+        assert locked_file.exists()
+        # ロックの確認で取得した排他ロックは残さない
+        with open(locked_file, "rb") as f:
+            fcntl.flock(f, fcntl.LOCK_SH | fcntl.LOCK_NB)
+
+    def test_filename_date_and_retention(self, locked_file):
+        """ファイル名の日付による削除と remove_all_but_newest でもロックを確認する"""
+        make_old_file(locked_file.parent / "locked_20000102.log")
+
+        result = remove_all_but_newest(locked_file.parent, 1, "%Y%m%d", lock_probe=True)
+        assert (result, result.skipped) == (0, 1)
+
+        result = remove_expired_files_by_filename_date(
+            locked_file.parent, "%Y%m%d", 10, lock_probe=True
+        )
+        assert (result, result.skipped) == (1, 1)
+        assert [p.name for p in locked_file.parent.iterdir()] == [locked_file.name]
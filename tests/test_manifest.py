@@ -0,0 +1,333 @@
+"""
+削除マニフェストのテスト
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from expired_file_remover.core import (
+    remove_expired_files,
+    remove_expired_files_by_filename_date,
+)
+from expired_file_remover.manifest import (
+    _FLAG_FINALIZED,
+    HEADER_SIZE,
+    RECORD_SIZE,
+    Manifest,
+    ManifestWriter,
+    replay_manifest,
+)
+from expired_file_remover.store import scan_expired_files
+
+
+class _Crash(Exception):
+    """強制終了を再現するための例外"""
+
+
+def _make_file(path, days_old, size=0):
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - days_old * 86400
+    os.utime(path, (mtime, mtime))
+
+
+class TestManifestFormat:
+    def test_round_trip(self, tmp_path):
+        """書き込んだレコードを読み込める"""
+        manifest_path = tmp_path / "run.manifest"
+        with ManifestWriter(manifest_path) as writer:
+            writer.add("/data/a.log", 100.0, 10, 200.0)
+            writer.add("/data/日本語.log", 50.5, 20)
+            assert len(writer) == 2
+        assert not (tmp_path / "run.manifest.strings").exists()
+
+        with Manifest(manifest_path) as manifest:
+            assert len(manifest) == 2
+            first, second = manifest
+            assert str(first.path) == "/data/a.log"
+            assert (first.mtime, first.size, first.deleted_at) == (100.0, 10, 200.0)
+            assert str(second.path) == "/data/日本語.log"
+            assert second.deleted_at is None
+            assert manifest[-1] == second
+            with pytest.raises(IndexError):
+                manifest[2]
+
+    def test_fixed_size_records(self, tmp_path):
+        """レコードは固定長で、文字列はレコードの後ろにまとめて置かれる"""
+        manifest_path = tmp_path / "run.manifest"
+        with ManifestWriter(manifest_path) as writer:
+            for i in range(3):
+                writer.add(f"/data/{i}.log", 0.0, 0)
+        data = manifest_path.read_bytes()
+        strings_offset = HEADER_SIZE + 3 * RECORD_SIZE
+        assert data[strings_offset : strings_offset + 11] == b"/data/0.log"
+
+    def test_find_and_contains(self, tmp_path):
+        """インデックスからパスを検索できる"""
+        manifest_path = tmp_path / "run.manifest"
+        with ManifestWriter(manifest_path) as writer:
+            for i in range(1000):
+                writer.add(f"/data/{i:04d}.log", float(i), i)
+
+        with Manifest(manifest_path) as manifest:
+            assert manifest.find("/data/0500.log") == 500
+            assert "/data/0999.log" in manifest
+            assert "/data/1000.log" not in manifest
+            assert manifest.find("/data/../data/0001.log") == 1
+
+    def test_empty_manifest(self, tmp_path):
+        """0件のマニフェストも読み込める"""
+        manifest_path = tmp_path / "run.manifest"
+        ManifestWriter(manifest_path).close()
+        with Manifest(manifest_path) as manifest:
+            assert len(manifest) == 0
+            assert "/data/a.log" not in manifest
+
+    def test_incomplete_manifest(self, tmp_path):
+        """close されていないマニフェストはValueErrorになる"""
+        manifest_path = tmp_path / "run.manifest"
+        writer = ManifestWriter(manifest_path)
+        writer.add("/data/a.log", 0.0, 0)
+        writer._records.flush()
+        with pytest.raises(ValueError):
+            Manifest(manifest_path)
+        writer.close()
+
+    def test_append_keeps_existing_records(self, tmp_path):
+        """append=True で開くと完成したマニフェストのレコードを残して追記する"""
+        manifest_path = tmp_path / "run.manifest"
+        with ManifestWriter(manifest_path) as writer:
+            writer.add("/data/a.log", 1.0, 10, 2.0)
+            writer.add("/data/b.log", 3.0, 20, 4.0)
+        with ManifestWriter(manifest_path, append=True) as writer:
+            assert len(writer) == 2
+            writer.add("/data/c.log", 5.0, 30, 6.0)
+
+        with Manifest(manifest_path) as manifest:
+            assert [str(e.path) for e in manifest] == [
+                "/data/a.log",
+                "/data/b.log",
+                "/data/c.log",
+            ]
+            assert manifest.find("/data/b.log") == 1
+            assert manifest[0].size == 10
+
+    def test_recover_killed_writer(self, tmp_path):
+        """close されずに終了したマニフェストは文字列まで書き込まれたレコードを復旧する"""
+        manifest_path = tmp_path / "run.manifest"
+        strings_path = tmp_path / "run.manifest.strings"
+        writer = ManifestWriter(manifest_path)
+        for name in ["a", "b", "c"]:
+            writer.add(f"/data/{name}.log", 0.0, 0, 1.0)
+        # 強制終了を再現する: close せずにファイルを閉じ、最後の文字列を途中で切る
+        writer._records.close()
+        writer._strings.close()
+        os.truncate(strings_path, strings_path.stat().st_size - 3)
+        with pytest.raises(ValueError):
+            Manifest(manifest_path)
+
+        ManifestWriter(manifest_path, append=True).close()
+
+        with Manifest(manifest_path) as manifest:
+            assert [str(e.path) for e in manifest] == ["/data/a.log", "/data/b.log"]
+        assert not strings_path.exists()
+
+    def test_recover_interrupted_close(self, tmp_path, monkeypatch):
+        """完成したヘッダーを書き込む前に close が中断されてもレコードを復旧できる"""
+        manifest_path = tmp_path / "run.manifest"
+        strings_path = tmp_path / "run.manifest.strings"
+        writer = ManifestWriter(manifest_path, append=True)
+        for name in ["a", "b", "c"]:
+            writer.add(f"/data/{name}.log", 0.0, 0, 1.0)
+
+        write_header = ManifestWriter._write_header
+
+        def crash(self, flags, *args):
+            if flags & _FLAG_FINALIZED:
+                raise _Crash()
+            write_header(self, flags, *args)
+
+        monkeypatch.setattr(ManifestWriter, "_write_header", crash)
+        with pytest.raises(_Crash):
+            writer.close()
+        writer._records.close()
+        writer._strings.close()
+        monkeypatch.undo()
+        assert strings_path.exists()
+
+        ManifestWriter(manifest_path, append=True).close()
+
+        with Manifest(manifest_path) as manifest:
+            assert [str(e.path) for e in manifest] == [
+                "/data/a.log",
+                "/data/b.log",
+                "/data/c.log",
+            ]
+
+    def test_recover_interrupted_reopen(self, tmp_path, monkeypatch):
+        """完成したマニフェストを開き直す途中で終了しても、ヘッダーを信じて壊さない"""
+        manifest_path = tmp_path / "run.manifest"
+        with ManifestWriter(manifest_path) as writer:
+            writer.add("/data/a.log", 0.0, 0, 1.0)
+            writer.add("/data/b.log", 0.0, 0, 1.0)
+        inode = manifest_path.stat().st_ino
+        fsync = os.fsync
+
+        def crash(fd):
+            fsync(fd)
+            if os.fstat(fd).st_ino == inode:
+                # ヘッダーを書き込んだ直後、切り詰める前に強制終了されたことにする
+                raise _Crash()
+
+        monkeypatch.setattr(os, "fsync", crash)
+        with pytest.raises(_Crash):
+            ManifestWriter(manifest_path, append=True)
+        monkeypatch.undo()
+        with pytest.raises(ValueError):
+            Manifest(manifest_path)
+
+        with ManifestWriter(manifest_path, append=True) as writer:
+            writer.add("/data/c.log", 0.0, 0, 1.0)
+
+        with Manifest(manifest_path) as manifest:
+            assert [str(e.path) for e in manifest] == [
+                "/data/a.log",
+                "/data/b.log",
+                "/data/c.log",
+            ]
+
+    def test_append_rejects_other_files(self, tmp_path):
+        """append=True でもマニフェストではないファイルは上書きしない"""
+        other = tmp_path / "other.bin"
+        other.write_bytes(b"x" * 200)
+        with pytest.raises(ValueError):
+            ManifestWriter(other, append=True)
+        assert other.read_bytes() == b"x" * 200
+
+    def test_not_a_manifest(self, tmp_path):
+        """マニフェストではないファイルはValueErrorになる"""
+        other = tmp_path / "other.bin"
+        other.write_bytes(b"x" * 200)
+        with pytest.raises(ValueError):
+            Manifest(other)
+
+    def test_difference(self, tmp_path):
+        """次回の候補のうちマニフェストにないものだけを返す"""
+        manifest_path = tmp_path / "run.manifest"
+        with ManifestWriter(manifest_path) as writer:
+            writer.add("/data/a.log", 0.0, 0)
+            writer.add("/data/b.log", 0.0, 0)
+
+        with Manifest(manifest_path) as manifest:
+            new = list(manifest.difference(["/data/a.log", "/data/c.log"]))
+        assert [str(p) for p in new] == ["/data/c.log"]
+
+    def test_export_ndjson(self, tmp_path):
+        """1行1件の JSON として書き出せる"""
+        manifest_path = tmp_path / "run.manifest"
+        with ManifestWriter(manifest_path) as writer:
+            writer.add("/data/a.log", 1.5, 10, 2.5)
+            writer.add("/data/b.log", 3.0, 20)
+
+        output = tmp_path / "run.ndjson"
+        with Manifest(manifest_path) as manifest:
+            assert manifest.export_ndjson(output) == 2
+        lines = [json.loads(line) for line in output.read_text().splitlines()]
+        assert lines == [
+            {"path": "/data/a.log", "mtime": 1.5, "size": 10, "deleted_at": 2.5},
+            {"path": "/data/b.log", "mtime": 3.0, "size": 20, "deleted_at": None},
+        ]
+
+
+class TestRemovalManifest:
+    def test_remove_expired_files_records_deletions(self, tmp_path):
+        """remove_expired_files で削除したファイルが記録される"""
+        data = tmp_path / "data"
+        data.mkdir()
+        _make_file(data / "old.log", 10, size=5)
+        _make_file(data / "new.log", 1)
+        manifest_path = tmp_path / "run.manifest"
+
+        count = remove_expired_files(data, 5, manifest=manifest_path)
+
+        assert count == 1
+        with Manifest(manifest_path) as manifest:
+            (entry,) = manifest
+            assert entry.path == (data / "old.log").absolute()
+            assert entry.size == 5
+            assert entry.deleted_at is not None
+            assert (data / "new.log") not in manifest
+
+    def test_filename_date_records_deletions(self, tmp_path):
+        """remove_expired_files_by_filename_date で削除したファイルが記録される"""
+        data = tmp_path / "data"
+        data.mkdir()
+        (data / "log_20200101.txt").write_bytes(b"abc")
+        (data / "log_29991231.txt").touch()
+        manifest_path = tmp_path / "run.manifest"
+
+        result = remove_expired_files_by_filename_date(
+            data, "%Y%m%d", 1, manifest=manifest_path
+        )
+
+        assert result == 1
+        assert result.deleted_bytes == 3
+        with Manifest(manifest_path) as manifest:
+            assert [e.path.name for e in manifest] == ["log_20200101.txt"]
+
+    def test_resumed_run_appends(self, tmp_path):
+        """resume_token で再開した実行は前回の記録を残して追記する"""
+        data = tmp_path / "data"
+        data.mkdir()
+        for i in range(6):
+            _make_file(data / f"old{i}.log", 10)
+        manifest_path = tmp_path / "run.manifest"
+
+        first = remove_expired_files(data, 5, max_deletions=3, manifest=manifest_path)
+        second = remove_expired_files(
+            data, 5, resume_token=first.resume_token, manifest=manifest_path
+        )
+
+        assert (first, second) == (3, 3)
+        with Manifest(manifest_path) as manifest:
+            assert sorted(e.path.name for e in manifest) == [
+                f"old{i}.log" for i in range(6)
+            ]
+
+
+class TestReplayManifest:
+    def test_replay_plan(self, tmp_path):
+        """削除予定として記録したファイルを後から削除できる"""
+        _make_file(tmp_path / "old1.log", 10, size=3)
+        _make_file(tmp_path / "old2.log", 10, size=4)
+        _make_file(tmp_path / "new.log", 1)
+        manifest_path = tmp_path / "plan.manifest"
+        with ManifestWriter(manifest_path) as writer:
+            for record in scan_expired_files(tmp_path, 5):
+                writer.add(record.path, record.mtime, record.size)
+
+        result = replay_manifest(manifest_path)
+
+        assert result == 2
+        assert result.deleted_bytes == 7
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "new.log",
+            "plan.manifest",
+        ]
+
+    def test_replay_skips_changed_and_missing_files(self, tmp_path):
+        """記録後に変更・削除されたファイルは削除しない"""
+        _make_file(tmp_path / "changed.log", 10)
+        _make_file(tmp_path / "gone.log", 10)
+        manifest_path = tmp_path / "plan.manifest"
+        with ManifestWriter(manifest_path) as writer:
+            for record in scan_expired_files(tmp_path, 5):
+                writer.add(record.path, record.mtime, record.size)
+        (tmp_path / "changed.log").write_text("rewritten")
+        (tmp_path / "gone.log").unlink()
+
+        assert replay_manifest(manifest_path) == 0
+        assert (tmp_path / "changed.log").exists()
+        assert replay_manifest(manifest_path, verify=False) == 1
@@ -0,0 +1,124 @@
+"""
+削除処理の所要時間の計測のテスト
+"""
+
+import json
+
+import pytest
+
+from expired_file_remover.core import (
+    remove_expired_files,
+    remove_expired_files_by_filename_date,
+)
+from expired_file_remover.profiling import (
+    PROFILE_ENV,
+    TRACE_ENV,
+    LatencyHistogram,
+    Profiler,
+    resolve_profiler,
+)
+
+from .conftest import make_old_file
+
+
+class TestLatencyHistogram:
+    def test_percentile(self):
+        """パーセンタイルはバケットの上限を返す"""
+        histogram = LatencyHistogram()
+        for duration in [100] * 99 + [1_000_000]:
+            histogram.add(duration)
+
+        assert histogram.count == 100
+        assert histogram.percentile(50) == 128
+        assert histogram.percentile(100) == 1_000_000
+        assert LatencyHistogram().percentile(50) == 0
+
+
+class TestProfiler:
+    def test_slowest_keeps_top_n(self):
+        """最も時間のかかった呼び出しを上位 N 件だけ保持する"""
+        profiler = Profiler(slowest=2)
+        for i, duration in enumerate([10, 50, 30, 40]):
+            profiler.record("stat", f"f{i}", 0, duration)
+
+        assert [(op, path) for op, path, _ in profiler.slowest()] == [
+            ("stat", "f1"),
+            ("stat", "f3"),
+        ]
+        assert profiler.dominant() == "stat"
+
+    def test_max_events(self):
+        """上限を超えたイベントはトレースに記録せず集計だけを行う"""
+        profiler = Profiler(max_events=1)
+        profiler.record("unlink", "a", 0, 1)
+        profiler.record("unlink", "b", 0, 1)
+
+        assert profiler.histograms["unlink"].count == 2
+        assert profiler.dropped_events == 1
+
+    def test_resolve_from_env(self, monkeypatch, tmp_path):
+        """環境変数で有効化できる"""
+        monkeypatch.delenv(PROFILE_ENV, raising=False)
+        assert resolve_profiler(None) is None
+        monkeypatch.setenv(PROFILE_ENV, "0")
+        assert resolve_profiler(None) is None
+
+        monkeypatch.setenv(PROFILE_ENV, "1")
+        monkeypatch.setenv(TRACE_ENV, str(tmp_path / "trace.json"))
+        profiler = resolve_profiler(None)
+        assert profiler is not None
+        assert profiler.trace_file == tmp_path / "trace.json"
+
+        explicit = Profiler()
+        assert resolve_profiler(explicit) is explicit
+
+    def test_invalid_slowest(self):
+        """slowest が負の場合はValueErrorになる"""
+        with pytest.raises(ValueError):
+            Profiler(slowest=-1)
+
+
+class TestProfiledRuns:
+    def test_mtime_run(self, tmp_path):
+        """更新日時による削除で scandir・stat・unlink を記録し、トレースを書き込む"""
+        root = tmp_path / "root"
+        (root / "sub").mkdir(parents=True)
+        for path in (root / "a.log", root / "b.log", root / "sub" / "c.log"):
+            make_old_file(path)
+        trace_file = tmp_path / "trace.json"
+        profiler = Profiler(trace_file=trace_file)
+
+        result = remove_expired_files(root, 10, recursive=True, profile=profiler)
+
+        assert result == 3
+        assert profiler.histograms["scandir"].count == 2
+        assert profiler.histograms["stat"].count == 3
+        assert profiler.histograms["unlink"].count == 3
+        events = json.loads(trace_file.read_text())["traceEvents"]
+        assert {e["name"] for e in events} == {"scandir", "stat", "unlink"}
+        assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+
+    def test_filename_date_run(self, tmp_path):
+        """ファイル名の日付による削除で正規表現のマッチと日付の組み立てを記録する"""
+        for name in ["log_20200101.txt", "log_29991231.txt", "README"]:
+            (tmp_path / name).touch()
+        profiler = Profiler()
+
+        result = remove_expired_files_by_filename_date(
+            tmp_path, "%Y%m%d", 1, profile=profiler
+        )
+
+        assert result == 1
+        assert profiler.histograms["match"].count == 3
+        assert profiler.histograms["parse"].count == 2
+        assert profiler.histograms["unlink"].count == 1
+        assert "match" in profiler.summary()
+
+    def test_env_prints_summary(self, tmp_path, monkeypatch, capsys):
+        """環境変数で有効化した場合は集計を標準エラー出力に書き出す"""
+        make_old_file(tmp_path / "a.log")
+        monkeypatch.setenv(PROFILE_ENV, "1")
+        monkeypatch.delenv(TRACE_ENV, raising=False)
+
+        assert remove_expired_files(tmp_path, 10) == 1
+        assert "unlink" in capsys.readouterr().err
@@ -0,0 +1,95 @@
+"""
+進捗報告機能のテスト
+"""
+
+import io
+from typing import List
+from unittest.mock import patch
+
+from expired_file_remover.core import remove_expired_files
+from expired_file_remover.progress import (
+    ProgressReport,
+    ProgressReporter,
+    TTYProgressBar,
+)
+
+
+def _make_tree(root, dirs=4, files=5):
+    for d in range(dirs):
+        sub = root / f"d{d}"
+        sub.mkdir()
+        for f in range(files):
+            (sub / f"f{f}.txt").touch()
+
+
+class TestProgressReporter:
+    def test_final_report(self, tmp_path):
+        """走査の終了時に最終的な進捗が報告される"""
+        _make_tree(tmp_path)
+        reports: List[ProgressReport] = []
+        remove_expired_files(tmp_path, 5, recursive=True, progress=reports.append)
+
+        final = reports[-1]
+        assert final.finished
+        assert final.scanned == 20
+        assert final.deleted == 0
+        assert final.fraction == 1.0
+
+    def test_time_based_cadence(self, tmp_path):
+        """コールバックは報告間隔ごとにのみ呼び出される"""
+        _make_tree(tmp_path)
+        reports: List[ProgressReport] = []
+        remove_expired_files(
+            tmp_path,
+            5,
+            recursive=True,
+            progress=reports.append,
+            progress_interval=3600,
+        )
+        assert len(reports) == 1
+
+    def test_poll_stride_follows_rate(self, tmp_path):
+        """poll の間隔は走査速度に応じて広がる"""
+        reporter = ProgressReporter(lambda r: None, interval=1.0)
+        with patch("expired_file_remover.progress.time.monotonic") as mock_time:
+            mock_time.return_value = 0.0
+            reporter.start(tmp_path, recursive=False)
+            mock_time.return_value = 0.01
+            walker = type("W", (), {"current": tmp_path, "pending": []})()
+            reporter.poll(walker, 1000, 0, 0)
+        # 100000件/秒 の速度なので1報告間隔あたり約8回の poll になる
+        assert reporter.next_check == 1000 + 12500
+
+    def test_eta_from_top_level_directories(self, tmp_path):
+        """第1階層のディレクトリ数から進捗率とETAを推定する"""
+        _make_tree(tmp_path)
+        reporter = ProgressReporter(lambda r: None)
+        reporter.start(tmp_path, recursive=True)
+        walker = type(
+            "W",
+            (),
+            {"current": tmp_path / "d1", "pending": [tmp_path / "d3", tmp_path / "d2"]},
+        )()
+        assert reporter._estimate_fraction(walker) == (4 - 2 - 0.5) / 4
+
+
+class TestTTYProgressBar:
+    def test_non_tty_output(self):
+        """端末以外では1報告につき1行を出力する"""
+        stream = io.StringIO()
+        bar = TTYProgressBar(stream, width=10)
+        bar(
+            ProgressReport(
+                scanned=100,
+                deleted=10,
+                deleted_bytes=1024**2,
+                current_dir=None,
+                elapsed=2.0,
+                rate=50.0,
+                fraction=0.5,
+                eta=61.0,
+            )
+        )
+        assert stream.getvalue() == (
+            "[#####-----]  50.0% 走査 100 削除 10 (1.0MiB) 50件/秒 ETA 00:01:01\n"
+        )
@@ -0,0 +1,112 @@
+"""
+グループごとに新しいファイルを残す削除のテスト
+"""
+
+import os
+import random
+import time
+from unittest.mock import patch
+
+import pytest
+
+from expired_file_remover import retention
+from expired_file_remover.retention import remove_all_but_newest
+
+
+def _names(directory):
+    return sorted(p.name for p in directory.iterdir())
+
+
+class TestKeepNewestByFilenameDate:
+    def test_keeps_newest_per_prefix(self, tmp_path):
+        """ファイル名の日付より前の部分ごとに新しいものを残す"""
+        days = [f"202401{d:02d}" for d in range(1, 11)]
+        names = [f"{db}_{day}.dump" for db in ("sales", "users") for day in days]
+        random.Random(0).shuffle(names)
+        for name in names:
+            (tmp_path / name).touch()
+        (tmp_path / "README").touch()
+
+        result = remove_all_but_newest(tmp_path, 3, "%Y%m%d")
+
+        assert result == 14
+        assert _names(tmp_path) == [
+            "README",
+            "sales_20240108.dump",
+            "sales_20240109.dump",
+            "sales_20240110.dump",
+            "users_20240108.dump",
+            "users_20240109.dump",
+            "users_20240110.dump",
+        ]
+
+    def test_groups_are_per_directory(self, tmp_path):
+        """既定のグループはディレクトリごとに分かれる"""
+        for sub in ("a", "b"):
+            (tmp_path / sub).mkdir()
+            for day in ("20240101", "20240102"):
+                (tmp_path / sub / f"db_{day}.dump").touch()
+
+        assert remove_all_but_newest(tmp_path, 1, "%Y%m%d", recursive=True) == 2
+        assert _names(tmp_path / "a") == _names(tmp_path / "b") == ["db_20240102.dump"]
+
+    def test_custom_group_by(self, tmp_path):
+        """group_by で任意のキーによりグループ分けでき、Noneのファイルは残す"""
+        for name in ["x-1_20240101", "x-2_20240102", "y_20240103", "z_20240101"]:
+            (tmp_path / name).touch()
+
+        result = remove_all_but_newest(
+            tmp_path,
+            1,
+            "%Y%m%d",
+            group_by=lambda p: None if p.name.startswith("z") else p.name[0],
+        )
+
+        assert result == 1
+        assert _names(tmp_path) == ["x-2_20240102", "y_20240103", "z_20240101"]
+
+    def test_no_stat_in_filename_mode(self, tmp_path):
+        """ファイル名の日付で判定する場合はファイルを stat しない"""
+        for day in range(1, 6):
+            (tmp_path / f"db_2024010{day}").touch()
+
+        with patch.object(os.DirEntry, "stat", side_effect=AssertionError):
+            assert remove_all_but_newest(tmp_path, 2, "%Y%m%d") == 3
+
+
+class TestKeepNewestByMtime:
+    def test_keeps_newest_mtime(self, tmp_path):
+        """更新日時で新しいものを残し、削除したサイズを集計する"""
+        now = time.time()
+        for i in range(5):
+            path = tmp_path / f"backup{i}.tar"
+            path.write_bytes(b"x" * 10)
+            os.utime(path, (now - i * 3600, now - i * 3600))
+
+        result = remove_all_but_newest(tmp_path, 2, file_filter=[".tar"])
+
+        assert result == 3
+        assert result.deleted_bytes == 30
+        assert _names(tmp_path) == ["backup0.tar", "backup1.tar"]
+
+    def test_memory_is_bounded_by_keep(self, tmp_path):
+        """各グループのヒープは keep 個を超えない"""
+        for i in range(50):
+            (tmp_path / f"f{i:02d}_202401{i % 28 + 1:02d}").touch()
+        sizes = []
+        real_heappush = retention.heapq.heappush
+
+        def recording_heappush(heap, item):
+            real_heappush(heap, item)
+            sizes.append(len(heap))
+
+        with patch.object(retention.heapq, "heappush", recording_heappush):
+            remove_all_but_newest(tmp_path, 4, "%Y%m%d", group_by=lambda p: "all")
+
+        assert max(sizes) == 4
+        assert len(_names(tmp_path)) == 4
+
+    def test_invalid_keep(self, tmp_path):
+        """keep が1未満の場合はValueErrorになる"""
+        with pytest.raises(ValueError):
+            remove_all_but_newest(tmp_path, 0)
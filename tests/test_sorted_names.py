@@ -0,0 +1,186 @@
+"""
+ファイル名の辞書順を利用した二分探索による削除のテスト
+"""
+
+from datetime import datetime
+from unittest.mock import patch
+
+from expired_file_remover.core import (
+    _bisect_candidates,
+    _DirectoryWalker,
+    _FilenameDateParser,
+    remove_expired_files_by_filename_date,
+)
+
+
+def _spool(tmp_path):
+    names = [f"spool_202401{d:02d}_120000.dat" for d in range(1, 31)]
+    names += ["README", "other_20200101.dat", "spool_latest.dat"]
+    for name in names:
+        (tmp_path / name).touch()
+    return names
+
+
+class TestLexicalOrdering:
+    def test_ordered_formats(self):
+        """年から秒の順に並ぶフォーマットのみ辞書順で比較できる"""
+        assert _FilenameDateParser("%Y%m%d_%H%M%S").lexically_ordered
+        assert _FilenameDateParser("%Y-%m-%d").lexically_ordered
+        assert not _FilenameDateParser("%m-%d-%Y").lexically_ordered
+        assert not _FilenameDateParser("%Y%m%d_%I%M").lexically_ordered
+        # 2桁の年は 99（1999年）が 25（2025年）より後ろに並ぶ
+        assert not _FilenameDateParser("%y%m%d").lexically_ordered
+
+
+class TestBisectCandidates:
+    def test_skips_names_after_cutoff(self, tmp_path):
+        """基準日時より後ろに並ぶ名前は解析対象から除外される"""
+        _spool(tmp_path)
+        parser = _FilenameDateParser("%Y%m%d_%H%M%S")
+        candidates = [
+            p.name
+            for p in _bisect_candidates(
+                _DirectoryWalker(tmp_path, False), [parser], datetime(2024, 1, 10)
+            )
+        ]
+        expected = [f"spool_202401{d:02d}_120000.dat" for d in range(1, 10)]
+        # パターンに合わない名前は通常の解析にフォールバックする
+        assert sorted(candidates) == sorted(
+            expected + ["README", "other_20200101.dat", "spool_latest.dat"]
+        )
+
+    def test_same_result_as_full_parse(self, tmp_path):
+        """二分探索を使っても削除されるファイルは通常の処理と同じ"""
+        _spool(tmp_path)
+        deadline = datetime(2024, 1, 10, 12, 0, 1)
+
+        real_parse = _FilenameDateParser.parse
+        parsed = []
+
+        def recording_parse(self, filename):
+            parsed.append(filename)
+            return real_parse(self, filename)
+
+        with patch.object(_FilenameDateParser, "parse", recording_parse):
+            deleted = remove_expired_files_by_filename_date(
+                tmp_path, "%Y%m%d_%H%M%S", deadline, sorted_names=True
+            )
+
+        assert deleted == 10  # 1日〜10日
+        # 基準日時より後ろの名前（11日〜30日）は解析されない
+        assert len(parsed) == 13
+        remaining = sorted(p.name for p in tmp_path.iterdir())
+        assert remaining == sorted(
+            [f"spool_202401{d:02d}_120000.dat" for d in range(11, 31)]
+            + ["README", "other_20200101.dat", "spool_latest.dat"]
+        )
+
+    def test_skipped_names_are_not_searched(self, tmp_path):
+        """除外する名前は接頭辞の直後からのマッチだけを確かめ、名前全体を検索しない"""
+        _spool(tmp_path)
+        parser = _FilenameDateParser("%Y%m%d_%H%M%S")
+        regex = parser.regex
+        searched = []
+
+        class CountingRegex:
+            def search(self, name):
+                searched.append(name)
+                return regex.search(name)
+
+            def match(self, name, pos):
+                return regex.match(name, pos)
+
+        with patch.object(parser, "regex", CountingRegex()):
+            list(
+                _bisect_candidates(
+                    _DirectoryWalker(tmp_path, False), [parser], datetime(2024, 1, 10)
+                )
+            )
+
+        # 接頭辞のグループの先頭とパターンに合わない名前だけを検索する
+        assert searched == [
+            "README",
+            "other_20200101.dat",
+            "spool_20240101_120000.dat",
+            "spool_latest.dat",
+        ]
+
+    def test_multiple_formats_do_not_skip(self, tmp_path):
+        """複数のフォーマットを指定した場合は除外せずにすべて解析する"""
+        (tmp_path / "a_20240101.dat").touch()
+        (tmp_path / "a_20991231_01-02-2020.dat").touch()
+        deleted = remove_expired_files_by_filename_date(
+            tmp_path, ["%Y%m%d", "%m-%d-%Y"], datetime(2024, 6, 1), sorted_names=True
+        )
+        assert deleted == 2
+
+
+def _deleted_names(directory, names, date_format, deadline, sorted_names):
+    directory.mkdir()
+    for name in names:
+        (directory / name).touch()
+    remove_expired_files_by_filename_date(
+        directory, date_format, deadline, sorted_names=sorted_names
+    )
+    return sorted(set(names) - {p.name for p in directory.iterdir()})
+
+
+class TestEquivalenceWithPlainScan:
+    def _assert_same(self, tmp_path, names, date_format, deadline):
+        plain = _deleted_names(tmp_path / "plain", names, date_format, deadline, False)
+        bisected = _deleted_names(
+            tmp_path / "sorted", names, date_format, deadline, True
+        )
+        assert bisected == plain
+        return plain
+
+    def test_two_digit_years(self, tmp_path):
+        """2桁の年のフォーマットでも通常の処理と同じファイルを削除する"""
+        names = ["bk_991231.dat", "bk_240101.dat", "bk_250601.dat", "bk_260101.dat"]
+
+        deleted = self._assert_same(tmp_path, names, "%y%m%d", datetime(2025, 1, 1))
+
+        assert deleted == ["bk_240101.dat", "bk_991231.dat"]
+
+    def test_date_after_prefix_group(self, tmp_path):
+        """接頭辞の直後に日付がない名前は、範囲内に並んでも解析して判定する"""
+        names = [
+            "log_20200101.dat",
+            "log_20250101.dat",
+            "log_3_20200101.dat",
+            "log_9_20991231.dat",
+            "log_99999999.dat",
+        ]
+
+        deleted = self._assert_same(tmp_path, names, "%Y%m%d", datetime(2024, 1, 1))
+
+        assert deleted == ["log_20200101.dat", "log_3_20200101.dat"]
+
+    def test_prefix_with_digits(self, tmp_path):
+        """接頭辞の中から日付が始まり得る名前も、通常の処理と同じファイルを削除する"""
+        names = [
+            "r2_20200101.dat",
+            "r2_20250101.dat",
+            "r2_20250101_2020.dat",
+            "r22020010199.dat",
+            "r220250101.dat",
+            "v1_20991231.dat",
+        ]
+
+        deleted = self._assert_same(tmp_path, names, "%Y%m%d", datetime(2024, 1, 1))
+
+        assert deleted == ["r2_20200101.dat"]
+
+    def test_literal_before_date(self, tmp_path):
+        """フォーマットの先頭にリテラルがある場合も通常の処理と同じファイルを削除する"""
+        names = [
+            "db-bk20200101.dat",
+            "db-bk20991231.dat",
+            "bk-bk20991231.dat",
+            "bk-bk20200101.dat",
+            "x_bk20250101_bk20200101.dat",
+        ]
+
+        deleted = self._assert_same(tmp_path, names, "bk%Y%m%d", datetime(2024, 1, 1))
+
+        assert deleted == ["bk-bk20200101.dat", "db-bk20200101.dat"]
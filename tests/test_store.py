@@ -0,0 +1,123 @@
+"""
+走査結果を詰めて保持する CandidateStore のテスト
+"""
+
+import os
+import time
+from contextlib import nullcontext
+from unittest.mock import patch
+
+import pytest
+
+from expired_file_remover.store import (
+    CandidateRecord,
+    CandidateStore,
+    scan_expired_files,
+)
+
+
+def _make_file(path, days_old, size=0):
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - days_old * 86400
+    os.utime(path, (mtime, mtime))
+    return mtime
+
+
+class TestCandidateStore:
+    def test_append_and_read(self):
+        """追加した値をビューから読み出せる"""
+        store = CandidateStore()
+        store.append("/data/a", "x.log", 100.0, 10)
+        store.append("/data/b", "日本語.log", 50.0, 20)
+        store.append("/data/a", "y.log", 75.5, 30)
+
+        assert len(store) == 3
+        assert store.directory_count == 2
+        assert store.total_size == 60
+        record = store[1]
+        assert isinstance(record, CandidateRecord)
+        assert record.name == "日本語.log"
+        assert record.directory == "/data/b"
+        assert str(record.path) == "/data/b/日本語.log"
+        assert record.mtime == 50.0
+        assert record.size == 20
+        assert store[-1].name == "y.log"
+        with pytest.raises(IndexError):
+            store[3]
+
+    def test_undecodable_name(self):
+        """UTF-8 として不正なファイル名もそのまま復元できる"""
+        store = CandidateStore()
+        name = os.fsdecode(b"bad\xffname")
+        store.append("/data", name, 0.0, 0)
+        assert store[0].name == name
+
+    def test_record_has_no_dict(self):
+        """ビューは __slots__ のみを持つ"""
+        store = CandidateStore()
+        store.append("/d", "f", 0.0, 0)
+        assert not hasattr(store[0], "__dict__")
+
+    @pytest.mark.parametrize("numpy_available", [True, False])
+    def test_sorted_indices(self, numpy_available):
+        """更新日時・サイズ・パスで並べ替えられる"""
+        store = CandidateStore()
+        store.append("/b", "1", 30.0, 1)
+        store.append("/a", "2", 10.0, 3)
+        store.append("/a", "1", 20.0, 3)
+
+        target = "expired_file_remover.store._load_numpy"
+        with nullcontext() if numpy_available else patch(target, return_value=None):
+            assert list(store.sorted_indices("mtime")) == [1, 2, 0]
+            assert list(store.sorted_indices("mtime", reverse=True)) == [0, 2, 1]
+            assert list(store.sorted_indices("size")) == [0, 1, 2]
+            assert list(store.sorted_indices("size", reverse=True)) == [1, 2, 0]
+        assert list(store.sorted_indices("path")) == [2, 1, 0]
+        assert [r.mtime for r in store.iter_sorted()] == [10.0, 20.0, 30.0]
+
+    def test_invalid_sort_key(self):
+        """不正なキーはValueErrorになる"""
+        with pytest.raises(ValueError):
+            CandidateStore().sorted_indices("name")
+
+    def test_compact_per_file_memory(self):
+        """1件あたりのメモリ量は数十バイトに収まる"""
+        store = CandidateStore()
+        for i in range(10000):
+            store.append(f"/data/{i % 10}", f"file_{i:08d}.log", float(i), i)
+        assert store.nbytes / len(store) < 64
+
+
+class TestScanExpiredFiles:
+    def test_collects_expired_files(self, tmp_path):
+        """期限切れのファイルだけを削除せずに集める"""
+        old = _make_file(tmp_path / "old.log", 10, size=5)
+        _make_file(tmp_path / "new.log", 1)
+        sub = tmp_path / "sub"
+        sub.mkdir()
+        _make_file(sub / "old.txt", 20, size=7)
+
+        store = scan_expired_files(tmp_path, 5, recursive=True)
+
+        assert sorted(p.name for p in store.paths()) == ["old.log", "old.txt"]
+        assert store.total_size == 12
+        assert (tmp_path / "old.log").exists()
+        oldest = next(store.iter_sorted())
+        assert oldest.name == "old.txt"
+        mtimes = {r.name: r.mtime for r in store}
+        assert mtimes["old.log"] == pytest.approx(old)
+
+    def test_file_filter(self, tmp_path):
+        """file_filter に一致する拡張子のファイルだけを集める"""
+        _make_file(tmp_path / "old.log", 10)
+        _make_file(tmp_path / "old.txt", 10)
+        _make_file(tmp_path / "noext", 10)
+
+        store = scan_expired_files(tmp_path, 5, file_filter=[".log"])
+
+        assert [r.name for r in store] == ["old.log"]
+
+    def test_missing_directory(self, tmp_path):
+        """存在しないディレクトリはFileNotFoundErrorになる"""
+        with pytest.raises(FileNotFoundError):
+            scan_expired_files(tmp_path / "missing", 5)
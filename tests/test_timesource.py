@@ -0,0 +1,125 @@
+"""
+判定に使用する時刻の選択のテスト
+"""
+
+import os
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from expired_file_remover import timesource
+from expired_file_remover.core import is_expired, remove_expired_files
+from expired_file_remover.timesource import TimeSource, statx
+
+DAY = 24 * 60 * 60
+
+
+def _set_times(path, atime_days_ago, mtime_days_ago):
+    now = time.time()
+    os.utime(path, (now - atime_days_ago * DAY, now - mtime_days_ago * DAY))
+
+
+class TestTimeSource:
+    def test_combine_max_and_min(self):
+        """複数の時刻の最大値・最小値を選択できる"""
+        st = os.stat_result((0,) * 10, {"st_atime": 10.0, "st_mtime": 20.0})
+        assert TimeSource(["atime", "mtime"]).select(st) == 20.0
+        assert TimeSource(["atime", "mtime"], "min").select(st) == 10.0
+        assert TimeSource("atime").select(st) == 10.0
+
+    def test_missing_birthtime(self):
+        """作成日時を取得できない場合は作成日時を除いて判定する"""
+        st = os.stat_result((0,) * 10, {"st_mtime": 20.0})
+        assert TimeSource("birthtime").select(st) is None
+        assert TimeSource(["birthtime", "mtime"]).select(st) == 20.0
+        assert TimeSource(["birthtime", "mtime"]).select(st, 5.0) == 20.0
+        assert TimeSource(["birthtime", "mtime"], "min").select(st, 5.0) == 5.0
+
+    @pytest.mark.parametrize(
+        "source, combine", [("size", "max"), ([], "max"), ("mtime", "avg")]
+    )
+    def test_invalid_arguments(self, source, combine):
+        """不正な時刻または組み合わせ方はValueErrorになる"""
+        with pytest.raises(ValueError):
+            TimeSource(source, combine)
+
+
+@pytest.mark.skipif(timesource._statx is None, reason="statx が利用できない環境")
+class TestStatx:
+    def test_matches_os_stat(self, tmp_path):
+        """statx の結果は os.stat と一致する"""
+        target = tmp_path / "file.log"
+        target.write_bytes(b"x" * 5000)
+        _set_times(target, 3, 7)
+
+        st, _ = statx(target)
+        expected = os.stat(target)
+        for attr in (
+            "st_mode",
+            "st_ino",
+            "st_dev",
+            "st_nlink",
+            "st_size",
+            "st_mtime",
+            "st_atime_ns",
+            "st_mtime_ns",
+            "st_ctime_ns",
+            "st_blocks",
+        ):
+            assert getattr(st, attr) == getattr(expected, attr), attr
+
+    def test_missing_file(self, tmp_path):
+        """存在しないファイルは FileNotFoundError になる"""
+        with pytest.raises(FileNotFoundError):
+            statx(tmp_path / "missing")
+
+    def test_birthtime_uses_single_call(self, tmp_path):
+        """作成日時を使用する場合も1ファイルにつき1回の statx で判定する"""
+        for i in range(3):
+            (tmp_path / f"{i}.log").touch()
+
+        with patch.object(timesource, "statx", wraps=timesource.statx) as spy:
+            result = remove_expired_files(
+                tmp_path, timedelta(days=1), time_source="birthtime"
+            )
+
+        assert result == 0
+        assert spy.call_count == 3
+
+
+class TestExpiryWithTimeSource:
+    def test_atime(self, tmp_path):
+        """最終アクセス日時で判定できる"""
+        target = tmp_path / "file.log"
+        target.touch()
+        _set_times(target, 10, 1)
+
+        assert not is_expired(target, 5)
+        assert is_expired(target, 5, time_source="atime")
+        assert not is_expired(target, 5, time_source=["atime", "mtime"])
+        assert is_expired(target, 5, time_source=["atime", "mtime"], time_combine="min")
+
+    def test_remove_by_newest_of_atime_and_mtime(self, tmp_path):
+        """更新とアクセスのどちらも期限より前のファイルだけを削除する"""
+        read_recently = tmp_path / "read.log"
+        untouched = tmp_path / "untouched.log"
+        read_recently.touch()
+        untouched.touch()
+        _set_times(read_recently, 1, 10)
+        _set_times(untouched, 10, 10)
+
+        result = remove_expired_files(tmp_path, 5, time_source=["mtime", "atime"])
+
+        assert result == 1
+        assert [p.name for p in tmp_path.iterdir()] == ["read.log"]
+
+    def test_ctime_is_recent(self, tmp_path):
+        """utime で更新日時を戻してもメタデータの変更日時は新しいまま"""
+        target = tmp_path / "file.log"
+        target.touch()
+        _set_times(target, 10, 10)
+
+        assert remove_expired_files(tmp_path, 5, time_source="ctime") == 0
+        assert remove_expired_files(tmp_path, 5) == 1
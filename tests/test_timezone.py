@@ -0,0 +1,141 @@
+"""
+タイムゾーンを指定した期限切れ判定のテスト
+"""
+
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import pytest
+
+from expired_file_remover.core import (
+    _FilenameDateParser,
+    _resolve_deadline,
+    extract_date_from_filename,
+    is_expired,
+    is_filename_date_expired,
+    remove_expired_files,
+    remove_expired_files_by_filename_date,
+)
+
+JST = timezone(timedelta(hours=9))
+
+
+@pytest.fixture
+def jst_host(monkeypatch):
+    """ローカル時刻を JST に設定する"""
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset が利用できない環境")
+    monkeypatch.setenv("TZ", "JST-9")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+class TestResolveDeadline:
+    def test_naive_datetime_is_in_tz(self):
+        """naive な datetime は tz の時刻としてそのまま扱う"""
+        deadline = datetime(2024, 1, 1, 12)
+        assert _resolve_deadline(deadline, timezone.utc) == deadline
+
+    def test_aware_datetime_is_converted(self):
+        """aware な datetime は tz の時刻に変換する"""
+        deadline = datetime(2024, 1, 1, 21, tzinfo=JST)
+        assert _resolve_deadline(deadline, timezone.utc) == datetime(2024, 1, 1, 12)
+
+    def test_relative_deadline_uses_now_in_tz(self):
+        """timedelta や日数は tz の現在時刻から計算する"""
+        expected = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=1)
+        resolved = _resolve_deadline(1, timezone.utc)
+        assert abs(resolved - expected) < timedelta(seconds=5)
+
+
+class TestFilenameDateTimezone:
+    def test_utc_names_on_jst_host(self, jst_host, tmp_path):
+        """UTC の日時を含むファイル名を JST のホストで正しく判定する"""
+        now_utc = datetime.now(timezone.utc).replace(tzinfo=None)
+        # UTC で1時間前の日時（JST のローカル時刻として読むと10時間前になる）
+        stamp = (now_utc - timedelta(hours=1)).strftime("%Y%m%d_%H%M%S")
+        name = f"app_{stamp}.log"
+        (tmp_path / name).touch()
+
+        assert is_filename_date_expired(
+            tmp_path / name, "%Y%m%d_%H%M%S", timedelta(hours=5)
+        )
+        assert not is_filename_date_expired(
+            tmp_path / name, "%Y%m%d_%H%M%S", timedelta(hours=5), tz=timezone.utc
+        )
+
+        count = remove_expired_files_by_filename_date(
+            tmp_path, "%Y%m%d_%H%M%S", timedelta(hours=5), tz=timezone.utc
+        )
+        assert count == 0
+        count = remove_expired_files_by_filename_date(
+            tmp_path, "%Y%m%d_%H%M%S", timedelta(minutes=30), tz=timezone.utc
+        )
+        assert count == 1
+
+    def test_epoch_and_offset_are_converted_to_tz(self):
+        """エポック秒と UTC オフセット付きの日時は tz の時刻に変換する"""
+        assert extract_date_from_filename(
+            "dump_1704067200.sql", "%s", tz=timezone.utc
+        ) == datetime(2024, 1, 1)
+        assert extract_date_from_filename(
+            "b_2024-01-01T09:00:00+09:00", "%Y-%m-%dT%H:%M:%S%z", tz=timezone.utc
+        ) == datetime(2024, 1, 1)
+
+    def test_no_per_file_conversion(self):
+        """通常の日付はファイルごとにタイムゾーンを変換せずに比較する"""
+        parser = _FilenameDateParser("%Y%m%d", timezone.utc)
+        assert parser.parse("log_20240101") == datetime(2024, 1, 1)
+
+    def test_epoch_compared_as_timestamp(self, tmp_path):
+        """エポック秒は壁時計の時刻に変換せず、夏時間の重複する時間帯でも正しく判定する"""
+        try:
+            tz = ZoneInfo("America/New_York")
+        except ZoneInfoNotFoundError:
+            pytest.skip("タイムゾーンのデータベースがない環境")
+        # 2024-11-03 01:30 は2回ある。naive な基準日時は1回目（EDT）として扱う
+        deadline = datetime(2024, 11, 3, 1, 30)
+        edt = int(datetime(2024, 11, 3, 1, 15, tzinfo=tz).timestamp())
+        est = int(datetime(2024, 11, 3, 1, 15, fold=1, tzinfo=tz).timestamp())
+        for stamp in (edt, est):
+            (tmp_path / f"dump_{stamp}.sql").touch()
+            (tmp_path / f"trace_{stamp}000.json").touch()
+
+        count = remove_expired_files_by_filename_date(
+            tmp_path, ["%s", "%Q"], deadline, tz=tz
+        )
+
+        assert count == 2
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            f"dump_{est}.sql",
+            f"trace_{est}000.json",
+        ]
+
+    def test_epoch_parser_expired(self):
+        """エポックミリ秒も基準日時のエポック秒と数値のまま比較する"""
+        parser = _FilenameDateParser("%Q", timezone.utc)
+        cutoff = datetime(2024, 1, 1)
+        assert parser.expired("t_1704067199999", cutoff, 1704067200.0)
+        assert not parser.expired("t_1704067200000", cutoff, 1704067200.0)
+        assert not parser.expired("t_latest", cutoff, 1704067200.0)
+
+
+class TestMtimeTimezone:
+    def test_naive_datetime_deadline_in_tz(self, tmp_path):
+        """naive な datetime の deadline を tz の時刻として解釈する"""
+        target = tmp_path / "file.log"
+        target.touch()
+        mtime = datetime(2024, 1, 1, 12, tzinfo=timezone.utc).timestamp()
+        os.utime(target, (mtime, mtime))
+
+        # UTC 12:30 は mtime より後、JST 12:30（UTC 3:30）は mtime より前
+        assert is_expired(target, datetime(2024, 1, 1, 12, 30), tz=timezone.utc)
+        assert not is_expired(target, datetime(2024, 1, 1, 12, 30), tz=JST)
+
+        deadline = datetime(2024, 1, 1, 12, 30)
+        assert remove_expired_files(tmp_path, deadline, tz=JST) == 0
+        assert remove_expired_files(tmp_path, deadline, tz=timezone.utc) == 1
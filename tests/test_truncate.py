@@ -0,0 +1,130 @@
+"""
+大きなファイルを段階的に切り詰めてから削除する機能のテスト
+"""
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from expired_file_remover.core import _truncate_and_unlink, remove_expired_files
+
+from .conftest import make_old_file
+
+
+class TestTruncateBeforeUnlink:
+    def test_large_file_truncated_in_chunks(self, tmp_path):
+        """閾値を超えるファイルはチャンク単位で切り詰められてから削除される"""
+        big = make_old_file(tmp_path / "big.dat", data=b"x" * 10_000)
+
+        with patch("os.ftruncate", wraps=os.ftruncate) as mock_truncate:
+            _truncate_and_unlink(big, truncate_threshold=1000, chunk_size=4000)
+
+        assert not big.exists()
+        sizes = [c.args[1] for c in mock_truncate.call_args_list]
+        assert sizes == [6000, 2000, 0]
+
+    def test_small_file_not_truncated(self, tmp_path):
+        """閾値以下のファイルは切り詰めずに削除される"""
+        small = make_old_file(tmp_path / "small.dat", data=b"x" * 100)
+
+        with patch("os.ftruncate") as mock_truncate:
+            _truncate_and_unlink(small, truncate_threshold=1000, chunk_size=10)
+
+        assert not small.exists()
+        mock_truncate.assert_not_called()
+
+    def test_hardlinked_file_not_truncated(self, tmp_path):
+        """ハードリンクのあるファイルは他のリンクの内容を壊さないよう切り詰めない"""
+        big = make_old_file(tmp_path / "big.dat", data=b"x" * 10_000)
+        link = tmp_path / "link.dat"
+        os.link(big, link)
+
+        _truncate_and_unlink(big, truncate_threshold=1000, chunk_size=4000)
+
+        assert not big.exists()
+        assert link.stat().st_size == 10_000
+
+    def test_not_truncated_when_unlink_fails(self, tmp_path):
+        """unlink に失敗した場合は切り詰めず、ファイルの内容が残る"""
+        big = make_old_file(tmp_path / "big.dat", data=b"x" * 10_000)
+
+        with patch.object(Path, "unlink", side_effect=PermissionError(1, "denied")):
+            with pytest.raises(PermissionError):
+                _truncate_and_unlink(big, truncate_threshold=1000, chunk_size=4000)
+
+        assert big.stat().st_size == 10_000
+
+    def test_replaced_file_not_truncated(self, tmp_path):
+        """lstat の後に置き換えられたファイルは切り詰めない"""
+        big = make_old_file(tmp_path / "big.dat", data=b"x" * 10_000)
+        other = make_old_file(tmp_path / "other.dat", data=b"x" * 10_000)
+        real_open = os.open
+
+        def swapping_open(path, *args, **kwargs):
+            os.replace(other, big)
+            return real_open(path, *args, **kwargs)
+
+        with patch("os.ftruncate") as mock_truncate:
+            with patch("os.open", swapping_open):
+                _truncate_and_unlink(big, truncate_threshold=1000, chunk_size=4000)
+
+        assert not big.exists()
+        mock_truncate.assert_not_called()
+
+    def test_uses_scanned_stat(self, tmp_path):
+        """走査時の stat を渡すと、ファイルごとに lstat し直さない"""
+        big = make_old_file(tmp_path / "big.dat", data=b"x" * 10_000)
+        st = big.stat()
+
+        with patch.object(Path, "lstat", side_effect=AssertionError("lstat")):
+            with patch("os.ftruncate", wraps=os.ftruncate) as mock_truncate:
+                _truncate_and_unlink(
+                    big, truncate_threshold=1000, chunk_size=4000, st=st
+                )
+
+        assert not big.exists()
+        assert mock_truncate.call_count == 3
+
+    def test_replaced_after_scan_not_truncated(self, tmp_path):
+        """走査の後に置き換えられたファイルは、渡された stat と一致しないため切り詰めない"""
+        big = make_old_file(tmp_path / "big.dat", data=b"x" * 10_000)
+        st = big.stat()
+        other = make_old_file(tmp_path / "other.dat", data=b"x" * 10_000)
+        os.replace(other, big)
+
+        with patch("os.ftruncate") as mock_truncate:
+            _truncate_and_unlink(big, truncate_threshold=1000, chunk_size=4000, st=st)
+
+        assert not big.exists()
+        mock_truncate.assert_not_called()
+
+    def test_rate_limit_sleeps_per_chunk(self, tmp_path):
+        """速度制限を指定するとチャンクごとに待機する"""
+        big = make_old_file(tmp_path / "big.dat", data=b"x" * 8000)
+
+        with patch("expired_file_remover.core.time.sleep") as mock_sleep:
+            _truncate_and_unlink(
+                big, truncate_threshold=0, chunk_size=4000, rate_limit=8000
+            )
+
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [0.5, 0.5]
+
+    def test_remove_expired_files_with_truncate_threshold(self, tmp_path):
+        """remove_expired_filesから切り詰め削除を利用できる"""
+        make_old_file(tmp_path / "big.dat", data=b"x" * 10_000)
+        make_old_file(tmp_path / "small.dat", data=b"x" * 10)
+        (tmp_path / "new.dat").write_bytes(b"x" * 10_000)
+
+        count = remove_expired_files(
+            tmp_path, 5, truncate_threshold=1000, truncate_chunk_size=1024
+        )
+
+        assert count == 2
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["new.dat"]
+
+    def test_invalid_chunk_size(self, tmp_path):
+        """チャンクサイズが0以下の場合はValueError"""
+        with pytest.raises(ValueError):
+            remove_expired_files(tmp_path, 5, truncate_chunk_size=0)
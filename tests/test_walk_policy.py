@@ -0,0 +1,111 @@
+"""
+走査時のシンボリックリンク・ファイルシステムの境界・特殊ファイルの扱いのテスト
+"""
+
+import os
+import socket
+import time
+from pathlib import Path
+
+import pytest
+
+from expired_file_remover.core import (
+    _DirectoryWalker,
+    remove_expired_files,
+    remove_expired_files_by_filename_date,
+)
+from expired_file_remover.store import scan_expired_files
+
+from .conftest import make_old_file
+
+
+class TestFollowSymlinks:
+    def test_not_followed_by_default(self, tmp_path):
+        """既定ではシンボリックリンク先のディレクトリに潜らない"""
+        target = tmp_path / "target"
+        target.mkdir()
+        make_old_file(target / "a.log")
+        root = tmp_path / "root"
+        root.mkdir()
+        (root / "link").symlink_to(target)
+
+        assert remove_expired_files(root, 10, recursive=True) == 0
+        assert remove_expired_files(root, 10, recursive=True, follow_symlinks=True) == 1
+        assert not (target / "a.log").exists()
+
+    def test_symlink_loop(self, tmp_path):
+        """循環するシンボリックリンクがあっても各ディレクトリを1回だけ走査する"""
+        sub = tmp_path / "sub"
+        sub.mkdir()
+        (sub / "up").symlink_to(tmp_path)
+        (tmp_path / "self").symlink_to(tmp_path)
+        for name in ["a.log", "b.log"]:
+            (sub / name).touch()
+
+        walker = _DirectoryWalker(tmp_path, True, follow_symlinks=True)
+        assert sorted(p.name for p in walker) == ["a.log", "b.log"]
+
+
+class TestOneFileSystem:
+    def test_does_not_cross_mounts(self, tmp_path, other_filesystem):
+        """ルートと異なるファイルシステムのディレクトリに潜らない"""
+        (tmp_path / "sub").mkdir()
+        make_old_file(tmp_path / "sub" / "local.log")
+        remote = Path(other_filesystem) / "remote.log"
+        make_old_file(remote)
+        (tmp_path / "mnt").symlink_to(other_filesystem)
+
+        result = remove_expired_files(
+            tmp_path, 10, recursive=True, follow_symlinks=True, one_file_system=True
+        )
+
+        assert result == 1
+        assert remote.exists()
+        assert remove_expired_files(tmp_path, 10, recursive=True, follow_symlinks=True)
+        assert not remote.exists()
+
+
+class TestSpecialFiles:
+    @pytest.fixture
+    def special_files(self, tmp_path):
+        if not hasattr(os, "mkfifo"):
+            pytest.skip("FIFO を作成できない環境")
+        os.mkfifo(tmp_path / "fifo")
+        sock = socket.socket(socket.AF_UNIX)
+        sock.bind(str(tmp_path / "sock"))
+        (tmp_path / "fifo-link").symlink_to(tmp_path / "fifo")
+        make_old_file(tmp_path / "regular.log")
+        for name in ["fifo", "sock", "fifo-link"]:
+            stamp = time.time() - 30 * 24 * 60 * 60
+            os.utime(tmp_path / name, (stamp, stamp))
+        yield tmp_path
+        sock.close()
+
+    def test_skip_special_files(self, special_files):
+        """ソケット・FIFO とそれを指すシンボリックリンクを対象外にする"""
+        result = remove_expired_files(special_files, 10, skip_special_files=True)
+
+        assert result == 1
+        assert sorted(p.name for p in special_files.iterdir()) == [
+            "fifo",
+            "fifo-link",
+            "sock",
+        ]
+
+    def test_walker_uses_entry_type(self, special_files):
+        """特殊ファイルは DirEntry の種別で除外する"""
+        walker = _DirectoryWalker(special_files, False, skip_special_files=True)
+        assert sorted(p.name for p in walker) == ["fifo-link", "regular.log"]
+
+    def test_scan_and_filename_date(self, special_files):
+        """scan_expired_files と remove_expired_files_by_filename_date でも除外する"""
+        os.mkfifo(special_files / "pipe_20000101")
+
+        store = scan_expired_files(special_files, 10, skip_special_files=True)
+        assert [record.name for record in store] == ["regular.log"]
+
+        result = remove_expired_files_by_filename_date(
+            special_files, "%Y%m%d", 10, skip_special_files=True
+        )
+        assert result == 0
+        assert (special_files / "pipe_20000101").exists()
@@ -0,0 +1,124 @@
+"""
+write-once モードのウォーターマークによる stat の省略のテスト
+"""
+
+import pathlib
+from unittest.mock import patch
+
+import pytest
+
+from expired_file_remover.core import remove_expired_files
+from expired_file_remover.watermark import WatermarkStore
+
+from .conftest import backdate, make_old_file
+
+
+def _make_archive(directory, names, days):
+    directory.mkdir()
+    for name in names:
+        make_old_file(directory / name, days)
+    backdate(directory, days)
+
+
+def _count_file_stats():
+    """ファイル（.log）に対する Path.stat の呼び出しを数える"""
+    calls = []
+    real_stat = pathlib.Path.stat
+
+    def counting_stat(self, *args, **kwargs):
+        if self.suffix == ".log":
+            calls.append(self.name)
+        return real_stat(self, *args, **kwargs)
+
+    return calls, patch.object(pathlib.Path, "stat", counting_stat)
+
+
+class TestWatermarkStore:
+    def test_persistence(self, tmp_path):
+        """保存したウォーターマークを次回読み込める"""
+        store = WatermarkStore(tmp_path / "wm.json")
+        store.bind([".log"])
+        store.update(tmp_path / "a", 123.5)
+        store.save()
+
+        loaded = WatermarkStore(tmp_path / "wm.json")
+        loaded.bind([".log"])
+        assert loaded.get(tmp_path / "a") == 123.5
+        assert loaded.get(tmp_path / "b") is None
+
+    def test_bind_discards_other_filter(self, tmp_path):
+        """異なる file_filter で使用するとウォーターマークを破棄する"""
+        store = WatermarkStore(tmp_path / "wm.json")
+        store.bind(None)
+        store.update(tmp_path / "a", 1.0)
+        store.bind([".log"])
+        assert len(store) == 0
+
+
+class TestWriteOnce:
+    def test_second_run_skips_file_stats(self, tmp_path):
+        """2回目の実行では古いディレクトリのファイルを stat せずに削除する"""
+        root = tmp_path / "root"
+        root.mkdir()
+        _make_archive(root / "2023", ["a.log", "b.log"], 30)
+        watermark_file = tmp_path / "wm.json"
+
+        # 1回目は基準日時より新しいのでウォーターマークの記録だけを行う
+        first = remove_expired_files(
+            root, 60, recursive=True, write_once=True, watermark_file=watermark_file
+        )
+        assert first == 0
+
+        calls, patcher = _count_file_stats()
+        with patcher:
+            second = remove_expired_files(
+                root, 10, recursive=True, write_once=True, watermark_file=watermark_file
+            )
+
+        assert second == 2
+        assert calls == []
+        assert list((root / "2023").iterdir()) == []
+
+    def test_new_watermark_prevents_elision(self, tmp_path):
+        """前回の最新ファイルが基準日時より新しいディレクトリは通常どおり判定する"""
+        root = tmp_path / "root"
+        _make_archive(root, ["old.log", "new.log"], 30)
+        backdate(root / "new.log", 1)
+        backdate(root, 30)
+        watermark_file = tmp_path / "wm.json"
+
+        for _ in range(2):
+            result = remove_expired_files(
+                root, 10, write_once=True, watermark_file=watermark_file
+            )
+            backdate(root, 30)
+
+        assert result == 0
+        assert [p.name for p in root.iterdir()] == ["new.log"]
+
+    def test_without_watermark_stats_every_file(self, tmp_path):
+        """ウォーターマークがない場合はファイルごとに判定する"""
+        root = tmp_path / "root"
+        _make_archive(root, ["a.log"], 30)
+
+        calls, patcher = _count_file_stats()
+        with patcher:
+            result = remove_expired_files(
+                root, 10, write_once=True, watermark_file=tmp_path / "wm.json"
+            )
+
+        assert result == 1
+        assert calls == ["a.log"]
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {},
+            {"watermark_file": "wm.json", "hardlinks": "all"},
+            {"watermark_file": "wm.json", "time_source": "atime"},
+        ],
+    )
+    def test_invalid_arguments(self, tmp_path, kwargs):
+        """watermark_file がない場合や両立しない引数はValueErrorになる"""
+        with pytest.raises(ValueError):
+            remove_expired_files(tmp_path, 10, write_once=True, **kwargs)